@@ -1,10 +1,17 @@
-from fastapi import APIRouter, Depends
+import uuid
+
+from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
 from app.db.session import get_db
 from app.models.user import User
+from app.schemas.user import RoleUpdate
 from app.api.auth.dependencies import require_admin
+from app.core.revocation import revoke_user_tokens
+from app.core.database import engine
+from app.core import db_metrics
+from app.core.logging import queue_stats
 
 router = APIRouter(
     prefix="/admin",
@@ -16,4 +23,32 @@ router = APIRouter(
 async def get_all_users(db: AsyncSession = Depends(get_db)):
     result = await db.execute(select(User))
     users = result.scalars().all()
-    return users
\ No newline at end of file
+    return users
+
+@router.patch("/users/{user_id}/role")
+async def update_user_role(
+    user_id: uuid.UUID,
+    update: RoleUpdate,
+    db: AsyncSession = Depends(get_db)
+):
+    user = await db.get(User, user_id)
+    if user is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    user.role = update.role
+    # Tokens carry the role claim, so force a fresh login.
+    await revoke_user_tokens(db, user.id)
+    await db.commit()
+
+    return {
+        "success": True,
+        "role": user.role
+    }
+
+@router.get("/db/pool")
+async def database_pool_stats():
+    return db_metrics.snapshot(engine)
+
+@router.get("/logging/queue")
+async def logging_queue_stats():
+    return queue_stats()
\ No newline at end of file
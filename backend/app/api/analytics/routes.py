@@ -1,31 +1,63 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Path, Query, Request
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, func
-from datetime import date, timedelta
+from datetime import date
 
-from app.db.session import get_db
+from app.models.category import Category
 from app.models.expense import Expense
-from app.api.auth.dependencies import get_current_user
-from app.ml.forecast import forecast_next_month
-from app.ml.anomaly import detect_anomalies
+from app.models.rollup import DailySpend, MonthlySpend
+from app.api.auth.dependencies import get_current_user, get_read_db
+from app.core.cache import data_version
+from app.core.response_cache import cached_response
+from app.core.time_buckets import days, last_n_dates, local_day, local_today, month_start, user_zone
+from app.services.export import EXPORT_FORMATS, stream_dataset
+from app.services.forecasting import monthly_forecast, stored_forecast
+from app.services.jobs import JOB_KINDS, jobs
+from app.services import budgets, snapshots
 
 router = APIRouter(
     prefix="/analytics",
     tags=["Analytics"]
 )
 
+# "columns": {categories, amount, category (codes), date} as parallel arrays
+DATASET_FORMAT = Query("json", alias="format", pattern="^(json|columns|ndjson|csv)$")
+
+def _streamed_dataset(db, query, export_format, tz):
+    return StreamingResponse(
+        stream_dataset(db, query, export_format, tz),
+        media_type=EXPORT_FORMATS[export_format]
+    )
+
+async def _dataset(db, user_id, query, export_format, tz, period=None):
+    if export_format in EXPORT_FORMATS:
+        return _streamed_dataset(db, query, export_format, tz)
+
+    # Memory-mapped columns when SNAPSHOT_DIR is set
+    snapshot = await snapshots.load(db, user_id)
+    if snapshot is None:
+        snapshot = snapshots.from_rows((await db.execute(query)).all())
+    else:
+        snapshot = snapshot.ordered()
+        if period is not None:
+            snapshot = snapshot.between(period)
+
+    return snapshots.dataset_response(snapshot, tz, columnar=export_format == "columns")
+
 @router.get("/monthly-total")
+@cached_response
 async def monthly_total(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
-    today = date.today()
+    today = local_today(user_zone(user))
 
     result = await db.execute(
-        select(func.coalesce(func.sum(Expense.amount), 0))
-        .where(Expense.user_id == user.id)
-        .where(func.date_part("month", Expense.created_at) == today.month)
-        .where(func.date_part("year", Expense.created_at) == today.year)
+        select(func.coalesce(func.sum(MonthlySpend.total), 0))
+        .where(MonthlySpend.user_id == user.id)
+        .where(MonthlySpend.month == month_start(today))
     )
 
     total = result.scalar()
@@ -37,17 +69,20 @@ async def monthly_total(
     }
 
 @router.get("/by-category")
+@cached_response
 async def expenses_by_category(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
     result = await db.execute(
         select(
-            Expense.category,
-            func.sum(Expense.amount).label("total")
+            Category.name.label("category"),
+            func.sum(MonthlySpend.total).label("total")
         )
-        .where(Expense.user_id == user.id)
-        .group_by(Expense.category)
+        .join_from(MonthlySpend, Category, MonthlySpend.category_id == Category.id)
+        .where(MonthlySpend.user_id == user.id)
+        .group_by(Category.id)
     )
 
     rows = result.all()
@@ -61,21 +96,23 @@ async def expenses_by_category(
     ]
 
 @router.get("/last-7-days")
+@cached_response
 async def last_7_days_trend(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
-    start_date = date.today() - timedelta(days=6)
+    start_date, _ = last_n_dates(7, user_zone(user))
 
     result = await db.execute(
         select(
-            func.date(Expense.created_at).label("day"),
-            func.sum(Expense.amount).label("total")
+            DailySpend.day,
+            func.sum(DailySpend.total).label("total")
         )
-        .where(Expense.user_id == user.id)
-        .where(Expense.created_at >= start_date)
-        .group_by(func.date(Expense.created_at))
-        .order_by(func.date(Expense.created_at))
+        .where(DailySpend.user_id == user.id)
+        .where(DailySpend.day >= start_date)
+        .group_by(DailySpend.day)
+        .order_by(DailySpend.day)
     )
 
     rows = result.all()
@@ -89,21 +126,23 @@ async def last_7_days_trend(
     ]
 
 @router.get("/last-30-days")
+@cached_response
 async def last_30_days_trend(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
-    start_date = date.today() - timedelta(days=29)
+    start_date, _ = last_n_dates(30, user_zone(user))
 
     result = await db.execute(
         select(
-            func.date(Expense.created_at).label("day"),
-            func.sum(Expense.amount).label("total")
+            DailySpend.day,
+            func.sum(DailySpend.total).label("total")
         )
-        .where(Expense.user_id == user.id)
-        .where(Expense.created_at >= start_date)
-        .group_by(func.date(Expense.created_at))
-        .order_by(func.date(Expense.created_at))
+        .where(DailySpend.user_id == user.id)
+        .where(DailySpend.day >= start_date)
+        .group_by(DailySpend.day)
+        .order_by(DailySpend.day)
     )
 
     rows = result.all()
@@ -117,129 +156,87 @@ async def last_30_days_trend(
     ]
 
 @router.get("/alerts")
+@cached_response
 async def spending_alerts(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
-    from datetime import date
-    from sqlalchemy import func
-    from app.models.budget import Budget
-
-    today = date.today()
-
-    budget_result = await db.execute(
-        select(Budget)
-        .where(Budget.user_id == user.id)
-        .order_by(Budget.created_at.desc())
-    )
-    budget = budget_result.scalar_one_or_none()
+    # Maintained by the expense write hooks and set_budget, see services/budgets.py
+    state = await budgets.current_state(db, user.id)
 
-    if not budget:
+    if state is None or state.monthly_limit is None:
         return {"alert": "No budget set"}
 
-    expense_result = await db.execute(
-        select(func.coalesce(func.sum(Expense.amount), 0))
-        .where(Expense.user_id == user.id)
-        .where(func.date_part("month", Expense.created_at) == today.month)
-        .where(func.date_part("year", Expense.created_at) == today.year)
-    )
-
-    total_spent = expense_result.scalar()
+    view = budgets.state_view(state, user_zone(user))
 
-    if total_spent > budget.monthly_limit:
+    if view["spent"] > view["limit"]:
         return {
             "alert": "Over budget",
-            "limit": budget.monthly_limit,
-            "spent": total_spent
+            "limit": view["limit"],
+            "spent": view["spent"]
         }
 
     return {
         "alert": "Within budget",
-        "limit": budget.monthly_limit,
-        "spent": total_spent
+        "limit": view["limit"],
+        "spent": view["spent"]
     }
 
 @router.get("/ml-dataset")
 async def ml_dataset(
-    db: AsyncSession = Depends(get_db),
+    export_format: str = DATASET_FORMAT,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
-    result = await db.execute(
+    tz = user_zone(user)
+    query = (
         select(
             Expense.amount,
-            Expense.category,
+            Category.name.label("category"),
             Expense.created_at
         )
+        .join_from(Expense, Category, Expense.category_id == Category.id)
         .where(Expense.user_id == user.id)
         .order_by(Expense.created_at)
     )
 
-    rows = result.all()
-
-    return [
-        {
-            "amount": row.amount,
-            "category": row.category,
-            "date": row.created_at.date()
-        }
-        for row in rows
-    ]
+    return await _dataset(db, user.id, query, export_format, tz)
 
 @router.get("/ml-dataset/range")
 async def ml_dataset_by_date(
     start_date: date,
     end_date: date,
-    db: AsyncSession = Depends(get_db),
+    export_format: str = DATASET_FORMAT,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
-    result = await db.execute(
+    tz = user_zone(user)
+    period = days(start_date, end_date, tz)
+    query = (
         select(
             Expense.amount,
-            Expense.category,
+            Category.name.label("category"),
             Expense.created_at
         )
+        .join_from(Expense, Category, Expense.category_id == Category.id)
         .where(Expense.user_id == user.id)
-        .where(Expense.created_at >= start_date)
-        .where(Expense.created_at <= end_date)
+        .where(period.where(Expense.created_at))
         .order_by(Expense.created_at)
     )
 
-    rows = result.all()
-
-    return [
-        {
-            "amount": row.amount,
-            "category": row.category,
-            "date": row.created_at.date()
-        }
-        for row in rows
-    ]
+    return await _dataset(db, user.id, query, export_format, tz, period)
 
 @router.get("/forecast/monthly")
+@cached_response
 async def forecast_monthly_expense(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(
-            Expense.amount,
-            Expense.created_at
-        )
-        .where(Expense.user_id == user.id)
-        .order_by(Expense.created_at)
-    )
-
-    rows = result.all()
-
-    expenses = [
-        {
-            "amount": row.amount,
-            "date": row.created_at.date()
-        }
-        for row in rows
-    ]
-
-    prediction = forecast_next_month(expenses)
+    fresh, prediction = await stored_forecast(db, user.id)
+    if not fresh:
+        prediction = await monthly_forecast(db, user.id, await data_version(user.id))
 
     if prediction is None:
         return {
@@ -251,33 +248,58 @@ async def forecast_monthly_expense(
     }
 
 @router.get("/anomalies")
+@cached_response
 async def detect_expense_anomalies(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
+    tz = user_zone(user)
+
+    # Expenses are scored when they are written, see services/anomaly_stats.py
     result = await db.execute(
         select(
             Expense.amount,
-            Expense.category,
+            Category.name.label("category"),
             Expense.created_at
         )
+        .join_from(Expense, Category, Expense.category_id == Category.id)
         .where(Expense.user_id == user.id)
+        .where(Expense.is_anomaly)
+        .order_by(Expense.created_at)
     )
 
     rows = result.all()
 
-    expenses = [
+    anomalies = [
         {
             "amount": row.amount,
             "category": row.category,
-            "date": row.created_at.date()
+            "date": local_day(row.created_at, tz)
         }
         for row in rows
     ]
 
-    anomalies = detect_anomalies(expenses)
-
     return {
         "count": len(anomalies),
         "anomalies": anomalies
-    }
\ No newline at end of file
+    }
+
+@router.post("/jobs/{kind}", status_code=202)
+async def submit_job(
+    kind: str = Path(pattern=f"^({'|'.join(JOB_KINDS)})$"),
+    user=Depends(get_current_user)
+):
+    job = await jobs.submit(user, kind)
+    return job.describe()
+
+@router.get("/jobs/{job_id}")
+async def job_status(
+    job_id: str,
+    wait: float = Query(0, ge=0, le=30, description="Seconds to wait for the job to finish"),
+    user=Depends(get_current_user)
+):
+    job = jobs.get(job_id, user.id)
+    if wait:
+        await jobs.wait(job, wait)
+    return job.describe()
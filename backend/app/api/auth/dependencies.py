@@ -1,3 +1,6 @@
+from dataclasses import dataclass
+import uuid
+
 from fastapi import Depends, HTTPException, status
 from jose import jwt, JWTError
 from sqlalchemy.ext.asyncio import AsyncSession
@@ -5,44 +8,84 @@ from sqlalchemy import select
 
 from app.core.security import oauth2_scheme
 from app.core.config import settings
+from app.core.revocation import revocation_list
 from app.models.user import User
-from app.db.session import get_db
+from app.db.session import get_db, read_sessionmaker
 
-async def get_current_user(
-    token: str = Depends(oauth2_scheme),
-    db: AsyncSession = Depends(get_db),
-):
-    credentials_exception = HTTPException(
+@dataclass(frozen=True)
+class TokenUser:
+    """
+    The authenticated user as described by the token claims (AUTH_STATELESS).
+    """
+    id: uuid.UUID
+    role: str
+    timezone: str = "UTC"
+
+
+def credentials_exception():
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
 
+
+def decode_token(token: str) -> dict:
     try:
         payload = jwt.decode(
             token,
             settings.SECRET_KEY,
             algorithms=[settings.ALGORITHM],
         )
-        user_id: str | None = payload.get("sub")
-        if user_id is None:
-            raise credentials_exception
     except JWTError:
-        raise credentials_exception
+        raise credentials_exception()
+
+    if payload.get("sub") is None or revocation_list.is_revoked(payload):
+        raise credentials_exception()
+
+    return payload
+
+
+async def get_current_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+):
+    payload = decode_token(token)
+    user_id: str = payload["sub"]
+
+    if settings.AUTH_STATELESS:
+        try:
+            return TokenUser(
+                id=uuid.UUID(user_id),
+                role=payload.get("role", "user"),
+                timezone=payload.get("tz", "UTC"),
+            )
+        except ValueError:
+            raise credentials_exception()
 
     result = await db.execute(select(User).where(User.id == user_id))
     user = result.scalar_one_or_none()
 
     if user is None:
-        raise credentials_exception
+        raise credentials_exception()
 
     return user
 
 
+async def get_read_db(user=Depends(get_current_user)):
+    """
+    Session for read-only handlers: the read replica when it is healthy and
+    the user has not written recently, else the primary.
+    """
+    session_factory = await read_sessionmaker(user.id)
+    async with session_factory() as session:
+        yield session
+
+
 async def require_admin(user=Depends(get_current_user)):
     if user.role != "admin":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Admin access only",
         )
-    return user
\ No newline at end of file
+    return user
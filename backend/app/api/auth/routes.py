@@ -2,18 +2,23 @@ from fastapi import APIRouter, Depends, HTTPException
 from fastapi.security import OAuth2PasswordRequestForm
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from app.core.security import verify_password
+from app.core.security import verify_password_async
 from app.core.jwt import create_access_token
 from app.schemas.auth import LoginRequest
 from app.core.exceptions import AppException
 from app.db.session import get_db
-from app.core.security import hash_password
+from app.core.security import hash_password_async
 from app.schemas.user import UserCreate
 from app.models.user import User
-from app.core.logging import logger
+from app.core.security import oauth2_scheme
+from app.core.revocation import revoke_payload
+from app.api.auth.dependencies import decode_token
+import logging
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 
+logger = logging.getLogger("app.auth")
+
 @router.post("/register")
 async def register_user(
     user: UserCreate,
@@ -33,7 +38,8 @@ async def register_user(
 
     new_user = User(
         email=user.email,
-        password_hash=hash_password(user.password),
+        password_hash=await hash_password_async(user.password),
+        timezone=user.timezone,
     )
 
     db.add(new_user)
@@ -53,16 +59,33 @@ async def login_user(
     result = await db.execute(select(User).where(User.email == form_data.username))
     user = result.scalar_one_or_none()
 
-    if not user or not verify_password(form_data.password, user.password_hash):
-        logger.warning(f"Login failed | email={form_data.username}")
+    if not user or not await verify_password_async(form_data.password, user.password_hash):
+        logger.warning("Login failed | email=%s", form_data.username)
         raise AppException("Invalid email or password", status_code=401)
 
     access_token = create_access_token({
         "sub": str(user.id),
-        "role": user.role
+        "role": user.role,
+        "tz": user.timezone
     })
-    logger.info(f"User login success | user_id={user.id}")
+    logger.info("User login success | user_id=%s", user.id)
     return {
         "access_token": access_token,
         "token_type": "bearer",
-    }
\ No newline at end of file
+    }
+
+@router.post("/logout")
+async def logout_user(
+    token: str = Depends(oauth2_scheme),
+    db: AsyncSession = Depends(get_db),
+):
+    payload = decode_token(token)
+
+    await revoke_payload(db, payload)
+    await db.commit()
+
+    logger.info("User logout | user_id=%s", payload["sub"])
+    return {
+        "success": True,
+        "message": "Logged out"
+    }
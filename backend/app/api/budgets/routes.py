@@ -1,4 +1,8 @@
+import asyncio
+import json
+
 from fastapi import APIRouter, Depends
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 
@@ -6,12 +10,22 @@ from app.db.session import get_db
 from app.models.budget import Budget
 from app.schemas.budget import BudgetCreate, BudgetResponse
 from app.api.auth.dependencies import get_current_user
+from app.services.write_hooks import after_commit
+from app.services import budgets
+from app.core.pubsub import broker
+from app.core.time_buckets import user_zone
 
 router = APIRouter(
     prefix="/budgets",
     tags=["Budgets"]
 )
 
+# Comment line sent when idle so proxies keep the connection open.
+KEEPALIVE_SECONDS = 15
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
 @router.post("/", response_model=BudgetResponse)
 async def set_budget(
     budget: BudgetCreate,
@@ -24,7 +38,50 @@ async def set_budget(
     )
 
     db.add(new_budget)
+    await budgets.set_limit(db, user, budget.monthly_limit)
     await db.commit()
+    await after_commit(db, user.id)
     await db.refresh(new_budget)
 
-    return new_budget
\ No newline at end of file
+    return new_budget
+
+@router.get("/alerts/stream")
+async def budget_alert_stream(
+    db: AsyncSession = Depends(get_db),
+    user=Depends(get_current_user)
+):
+    """
+    Server-Sent Events: a `budget_state` event with the current limit and
+    spend, then a `budget_threshold` event whenever spending crosses one of
+    the alert thresholds.
+    """
+    state = await budgets.current_state(db, user.id)
+    snapshot = budgets.state_view(state, user_zone(user)) if state else {"limit": None, "spent": 0.0}
+    # Give the connection back to the pool; the stream may stay open for hours.
+    await db.close()
+
+    async def events():
+        yield _sse("budget_state", snapshot)
+
+        async with broker.subscribe(budgets.channel(user.id)) as messages:
+            # One pending read survives keepalive timeouts; cancelling it
+            # would close the subscription iterator.
+            pending = asyncio.ensure_future(anext(messages))
+            try:
+                while True:
+                    done, _ = await asyncio.wait({pending}, timeout=KEEPALIVE_SECONDS)
+                    if not done:
+                        yield ": keepalive\n\n"
+                        continue
+
+                    message = pending.result()
+                    pending = asyncio.ensure_future(anext(messages))
+                    yield _sse(message["type"], message)
+            finally:
+                pending.cancel()
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,95 +1,195 @@
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, Query, Request
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.session import get_db
+from app.models.category import Category
 from app.models.expense import Expense
-from app.schemas.expense import ExpenseCreate, ExpenseResponse
-from app.api.auth.dependencies import get_current_user
+from app.models.rollup import MonthlySpend
+from app.schemas.expense import ExpenseCreate, ExpenseImport, ExpenseResponse
+from app.api.auth.dependencies import get_current_user, get_read_db
+import logging
 import uuid
-from datetime import datetime
+from datetime import datetime, timezone
 from sqlalchemy import select
 from sqlalchemy import func
 from app.services.ai_insights import generate_insight
-from app.services.trend_analysis import analyze_trends
-from app.services.analytics import monthly_comparison
-from app.core.logging import logger
+from app.services.trend_analysis import analyze_trends_from
+from app.services.analytics import monthly_comparison_from
+from app.services.aggregation import SqlAggregates
+from app.services.write_hooks import after_commit, on_expenses_created
+from app.services import categories, dashboard, ingest
+from app.core.exceptions import AppException
+from app.core.response_cache import cached_response
+from app.core.responses import rows_response, select_expenses
+from app.core.time_buckets import between, local_today, user_zone
+from app.core.pagination import (
+    DEFAULT_LIMIT, MAX_LIMIT, NEXT_CURSOR_HEADER, keyset_page, split_page
+)
 
 router = APIRouter(prefix="/expenses", tags=["Expenses"])
 
+logger = logging.getLogger("app.expenses")
+
 @router.post("/", response_model=ExpenseResponse)
 async def create_expense(
     expense: ExpenseCreate,
     db: AsyncSession = Depends(get_db),
     user=Depends(get_current_user)
 ):
-    new_expense = Expense(
-        id=uuid.uuid4(),
-        user_id=user.id,
-        amount=expense.amount,
-        category=expense.category,
-        description=expense.description,
-        created_at=datetime.utcnow()
-    )
+    row = {
+        "id": uuid.uuid4(),
+        "user_id": user.id,
+        "amount": expense.amount,
+        "category": expense.category,
+        "description": expense.description,
+        "created_at": datetime.now(timezone.utc)
+    }
+    await on_expenses_created(db, user, [row])
 
-    db.add(new_expense)
+    db.add(Expense(**{key: value for key, value in row.items() if key != "category"}))
     await db.commit()   
-    await db.refresh(new_expense)  
+    await after_commit(db, user.id)
 
-    logger.info(f"Expense created | user_id={user.id} | amount={expense.amount}")
+    logger.info("Expense created | user_id=%s | amount=%s", user.id, expense.amount)
 
-    return new_expense
+    return row
 
-@router.get("/", response_model=list[ExpenseResponse])
-async def list_expenses(
+BULK_REQUEST_BODY = {
+    "requestBody": {
+        "required": True,
+        "content": {
+            "application/json": {
+                "schema": {"type": "array", "items": ExpenseImport.model_json_schema()}
+            },
+            "text/csv": {
+                "schema": {"type": "string", "description": "Header row: amount,category,description,created_at"}
+            },
+            "multipart/form-data": {
+                "schema": {
+                    "type": "object",
+                    "properties": {"file": {"type": "string", "format": "binary"}},
+                }
+            },
+        },
+    }
+}
+
+async def _upload_chunks(upload, size=64 * 1024):
+    while chunk := await upload.read(size):
+        yield chunk
+
+@router.post("/bulk", openapi_extra=BULK_REQUEST_BODY)
+async def bulk_create_expenses(
+    request: Request,
     db: AsyncSession = Depends(get_db),
     user=Depends(get_current_user)
 ):
+    content_type = request.headers.get("content-type", "")
+
+    if content_type.startswith("application/json"):
+        payload = await request.json()
+        if not isinstance(payload, list):
+            raise AppException("Expected a JSON array of expenses")
+        records = ingest.json_records(payload)
+    elif content_type.startswith("text/csv"):
+        records = ingest.csv_records(request.stream())
+    elif content_type.startswith("multipart/form-data"):
+        form = await request.form()
+        upload = form.get("file")
+        if upload is None or isinstance(upload, str):
+            raise AppException("Expected a CSV file in the 'file' field")
+        records = ingest.csv_records(_upload_chunks(upload))
+    else:
+        raise AppException("Send a JSON array, text/csv or a multipart CSV upload", status_code=415)
+
+    report = await ingest.ingest(db, user, records)
+    await db.commit()
+    await after_commit(db, user.id)
+
+    logger.info(
+        "Bulk import | user_id=%s | inserted=%s | failed=%s",
+        user.id, report["inserted"], report["failed"]
+    )
+
+    return report
+
+async def _expense_page(db, query, sort_by, order, cursor, limit):
     result = await db.execute(
-        select(Expense).where(Expense.user_id == user.id)
+        keyset_page(query, sort_by, order, cursor, limit)
+    )
+    rows, next_cursor = split_page(result.all(), sort_by, order, limit)
+
+    return rows_response(
+        rows,
+        headers={NEXT_CURSOR_HEADER: next_cursor} if next_cursor else None
+    )
+
+@router.get("/", response_model=list[ExpenseResponse])
+async def list_expenses(
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    db: AsyncSession = Depends(get_read_db),
+    user=Depends(get_current_user)
+):
+    return await _expense_page(
+        db,
+        select_expenses().where(Expense.user_id == user.id),
+        "created_at", "desc", cursor, limit
     )
-    expenses = result.scalars().all()
-    return expenses
 
 @router.get("/by-category/{category}", response_model=list[ExpenseResponse])
 async def expenses_by_category(
     category: str,
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(Expense).where(
+    category_id = await categories.find(db, user.id, category)
+    if category_id is None:
+        return rows_response([])
+
+    return await _expense_page(
+        db,
+        select_expenses().where(
             Expense.user_id == user.id,
-            Expense.category == category
-        )
+            Expense.category_id == category_id
+        ),
+        "created_at", "desc", cursor, limit
     )
-    return result.scalars().all()
 
 @router.get("/by-date", response_model=list[ExpenseResponse])
 async def expenses_by_date(
     start: datetime,
     end: datetime,
-    db: AsyncSession = Depends(get_db),
+    cursor: str | None = None,
+    limit: int = Query(DEFAULT_LIMIT, ge=1, le=MAX_LIMIT),
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(Expense).where(
+    return await _expense_page(
+        db,
+        select_expenses().where(
             Expense.user_id == user.id,
-            Expense.created_at.between(start, end)
-        )
+            between(start, end, user_zone(user)).where(Expense.created_at)
+        ),
+        "created_at", "asc", cursor, limit
     )
-    return result.scalars().all()
 
 @router.get("/summary/monthly")
+@cached_response
 async def monthly_summary(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
     result = await db.execute(
         select(
-            func.sum(Expense.amount).label("total"),
-            Expense.category
+            func.sum(MonthlySpend.total).label("total"),
+            Category.name.label("category")
         )
-        .where(Expense.user_id == user.id)
-        .group_by(Expense.category)
+        .join_from(MonthlySpend, Category, MonthlySpend.category_id == Category.id)
+        .where(MonthlySpend.user_id == user.id)
+        .group_by(Category.id)
     )
 
     rows = result.all()
@@ -103,17 +203,20 @@ async def monthly_summary(
     }
 
 @router.get("/ai/insights")
+@cached_response
 async def expense_ai_insights(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
     result = await db.execute(
         select(
-            func.sum(Expense.amount).label("total"),
-            Expense.category
+            func.sum(MonthlySpend.total).label("total"),
+            Category.name.label("category")
         )
-        .where(Expense.user_id == user.id)
-        .group_by(Expense.category)
+        .join_from(MonthlySpend, Category, MonthlySpend.category_id == Category.id)
+        .where(MonthlySpend.user_id == user.id)
+        .group_by(Category.id)
     )
 
     rows = result.all()
@@ -131,79 +234,55 @@ async def expense_ai_insights(
     }
 
 @router.get("/ai/trends")
+@cached_response
 async def expense_trends(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(Expense).where(Expense.user_id == user.id)
-    )
-    expenses = result.scalars().all()
-
-    return analyze_trends(expenses)
+    return await analyze_trends_from(SqlAggregates(db), user.id)
 
 @router.get("/analytics/monthly")
+@cached_response
 async def monthly_analytics(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(Expense).where(Expense.user_id == user.id)
+    return await monthly_comparison_from(
+        SqlAggregates(db), user.id, local_today(user_zone(user))
     )
-    expenses = result.scalars().all()
-
-    return monthly_comparison(expenses)
 
 @router.get("/dashboard/summary")
+@cached_response
 async def dashboard_summary(
-    db: AsyncSession = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
-    result = await db.execute(
-        select(Expense).where(Expense.user_id == user.id)
-    )
-    expenses = result.scalars().all()
-
-    total = sum(e.amount for e in expenses)
-
-    return {
-        "total_expenses": total,
-        "expense_count": len(expenses),
-        "latest_expense": expenses[-1].amount if expenses else 0
-    }
+    return await dashboard.dashboard_summary(db, user.id, user_zone(user))
 
 @router.get("/paginated", response_model=list[ExpenseResponse])
 async def paginated_expenses(
-    page: int = 1,
+    cursor: str | None = None,
     limit: int = 10,
     sort_by: str = "created_at",
     order: str = "desc",
-    db: AsyncSession = Depends(get_db),
+    page: int | None = Query(None, deprecated=True),
+    db: AsyncSession = Depends(get_read_db),
     user=Depends(get_current_user)
 ):
+    if page is not None and page > 1:
+        raise AppException(
+            f"page is no longer supported, pass the {NEXT_CURSOR_HEADER} "
+            "header of the previous response as cursor"
+        )
+
     if limit > 50:
         limit = 50
 
-    if page < 1:
-        page = 1
-
-    offset = (page - 1) * limit
-
-    query = select(Expense).where(
-        Expense.user_id == user.id
-    )
-
-    if sort_by == "amount":
-        query = query.order_by(
-            Expense.amount.desc() if order == "desc" else Expense.amount.asc()
-        )
-    else:
-        query = query.order_by(
-            Expense.created_at.desc() if order == "desc" else Expense.created_at.asc()
-        )
-
-    result = await db.execute(
-        query.offset(offset).limit(limit)
+    return await _expense_page(
+        db,
+        select_expenses().where(Expense.user_id == user.id),
+        sort_by, order, cursor, limit
     )
-
-    return result.scalars().all()
\ No newline at end of file
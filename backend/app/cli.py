@@ -0,0 +1,278 @@
+"""
+Maintenance commands.
+
+    python -m app.cli init-db
+    python -m app.cli rebuild-rollups [--user UUID]
+    python -m app.cli check-rollups [--user UUID]
+    python -m app.cli rebuild-anomaly-stats [--user UUID]
+    python -m app.cli precompute-forecasts [--all]
+    python -m app.cli rebuild-budget-states [--user UUID]
+    python -m app.cli partition-expenses [--drop-old]
+    python -m app.cli ensure-partitions [--ahead MONTHS]
+    python -m app.cli detach-partitions [--keep-months MONTHS] [--drop]
+    python -m app.cli compact-snapshots
+    python -m app.cli migrate-categories [--vacuum]
+"""
+import argparse
+import asyncio
+import sys
+import uuid
+
+from sqlalchemy import select, text
+
+from app.core.cache import MemoryBackend, backend, bump_data_version
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.db import categories, partitions
+from app.db.schema import SCHEMA_VERSION, init_schema
+from app.models.user import User
+from app.services import anomaly_stats, budgets, forecasting, rollups, snapshots
+
+
+async def invalidate_cached(user_ids=None):
+    """
+    Bump the data version of the given users (all when user_ids is None),
+    so cached responses built from the rewritten data are not served
+    again. Only reaches workers through a shared CACHE_BACKEND; with the
+    in-process one it asks for a restart instead.
+    """
+    if isinstance(backend, MemoryBackend):
+        print("CACHE_BACKEND is in-process: restart the API workers so they drop cached responses")
+        return
+
+    if user_ids is None:
+        async with AsyncSessionLocal() as db:
+            user_ids = (await db.scalars(select(User.id))).all()
+
+    for user in user_ids:
+        await bump_data_version(user)
+
+
+async def init_db(args):
+    async with engine.begin() as conn:
+        await init_schema(conn)
+
+    print(f"Schema created, version {SCHEMA_VERSION}")
+    return 0
+
+
+async def rebuild_rollups(args):
+    async with AsyncSessionLocal() as db:
+        await rollups.rebuild_rollups(db, args.user)
+        await forecasting.mark_stale(db, None if args.user is None else [args.user])
+        await db.commit()
+    await invalidate_cached(None if args.user is None else [args.user])
+
+    print("Rollups rebuilt")
+    return 0
+
+
+async def check_rollups(args):
+    async with AsyncSessionLocal() as db:
+        mismatches = await rollups.check_rollups(db, args.user)
+
+    for row in mismatches:
+        print(
+            f"{row['table']} | user_id={row['user_id']} | period={row['period']} "
+            f"| category_id={row['category_id']} | raw={row['raw_total']}/{row['raw_count']} "
+            f"| rollup={row['rollup_total']}/{row['rollup_count']}"
+        )
+
+    print(f"{len(mismatches)} mismatched rollup rows")
+    return 1 if mismatches else 0
+
+
+async def rebuild_anomaly_stats(args):
+    async with AsyncSessionLocal() as db:
+        await anomaly_stats.rebuild_stats(db, args.user)
+        await db.commit()
+    await invalidate_cached(None if args.user is None else [args.user])
+
+    print("Anomaly statistics rebuilt")
+    return 0
+
+
+async def precompute_forecasts(args):
+    users, seconds = await forecasting.precompute_forecasts(full=args.all)
+
+    rate = users / seconds if seconds else 0
+    print(f"Forecasts computed for {users} users in {seconds:.2f}s ({rate:,.0f} users/s)")
+    return 0
+
+
+async def rebuild_budget_states(args):
+    async with AsyncSessionLocal() as db:
+        await budgets.rebuild_states(db, args.user)
+        await db.commit()
+    await invalidate_cached(None if args.user is None else [args.user])
+
+    print("Budget states rebuilt")
+    return 0
+
+
+async def partition_expenses(args):
+    async with engine.begin() as conn:
+        try:
+            rows = await partitions.partition_existing(conn)
+        except partitions.PartitionError as exc:
+            print(exc)
+            return 1
+        if args.drop_old:
+            await conn.execute(text(f"DROP TABLE {partitions.UNPARTITIONED}"))
+        await conn.execute(text(f"ANALYZE {partitions.PARENT}"))
+        months = await partitions.monthly_partitions(conn)
+
+    kept = "" if args.drop_old else f", old table kept as {partitions.UNPARTITIONED}"
+    print(f"Copied {rows} expenses into {len(months)} monthly partitions{kept}")
+    return 0
+
+
+async def ensure_partitions(args):
+    async with engine.begin() as conn:
+        if not await partitions.is_partitioned(conn):
+            print(f"{partitions.PARENT} is not partitioned")
+            return 1
+        created = await partitions.ensure_partitions(conn, ahead=args.ahead)
+
+    print(f"Created {len(created)} partitions{': ' + ', '.join(created) if created else ''}")
+    return 0
+
+
+async def detach_partitions(args):
+    keep_months = args.keep_months if args.keep_months is not None else settings.EXPENSE_RETENTION_MONTHS
+    if keep_months is None:
+        print("No retention configured; pass --keep-months or set EXPENSE_RETENTION_MONTHS")
+        return 1
+
+    async with engine.begin() as conn:
+        if not await partitions.is_partitioned(conn):
+            print(f"{partitions.PARENT} is not partitioned")
+            return 1
+        removed, user_ids = await partitions.detach_partitions(conn, keep_months, drop=args.drop)
+        # Rollups and anomaly statistics keep the detached months on purpose
+        # (so do the forecasts fitted from them). Snapshots and cached
+        # responses follow the raw rows: bumping Forecast.version rebuilds
+        # the snapshots.
+        if user_ids:
+            await forecasting.mark_stale(conn, user_ids)
+    await invalidate_cached(user_ids)
+
+    action = "Dropped" if args.drop else "Detached"
+    print(f"{action} {len(removed)} partitions{': ' + ', '.join(removed) if removed else ''}")
+    return 0
+
+
+async def compact_snapshots(args):
+    if not settings.SNAPSHOT_DIR:
+        print("SNAPSHOT_DIR is not set")
+        return 1
+
+    seen, compacted = await asyncio.to_thread(snapshots.compact_all)
+    print(f"Compacted {compacted} of {seen} snapshots")
+    return 0
+
+
+async def migrate_categories(args):
+    async with engine.begin() as conn:
+        try:
+            converted = await categories.migrate(conn)
+        except categories.CategoryMigrationError as exc:
+            print(exc)
+            return 1
+        # Also adds whatever else an older database lacks before the version is recorded.
+        await init_schema(conn)
+    await invalidate_cached()
+
+    for table, rows in converted.items():
+        print(f"{table}: {rows} rows now reference categories.id")
+
+    if args.vacuum:
+        # The dropped name columns keep their space until the tables are rewritten.
+        async with engine.connect() as conn:
+            conn = await conn.execution_options(isolation_level="AUTOCOMMIT")
+            for table in converted:
+                await conn.execute(text(f"VACUUM FULL ANALYZE {table}"))
+        print("Tables rewritten")
+    return 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m app.cli")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    command = commands.add_parser("init-db", help="Create missing tables and record the schema version")
+    command.set_defaults(handler=init_db)
+
+    command = commands.add_parser("rebuild-rollups", help="Recompute spend rollups from expenses")
+    command.add_argument("--user", type=uuid.UUID, help="Only rebuild this user")
+    command.set_defaults(handler=rebuild_rollups)
+
+    command = commands.add_parser("check-rollups", help="Compare spend rollups with expenses")
+    command.add_argument("--user", type=uuid.UUID, help="Only check this user")
+    command.set_defaults(handler=check_rollups)
+
+    command = commands.add_parser(
+        "rebuild-anomaly-stats", help="Recompute anomaly statistics and flags from expenses"
+    )
+    command.add_argument("--user", type=uuid.UUID, help="Only rebuild this user")
+    command.set_defaults(handler=rebuild_anomaly_stats)
+
+    command = commands.add_parser(
+        "precompute-forecasts", help="Store next-month forecasts for users whose data changed"
+    )
+    command.add_argument("--all", action="store_true", help="Recompute every user")
+    command.set_defaults(handler=precompute_forecasts)
+
+    command = commands.add_parser(
+        "rebuild-budget-states", help="Recompute budget limits and month-to-date spend"
+    )
+    command.add_argument("--user", type=uuid.UUID, help="Only rebuild this user")
+    command.set_defaults(handler=rebuild_budget_states)
+
+    command = commands.add_parser(
+        "partition-expenses", help="Convert expenses into a table partitioned by month"
+    )
+    command.add_argument("--drop-old", action="store_true", help="Drop the unpartitioned table after the copy")
+    command.set_defaults(handler=partition_expenses)
+
+    command = commands.add_parser("ensure-partitions", help="Create the upcoming monthly expense partitions")
+    command.add_argument("--ahead", type=int, help="Months after the current one (default PARTITION_MONTHS_AHEAD)")
+    command.set_defaults(handler=ensure_partitions)
+
+    command = commands.add_parser("detach-partitions", help="Detach expense partitions past the retention period")
+    command.add_argument(
+        "--keep-months", type=int, help="Full months kept before the current one (default EXPENSE_RETENTION_MONTHS)"
+    )
+    command.add_argument("--drop", action="store_true", help="Drop the partitions instead of keeping them detached")
+    command.set_defaults(handler=detach_partitions)
+
+    command = commands.add_parser(
+        "compact-snapshots", help="Rewrite expense snapshots with out-of-order rows in time order"
+    )
+    command.set_defaults(handler=compact_snapshots)
+
+    command = commands.add_parser(
+        "migrate-categories", help="Replace stored category names with ids into the categories table"
+    )
+    command.add_argument(
+        "--vacuum", action="store_true", help="Rewrite the converted tables afterwards (exclusive lock)"
+    )
+    command.set_defaults(handler=migrate_categories)
+
+    return parser
+
+
+async def run(args):
+    try:
+        return await args.handler(args)
+    finally:
+        await engine.dispose()
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""
+Per-user data versions and the response cache behind them.
+
+Every committed write bumps the user's data version; cached responses are
+keyed by it, so a write makes all of that user's cached responses
+unreachable without tracking which ones it affects.
+
+The default MemoryBackend is a bounded per-process LRU. With several
+workers, set CACHE_BACKEND to a class implementing CacheBackend on top of a
+shared store so every worker sees the same versions.
+"""
+import uuid
+from collections import OrderedDict
+from typing import Any, Protocol
+
+from app.core.config import settings
+from app.core.plugins import load_object
+
+
+class CacheBackend(Protocol):
+    async def get(self, key: str) -> Any | None: ...
+
+    async def set(self, key: str, value: Any) -> None: ...
+
+    async def add(self, key: str, value: Any) -> Any:
+        """
+        Store `value` unless `key` exists; return the stored value.
+        """
+
+
+class MemoryBackend:
+    def __init__(self, max_entries: int = settings.RESPONSE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries: OrderedDict = OrderedDict()
+
+    async def get(self, key):
+        value = self._entries.get(key)
+        if value is not None:
+            self._entries.move_to_end(key)
+        return value
+
+    async def set(self, key, value):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        if len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def add(self, key, value):
+        existing = await self.get(key)
+        if existing is not None:
+            return existing
+        await self.set(key, value)
+        return value
+
+
+backend: CacheBackend = load_object(settings.CACHE_BACKEND)()
+
+
+def _version_key(user_id) -> str:
+    return f"version:{user_id}"
+
+
+def _new_version() -> str:
+    # Random rather than a counter: if a version is evicted or the process
+    # restarts, the replacement can never match entries cached under an
+    # older version.
+    return uuid.uuid4().hex[:16]
+
+
+async def data_version(user_id) -> str:
+    key = _version_key(user_id)
+    version = await backend.get(key)
+    if version is None:
+        version = await backend.add(key, _new_version())
+    return version
+
+
+async def bump_data_version(user_id):
+    await backend.set(_version_key(user_id), _new_version())
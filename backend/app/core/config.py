@@ -3,13 +3,96 @@ from pydantic_settings import BaseSettings
 class Settings(BaseSettings):
     DATABASE_URL: str
 
+    # Optional streaming replica for read-only handlers (app/db/session.py).
+    # Reads fall back to the primary when the replica lags more than
+    # REPLICA_MAX_LAG_SECONDS or is down, and for READ_YOUR_WRITES_SECONDS
+    # after the user's last write.
+    READ_DATABASE_URL: str | None = None
+    REPLICA_MAX_LAG_SECONDS: float = 5
+    REPLICA_CHECK_SECONDS: float = 2
+    READ_YOUR_WRITES_SECONDS: float = 10
+
+    DB_ECHO: bool = False
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    DB_POOL_RECYCLE: int = 1800
+    DB_POOL_PRE_PING: bool = True
+    # asyncpg prepared statements per connection / SQLAlchemy compiled SQL cache
+    DB_STATEMENT_CACHE_SIZE: int = 100
+    DB_QUERY_CACHE_SIZE: int = 500
+
     SECRET_KEY: str
     ALGORITHM: str
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60
 
+    # Trust the sub/role claims of a valid token instead of loading the user
+    # on every request. Revocations are picked up every
+    # REVOCATION_REFRESH_SECONDS.
+    AUTH_STATELESS: bool = False
+    REVOCATION_REFRESH_SECONDS: int = 30
+
+    # bcrypt runs on a dedicated thread pool; requests beyond
+    # PASSWORD_HASH_WORKERS + PASSWORD_HASH_MAX_QUEUE are rejected with 503.
+    # PASSWORD_HASH_WORKERS=0 hashes inline on the event loop.
+    BCRYPT_ROUNDS: int = 12
+    PASSWORD_HASH_WORKERS: int = 4
+    PASSWORD_HASH_MAX_QUEUE: int = 64
+
+    # Logging goes through a bounded queue to a background writer thread;
+    # records are dropped (and counted) when LOG_QUEUE_SIZE is reached.
+    # LOG_SAMPLE_RATES maps logger names to the fraction of INFO/DEBUG
+    # records kept, e.g. {"app.expenses": 0.1}.
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "json"
+    LOG_FILE: str = "app.log"
+    LOG_QUEUE_SIZE: int = 10_000
+    LOG_SAMPLE_RATES: dict[str, float] = {}
+
+    # Requests repeating one SELECT more often than this are flagged as N+1
+    # on /metrics and in the log.
+    METRICS_N_PLUS_ONE_THRESHOLD: int = 10
+
+    # Analytics jobs (app/services/jobs.py) run on JOB_WORKERS processes;
+    # beyond JOB_MAX_QUEUE waiting jobs, or JOB_MAX_PER_USER active jobs for
+    # one user, submissions get 429.
+    JOB_WORKERS: int = 2
+    JOB_MAX_QUEUE: int = 32
+    JOB_MAX_PER_USER: int = 2
+    JOB_RESULT_TTL_SECONDS: int = 600
+
+    # Run the incremental forecast precompute every N seconds in each worker
+    # (0: only via `python -m app.cli precompute-forecasts`).
+    FORECAST_REFRESH_SECONDS: int = 0
+
+    # Budget alerts fire once per month when spend reaches each percentage of
+    # the limit. Events go through PUBSUB_BROKER (see app/core/pubsub.py).
+    BUDGET_ALERT_THRESHOLDS: list[int] = [50, 80, 100]
+    PUBSUB_BROKER: str = "app.core.pubsub.MemoryBroker"
+
+    # Range-partition expenses by created_at month (see app/db/partitions.py).
+    # init-db creates the partitioned table; partitions are kept
+    # PARTITION_MONTHS_AHEAD months ahead, and detach-partitions removes
+    # months older than EXPENSE_RETENTION_MONTHS (None: keep everything).
+    EXPENSES_PARTITIONED: bool = False
+    PARTITION_MONTHS_AHEAD: int = 3
+    EXPENSE_RETENTION_MONTHS: int | None = None
+
+    # Memory-mapped per-user expense columns for the ML endpoints and jobs
+    # (see app/services/snapshots.py); unset to read expenses from the
+    # database every time.
+    SNAPSHOT_DIR: str | None = None
+
     APP_NAME: str = "AI Expense Intelligence Platform"
     DEBUG: bool = True
 
+    # Create tables on boot instead of only checking the schema version.
+    SCHEMA_AUTO_CREATE: bool = False
+
+    # Response cache and per-user data versions (see app/core/cache.py)
+    CACHE_BACKEND: str = "app.core.cache.MemoryBackend"
+    RESPONSE_CACHE_SIZE: int = 10_000
+
     class Config:
         env_file = ".env"
         extra = "ignore"
@@ -1,16 +1,44 @@
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession
 from sqlalchemy.orm import sessionmaker
 from app.core.config import settings
+from app.core.db_metrics import InstrumentedQueuePool, instrument
 
 DATABASE_URL = settings.DATABASE_URL
 
-engine = create_async_engine(
-    DATABASE_URL,
-    echo=True,
-)
+def _create_engine(url):
+    engine = create_async_engine(
+        url,
+        echo=settings.DB_ECHO,
+        poolclass=InstrumentedQueuePool,
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=settings.DB_POOL_TIMEOUT,
+        pool_recycle=settings.DB_POOL_RECYCLE,
+        pool_pre_ping=settings.DB_POOL_PRE_PING,
+        query_cache_size=settings.DB_QUERY_CACHE_SIZE,
+        connect_args={"prepared_statement_cache_size": settings.DB_STATEMENT_CACHE_SIZE},
+    )
+    instrument(engine)
+    return engine
+
+engine = _create_engine(DATABASE_URL)
 
 AsyncSessionLocal = sessionmaker(
     bind=engine,
     class_=AsyncSession,
     expire_on_commit=False,
-)
\ No newline at end of file
+)
+
+# Optional read replica for read-only handlers (see app/db/session.py)
+read_engine = None
+ReadSessionLocal = None
+
+if settings.READ_DATABASE_URL:
+    read_engine = _create_engine(settings.READ_DATABASE_URL).execution_options(
+        postgresql_readonly=True
+    )
+    ReadSessionLocal = sessionmaker(
+        bind=read_engine,
+        class_=AsyncSession,
+        expire_on_commit=False,
+    )
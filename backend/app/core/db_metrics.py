@@ -0,0 +1,111 @@
+"""
+Connection pool and statement instrumentation.
+
+Records how long callers wait to check a connection out of the pool and a
+latency histogram per SQL statement, to size DB_POOL_SIZE /
+DB_MAX_OVERFLOW from data. Exposed through GET /admin/db/pool.
+
+While a request is being served (see app/core/request_metrics.py) its
+queries are also counted in `request_stats_var`. SQLAlchemy's async
+greenlets inherit the caller's context, so the cursor events see it.
+"""
+from collections import Counter
+from contextvars import ContextVar
+from time import perf_counter
+
+from sqlalchemy import event
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+
+from app.core.metrics import Histogram
+
+# Distinct statements tracked individually; the rest share one histogram.
+MAX_TRACKED_STATEMENTS = 500
+OTHER_STATEMENTS = "<other>"
+
+checkout_wait = Histogram()
+statement_latency: dict[str, Histogram] = {}
+peak_checked_out = 0
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_time", "selects")
+
+    def __init__(self):
+        self.queries = 0
+        self.db_time = 0.0
+        # Repeats of one SELECT within a request point at an N+1 pattern.
+        self.selects = Counter()
+
+    def record(self, statement: str, elapsed: float):
+        self.queries += 1
+        self.db_time += elapsed
+        if statement[:6].upper() == "SELECT":
+            self.selects[statement] += 1
+
+    def most_repeated(self) -> tuple[str | None, int]:
+        if not self.selects:
+            return None, 0
+        return self.selects.most_common(1)[0]
+
+
+request_stats_var: ContextVar[RequestStats | None] = ContextVar("request_stats", default=None)
+
+
+class InstrumentedQueuePool(AsyncAdaptedQueuePool):
+    def _do_get(self):
+        global peak_checked_out
+        start = perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            checkout_wait.observe(perf_counter() - start)
+            peak_checked_out = max(peak_checked_out, self.checkedout())
+
+
+def _statement_histogram(statement: str) -> Histogram:
+    histogram = statement_latency.get(statement)
+    if histogram is None:
+        if len(statement_latency) >= MAX_TRACKED_STATEMENTS:
+            statement = OTHER_STATEMENTS
+        histogram = statement_latency.setdefault(statement, Histogram())
+    return histogram
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # One slot, not a stack: a failed statement never reaches
+    # after_cursor_execute, and the next one overwrites its start time.
+    conn.info["query_start"] = perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    elapsed = perf_counter() - conn.info.pop("query_start")
+    _statement_histogram(statement).observe(elapsed)
+
+    stats = request_stats_var.get()
+    if stats is not None:
+        stats.record(statement, elapsed)
+
+
+def instrument(engine):
+    event.listen(engine.sync_engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine.sync_engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def snapshot(engine, top=20) -> dict:
+    pool = engine.pool
+    statements = sorted(statement_latency.items(), key=lambda item: item[1].sum, reverse=True)
+
+    return {
+        "pool": {
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": pool.overflow(),
+            "peak_checked_out": peak_checked_out,
+        },
+        "checkout_wait_seconds": checkout_wait.snapshot(),
+        "statements": [
+            {"statement": statement, "latency_seconds": histogram.snapshot()}
+            for statement, histogram in statements[:top]
+        ],
+    }
@@ -1,8 +1,9 @@
 from fastapi import HTTPException, status
 
 class AppException(HTTPException):
-    def __init__(self, message: str, status_code=status.HTTP_400_BAD_REQUEST):
+    def __init__(self, message: str, status_code=status.HTTP_400_BAD_REQUEST, headers=None):
         super().__init__(
             status_code=status_code,
-            detail=message
+            detail=message,
+            headers=headers
         )
\ No newline at end of file
@@ -1,13 +1,22 @@
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+import uuid
 from jose import jwt
 from app.core.config import settings
 
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
-    expire = datetime.utcnow() + (
+    now = datetime.now(timezone.utc)
+    expire = now + (
         expires_delta or timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     )
-    to_encode.update({"exp": expire})
+    # iat is whole seconds; iat_ms orders the token against revocations
+    # (app/core/revocation.py).
+    to_encode.update({
+        "exp": expire,
+        "iat": now,
+        "iat_ms": int(now.timestamp() * 1000),
+        "jti": uuid.uuid4().hex,
+    })
 
     encoded_jwt = jwt.encode(
         to_encode,
@@ -1,12 +1,185 @@
+"""
+Logging pipeline.
+
+Handlers on the request path only put the record on a bounded queue; a
+QueueListener thread formats it (JSON by default) and writes it to the
+file and stream handlers. When the queue is full the record is dropped and
+counted instead of blocking the event loop.
+
+Every record carries the id of the request that produced it
+(RequestIdMiddleware). Chatty loggers can be sampled with
+LOG_SAMPLE_RATES, e.g. {"app.expenses": 0.1}; warnings and errors are
+never sampled out.
+"""
+import atexit
+import json
 import logging
+import logging.handlers
+import queue
+import random
+import uuid
+from contextvars import ContextVar
+from datetime import datetime, timezone
+
+from app.core.config import settings
+
+request_id_var: ContextVar[str | None] = ContextVar("request_id", default=None)
+
+REQUEST_ID_HEADER = b"x-request-id"
+MAX_REQUEST_ID_LENGTH = 64
+
+TEXT_FORMAT = "%(asctime)s | %(levelname)s | %(request_id)s | %(message)s"
+
+# Attributes every LogRecord has; anything else came in through `extra=`.
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id"}
+
+
+class JsonFormatter(logging.Formatter):
+    def format(self, record):
+        entry = {
+            "time": datetime.fromtimestamp(record.created, timezone.utc).isoformat(),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+            "request_id": getattr(record, "request_id", None),
+        }
+        entry.update(
+            (key, value) for key, value in vars(record).items()
+            if key not in _RECORD_ATTRIBUTES
+        )
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+
+        return json.dumps(entry, default=str)
+
+
+class SamplingFilter(logging.Filter):
+    """
+    Keeps a `rate` fraction of the records below WARNING from a logger and
+    its children.
+    """
+
+    def __init__(self, rates: dict[str, float]):
+        super().__init__()
+        self.rates = rates
+        self._resolved: dict[str, float] = {}
+
+    def _rate(self, name: str) -> float:
+        rate = self._resolved.get(name)
+        if rate is None:
+            rate, prefix = 1.0, name
+            while prefix:
+                if prefix in self.rates:
+                    rate = self.rates[prefix]
+                    break
+                prefix = prefix.rpartition(".")[0]
+            self._resolved[name] = rate
+        return rate
+
+    def filter(self, record):
+        if record.levelno >= logging.WARNING:
+            return True
+        rate = self._rate(record.name)
+        return rate >= 1 or random.random() < rate
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Enqueues the raw record. Formatting (the stdlib QueueHandler does it in
+    the caller) is left to the listener thread.
+    """
+
+    def __init__(self, log_queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record):
+        record.request_id = request_id_var.get()
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def output_handlers(log_format=None, log_file=None):
+    log_format = log_format or settings.LOG_FORMAT
+    log_file = settings.LOG_FILE if log_file is None else log_file
+
+    formatter = JsonFormatter() if log_format == "json" else logging.Formatter(TEXT_FORMAT)
+    handlers = [logging.StreamHandler()]
+    if log_file:
+        handlers.append(logging.FileHandler(log_file))
+
+    for handler in handlers:
+        handler.setFormatter(formatter)
+    return handlers
+
+
+log_queue = queue.Queue(maxsize=settings.LOG_QUEUE_SIZE)
+queue_handler = NonBlockingQueueHandler(log_queue)
+queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATES))
+listener = logging.handlers.QueueListener(log_queue, *output_handlers(), respect_handler_level=True)
+
+
+def configure_logging():
+    root = logging.getLogger()
+    root.setLevel(settings.LOG_LEVEL)
+    if queue_handler not in root.handlers:
+        root.addHandler(queue_handler)
+
+    if listener._thread is None:
+        listener.start()
+        atexit.register(listener.stop)
+
+
+def queue_stats() -> dict:
+    return {
+        "depth": log_queue.qsize(),
+        "capacity": log_queue.maxsize,
+        "dropped": queue_handler.dropped,
+    }
+
+
+def _incoming_request_id(scope) -> str | None:
+    for name, value in scope["headers"]:
+        if name == REQUEST_ID_HEADER:
+            value = value.decode("latin-1")
+            if 0 < len(value) <= MAX_REQUEST_ID_LENGTH and value.isprintable():
+                return value
+    return None
+
+
+class RequestIdMiddleware:
+    """
+    Binds X-Request-ID (taken from the request or generated) to the logging
+    context and echoes it in the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        request_id = _incoming_request_id(scope) or uuid.uuid4().hex
+        header = (REQUEST_ID_HEADER, request_id.encode("latin-1"))
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message = {**message, "headers": [*message.get("headers", []), header]}
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
+
 
-logging.basicConfig(
-    level=logging.INFO,
-    format="%(asctime)s | %(levelname)s | %(message)s",
-    handlers=[
-        logging.FileHandler("app.log"),
-        logging.StreamHandler()
-    ]
-)
+configure_logging()
 
-logger = logging.getLogger(__name__)
\ No newline at end of file
+logger = logging.getLogger(__name__)
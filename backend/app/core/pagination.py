@@ -0,0 +1,92 @@
+import base64
+import json
+import uuid
+from datetime import datetime
+
+from sqlalchemy import tuple_
+
+from app.core.exceptions import AppException
+from app.models.expense import Expense
+
+SORT_COLUMNS = {
+    "created_at": Expense.created_at,
+    "amount": Expense.amount,
+}
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 200
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+def encode_cursor(sort_by: str, order: str, value, expense_id) -> str:
+    if isinstance(value, datetime):
+        value = value.isoformat()
+
+    payload = json.dumps(
+        {"s": sort_by, "o": order, "v": value, "id": str(expense_id)},
+        separators=(",", ":"),
+    )
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, order: str):
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded))
+
+        if payload["s"] != sort_by or payload["o"] != order:
+            raise ValueError("cursor does not match the requested ordering")
+
+        value = payload["v"]
+        if sort_by == "created_at":
+            value = datetime.fromisoformat(value)
+        else:
+            value = float(value)
+
+        return value, uuid.UUID(payload["id"])
+    except (ValueError, KeyError, TypeError):
+        raise AppException("Invalid cursor")
+
+
+def clamp_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_LIMIT))
+
+
+def keyset_page(query, sort_by="created_at", order="desc", cursor=None, limit=DEFAULT_LIMIT):
+    """
+    Order `query` by (sort column, id) and start after `cursor`.
+    Fetches one extra row so the caller can tell whether a next page exists.
+    """
+    if sort_by not in SORT_COLUMNS:
+        raise AppException(f"sort_by must be one of {', '.join(SORT_COLUMNS)}")
+    if order not in ("asc", "desc"):
+        raise AppException("order must be 'asc' or 'desc'")
+
+    column = SORT_COLUMNS[sort_by]
+    key = tuple_(column, Expense.id)
+
+    if cursor:
+        position = decode_cursor(cursor, sort_by, order)
+        query = query.where(key < position if order == "desc" else key > position)
+
+    if order == "desc":
+        query = query.order_by(column.desc(), Expense.id.desc())
+    else:
+        query = query.order_by(column.asc(), Expense.id.asc())
+
+    return query.limit(clamp_limit(limit) + 1)
+
+
+def split_page(rows, sort_by="created_at", order="desc", limit=DEFAULT_LIMIT):
+    """
+    Returns (page rows, next cursor or None) for a result of `keyset_page`.
+    """
+    limit = clamp_limit(limit)
+
+    if len(rows) <= limit:
+        return rows, None
+
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(sort_by, order, getattr(last, sort_by), last.id)
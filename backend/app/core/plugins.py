@@ -0,0 +1,9 @@
+from importlib import import_module
+
+
+def load_object(path: str):
+    """
+    Import "package.module.Name" and return Name.
+    """
+    module_name, _, attribute = path.rpartition(".")
+    return getattr(import_module(module_name), attribute)
@@ -0,0 +1,57 @@
+"""
+Publish/subscribe for server-pushed events (e.g. budget alerts on SSE).
+
+The default MemoryBroker only reaches subscribers in the same process. With
+several workers, set PUBSUB_BROKER to a class implementing Broker on top of
+a shared bus (Redis pub/sub, Postgres LISTEN/NOTIFY, ...).
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncContextManager, AsyncIterator, Protocol
+
+from app.core.config import settings
+from app.core.plugins import load_object
+
+# Messages buffered per subscriber; a slower consumer loses the oldest.
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class Broker(Protocol):
+    async def publish(self, channel: str, message: dict) -> None: ...
+
+    def subscribe(self, channel: str) -> AsyncContextManager[AsyncIterator[dict]]:
+        """
+        async with broker.subscribe(channel) as messages:
+            async for message in messages: ...
+        """
+
+
+class MemoryBroker:
+    def __init__(self):
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+
+    async def publish(self, channel, message):
+        for queue in self._subscribers.get(channel, ()):
+            if queue.full():
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel):
+        queue = asyncio.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+        self._subscribers.setdefault(channel, set()).add(queue)
+
+        async def messages():
+            while True:
+                yield await queue.get()
+
+        try:
+            yield messages()
+        finally:
+            subscribers = self._subscribers[channel]
+            subscribers.discard(queue)
+            if not subscribers:
+                del self._subscribers[channel]
+
+
+broker: Broker = load_object(settings.PUBSUB_BROKER)()
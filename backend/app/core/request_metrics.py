@@ -0,0 +1,147 @@
+"""
+Per-route request metrics and the Prometheus `/metrics` exposition.
+
+MetricsMiddleware times every HTTP request and labels it with the matched
+route template (`/expenses/by-category/{category}`, not the raw path), so
+the number of series stays bounded. The queries the request issued and the
+time spent in them come from db_metrics.request_stats_var. A request that
+runs the same SELECT more than METRICS_N_PLUS_ONE_THRESHOLD times is
+counted and logged as a likely N+1.
+"""
+import logging
+from collections import defaultdict
+from time import perf_counter
+
+from app.core import db_metrics
+from app.core.config import settings
+from app.core.logging import queue_stats
+from app.core.metrics import Histogram, prometheus_histogram, prometheus_scalar
+
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50, 100)
+
+UNMATCHED_ROUTE = "<unmatched>"
+
+logger = logging.getLogger("app.metrics")
+
+request_latency: dict[tuple[str, str], Histogram] = defaultdict(Histogram)
+request_db_time: dict[tuple[str, str], Histogram] = defaultdict(Histogram)
+request_queries: dict[tuple[str, str], Histogram] = defaultdict(
+    lambda: Histogram(QUERY_COUNT_BUCKETS)
+)
+responses: dict[tuple[str, str, int], int] = defaultdict(int)
+n_plus_one: dict[tuple[str, str], int] = defaultdict(int)
+
+
+def _route(scope) -> str:
+    route = scope.get("route")
+    return getattr(route, "path", None) or UNMATCHED_ROUTE
+
+
+class MetricsMiddleware:
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        status = 500
+
+        async def send_with_status(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        stats = db_metrics.RequestStats()
+        token = db_metrics.request_stats_var.set(stats)
+        start = perf_counter()
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            elapsed = perf_counter() - start
+            db_metrics.request_stats_var.reset(token)
+            self._record(scope, status, elapsed, stats)
+
+    @staticmethod
+    def _record(scope, status, elapsed, stats):
+        key = (scope["method"], _route(scope))
+
+        request_latency[key].observe(elapsed)
+        request_queries[key].observe(stats.queries)
+        request_db_time[key].observe(stats.db_time)
+        responses[(*key, status)] += 1
+
+        statement, repeats = stats.most_repeated()
+        if repeats > settings.METRICS_N_PLUS_ONE_THRESHOLD:
+            n_plus_one[key] += 1
+            logger.warning(
+                "Possible N+1 | route=%s %s | repeats=%s | statement=%s",
+                key[0], key[1], repeats, " ".join(statement.split())[:200]
+            )
+
+
+def _route_series(histograms):
+    return (
+        ({"method": method, "route": route}, histogram)
+        for (method, route), histogram in sorted(histograms.items())
+    )
+
+
+def render_metrics(engine) -> str:
+    pool = engine.pool
+    logs = queue_stats()
+
+    lines = [
+        *prometheus_histogram(
+            "http_request_duration_seconds", "Request latency by route template.",
+            _route_series(request_latency),
+        ),
+        *prometheus_scalar(
+            "http_responses_total", "counter", "Responses by route template and status.",
+            (
+                ({"method": method, "route": route, "status": status}, count)
+                for (method, route, status), count in sorted(responses.items())
+            ),
+        ),
+        *prometheus_histogram(
+            "http_request_db_queries", "SQL statements executed per request.",
+            _route_series(request_queries),
+        ),
+        *prometheus_histogram(
+            "http_request_db_seconds", "Time spent in SQL per request.",
+            _route_series(request_db_time),
+        ),
+        *prometheus_scalar(
+            "http_request_n_plus_one_total", "counter",
+            "Requests that repeated one SELECT more than the N+1 threshold.",
+            (
+                ({"method": method, "route": route}, count)
+                for (method, route), count in sorted(n_plus_one.items())
+            ),
+        ),
+        *prometheus_scalar(
+            "db_pool_connections", "gauge", "Connection pool state.",
+            (
+                ({"state": "checked_out"}, pool.checkedout()),
+                ({"state": "checked_in"}, pool.checkedin()),
+                ({"state": "overflow"}, pool.overflow()),
+            ),
+        ),
+        *prometheus_scalar(
+            "db_pool_size", "gauge", "Configured pool size.", (({}, pool.size()),)
+        ),
+        *prometheus_histogram(
+            "db_pool_checkout_wait_seconds", "Time spent waiting for a pooled connection.",
+            (({}, db_metrics.checkout_wait),),
+        ),
+        *prometheus_scalar(
+            "log_queue_depth", "gauge", "Log records waiting for the writer thread.",
+            (({}, logs["depth"]),),
+        ),
+        *prometheus_scalar(
+            "log_records_dropped_total", "counter", "Log records dropped on a full queue.",
+            (({}, logs["dropped"]),),
+        ),
+    ]
+    return "\n".join(lines) + "\n"
@@ -0,0 +1,69 @@
+"""
+ETag / If-None-Match handling for read-only per-user JSON endpoints.
+
+    @router.get("/monthly-total")
+    @cached_response
+    async def monthly_total(request: Request, ..., user=Depends(get_current_user)):
+
+The ETag is derived from (user, path, query, data version, the user's
+local date); the date is included because "this month" and "last N days"
+responses change at midnight without any write. A matching
+If-None-Match is answered with 304 before the endpoint body runs, so with
+AUTH_STATELESS the request never touches the database. Otherwise the
+encoded body is served from the cache when present.
+"""
+import functools
+import hashlib
+
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+
+from app.core.cache import backend, data_version
+from app.core.time_buckets import local_today, user_zone
+
+
+def _etag(key: str) -> str:
+    return 'W/"' + hashlib.blake2b(key.encode(), digest_size=12).hexdigest() + '"'
+
+
+def _matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {tag.strip() for tag in if_none_match.split(",")}
+    return "*" in tags or etag in tags or etag.removeprefix("W/") in tags
+
+
+def cached_response(endpoint):
+    """
+    The endpoint must take `request: Request` and `user` parameters and
+    return JSON-serializable data.
+    """
+
+    @functools.wraps(endpoint)
+    async def wrapper(*args, **kwargs):
+        request: Request = kwargs["request"]
+        user = kwargs["user"]
+
+        version = await data_version(user.id)
+        query = "&".join(sorted(request.url.query.split("&"))) if request.url.query else ""
+        today = local_today(user_zone(user))
+        key = f"response:{user.id}:{request.url.path}?{query}@{version}:{today}"
+        etag = _etag(key)
+        headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+
+        if _matches(request.headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=headers)
+
+        body = await backend.get(key)
+        if body is None:
+            result = await endpoint(*args, **kwargs)
+            if isinstance(result, Response):
+                return result
+
+            body = JSONResponse(content=jsonable_encoder(result)).body
+            await backend.set(key, body)
+
+        return Response(content=body, media_type="application/json", headers=headers)
+
+    return wrapper
@@ -0,0 +1,45 @@
+"""
+Fast JSON responses for large lists.
+
+List routes select plain column tuples instead of ORM objects and encode
+them with orjson, skipping model hydration and per-item pydantic
+validation. Routes keep their `response_model` for the OpenAPI schema;
+returning a Response directly makes FastAPI skip validating against it, so
+the selected columns must match the model's fields.
+"""
+import orjson
+from fastapi.responses import JSONResponse
+from sqlalchemy import select
+
+from app.models.category import Category
+from app.models.expense import Expense
+
+# Fields of ExpenseResponse, in order.
+EXPENSE_COLUMNS = (
+    Expense.id,
+    Expense.amount,
+    Category.name.label("category"),
+    Expense.description,
+    Expense.created_at,
+)
+
+
+def select_expenses():
+    """
+    select(*EXPENSE_COLUMNS) with the category name joined in
+    """
+    return select(*EXPENSE_COLUMNS).join_from(Expense, Category, Expense.category_id == Category.id)
+
+
+class FastJSONResponse(JSONResponse):
+    def render(self, content) -> bytes:
+        # OPT_UTC_Z writes UTC timestamps as "...Z", like pydantic does;
+        # NumPy arrays (snapshot columns) are encoded without a list copy.
+        return orjson.dumps(content, option=orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY)
+
+
+def rows_response(rows, headers=None) -> FastJSONResponse:
+    """
+    rows: result rows of a column select, keyed by field name
+    """
+    return FastJSONResponse([row._asdict() for row in rows], headers=headers)
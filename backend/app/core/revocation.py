@@ -0,0 +1,142 @@
+"""
+In-memory token revocation list.
+
+Each worker keeps the unexpired rows of `revoked_tokens` in memory and
+reloads them every REVOCATION_REFRESH_SECONDS, so checking a token never
+touches the database. Revocations made by this worker apply immediately;
+revocations made by other workers apply after the next refresh.
+
+Revoking a user's tokens revokes those issued at or before the revocation,
+compared in milliseconds: the `iat_ms` claim against the revocation time.
+Tokens without `iat_ms` only have whole-second `iat`, and count as issued
+at the end of that second. Tokens without a `jti` cannot be revoked one by
+one; revoking such a token revokes every token of its user issued up to
+and including it.
+"""
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.logging import logger
+from app.models.revoked_token import RevokedToken
+
+
+EPOCH = datetime(1970, 1, 1, tzinfo=timezone.utc)
+ONE_MILLISECOND = timedelta(milliseconds=1)
+
+
+def _millis(value: datetime) -> int:
+    return (value - EPOCH) // ONE_MILLISECOND
+
+
+def _issued_ms(payload: dict) -> int:
+    issued = payload.get("iat_ms")
+    if issued is None:
+        issued = payload.get("iat", 0) * 1000 + 999
+    return issued
+
+
+class RevocationList:
+    def __init__(self):
+        self.jtis: set[str] = set()
+        # user_id (str) -> tokens issued at or before this time (ms) are revoked
+        self.user_cutoffs: dict[str, int] = {}
+        # Local revocations, kept across refreshes until they expire in case
+        # a refresh read the table before they were committed.
+        self._local_jtis: dict[str, datetime] = {}
+        self._local_users: dict[str, tuple[int, datetime]] = {}
+
+    def is_revoked(self, payload: dict) -> bool:
+        if payload.get("jti") in self.jtis:
+            return True
+
+        cutoff = self.user_cutoffs.get(payload.get("sub"))
+        if cutoff is None:
+            return False
+
+        return _issued_ms(payload) <= cutoff
+
+    def add_token(self, jti: str, expires_at: datetime):
+        self.jtis.add(jti)
+        self._local_jtis[jti] = expires_at
+
+    def add_user(self, user_id, cutoff: datetime, expires_at: datetime):
+        key = str(user_id)
+        self.user_cutoffs[key] = max(self.user_cutoffs.get(key, 0), _millis(cutoff))
+        self._local_users[key] = (self.user_cutoffs[key], expires_at)
+
+    async def refresh(self, db: AsyncSession):
+        now = datetime.now(timezone.utc)
+        result = await db.execute(
+            select(RevokedToken.jti, RevokedToken.user_id, RevokedToken.created_at)
+            .where(RevokedToken.expires_at > now)
+        )
+
+        jtis = set()
+        user_cutoffs = {}
+        for row in result.all():
+            if row.jti:
+                jtis.add(row.jti)
+            if row.user_id:
+                key = str(row.user_id)
+                user_cutoffs[key] = max(user_cutoffs.get(key, 0), _millis(row.created_at))
+
+        self._local_jtis = {
+            jti: expires_at for jti, expires_at in self._local_jtis.items() if expires_at > now
+        }
+        self._local_users = {
+            key: entry for key, entry in self._local_users.items() if entry[1] > now
+        }
+        jtis.update(self._local_jtis)
+        for key, (cutoff, _) in self._local_users.items():
+            user_cutoffs[key] = max(user_cutoffs.get(key, 0), cutoff)
+
+        self.jtis = jtis
+        self.user_cutoffs = user_cutoffs
+
+
+revocation_list = RevocationList()
+
+
+async def revoke_token(db: AsyncSession, jti: str, expires_at: datetime):
+    db.add(RevokedToken(jti=jti, expires_at=expires_at))
+    revocation_list.add_token(jti, expires_at)
+
+
+async def revoke_payload(db: AsyncSession, payload: dict):
+    """
+    Revoke the decoded token, e.g. on logout. The caller commits.
+    """
+    if payload.get("jti"):
+        await revoke_token(db, payload["jti"], datetime.fromtimestamp(payload["exp"], tz=timezone.utc))
+    else:
+        issued = EPOCH + _issued_ms(payload) * ONE_MILLISECOND
+        await revoke_user_tokens(db, uuid.UUID(payload["sub"]), through=issued)
+
+
+async def revoke_user_tokens(db: AsyncSession, user_id, through: datetime | None = None):
+    """
+    Revoke every token issued to the user so far, e.g. after a role change,
+    or up to `through` if that is later.
+    """
+    now = datetime.now(timezone.utc)
+    cutoff = max(now, through) if through is not None else now
+    expires_at = now + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
+    db.add(RevokedToken(user_id=user_id, created_at=cutoff, expires_at=expires_at))
+    revocation_list.add_user(user_id, cutoff, expires_at)
+
+
+async def refresh_revocations_forever():
+    while True:
+        try:
+            async with AsyncSessionLocal() as db:
+                await revocation_list.refresh(db)
+        except Exception:
+            logger.exception("Revocation list refresh failed")
+
+        await asyncio.sleep(settings.REVOCATION_REFRESH_SECONDS)
@@ -1,10 +1,19 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from passlib.context import CryptContext
 from jose import jwt
 from fastapi.security import OAuth2PasswordBearer
 
+from app.core.config import settings
+from app.core.exceptions import AppException
+
 # password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(
+    schemes=["bcrypt"],
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS,
+)
 
 # OAuth2 scheme (THIS WAS MISSING)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
@@ -14,6 +23,17 @@ SECRET_KEY = "CHANGE_ME_SECRET_KEY"
 ALGORITHM = "HS256"
 ACCESS_TOKEN_EXPIRE_MINUTES = 60
 
+# bcrypt releases the GIL, so a small thread pool keeps the event loop free.
+_hash_pool = (
+    ThreadPoolExecutor(
+        max_workers=settings.PASSWORD_HASH_WORKERS,
+        thread_name_prefix="password-hash",
+    )
+    if settings.PASSWORD_HASH_WORKERS > 0
+    else None
+)
+_hash_slots = asyncio.Semaphore(settings.PASSWORD_HASH_WORKERS + settings.PASSWORD_HASH_MAX_QUEUE)
+
 
 def hash_password(password: str) -> str:
     return pwd_context.hash(password)
@@ -23,8 +43,28 @@ def verify_password(password: str, hashed_password: str) -> bool:
     return pwd_context.verify(password, hashed_password)
 
 
+async def _run_hashing(fn, *args):
+    if _hash_pool is None:
+        return fn(*args)
+
+    # Shed load instead of queueing without bound behind slow bcrypt calls.
+    if _hash_slots.locked():
+        raise AppException("Server busy, please retry", status_code=503)
+
+    async with _hash_slots:
+        return await asyncio.get_running_loop().run_in_executor(_hash_pool, fn, *args)
+
+
+async def hash_password_async(password: str) -> str:
+    return await _run_hashing(hash_password, password)
+
+
+async def verify_password_async(password: str, hashed_password: str) -> bool:
+    return await _run_hashing(verify_password, password, hashed_password)
+
+
 def create_access_token(data: dict, expires_delta: timedelta | None = None):
     to_encode = data.copy()
     expire = datetime.utcnow() + (expires_delta or timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES))
     to_encode.update({"exp": expire})
-    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
\ No newline at end of file
+    return jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
@@ -0,0 +1,132 @@
+"""
+Calendar periods as half-open UTC timestamp ranges.
+
+Filtering with `Period.where(Expense.created_at)` gives
+`created_at >= start AND created_at < end`, which a btree on
+(user_id, created_at) can answer with a range scan, unlike date_part() or
+date() applied to the column. Days and months are taken in the user's own
+timezone (User.timezone, "UTC" by default).
+"""
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from sqlalchemy import and_
+
+UTC = timezone.utc
+EPOCH = datetime(1970, 1, 1, tzinfo=UTC)
+ONE_MICROSECOND = timedelta(microseconds=1)
+MICROS_PER_DAY = 86_400_000_000
+
+
+@dataclass(frozen=True)
+class Period:
+    start: datetime  # inclusive
+    end: datetime  # exclusive
+
+    def where(self, column):
+        return and_(column >= self.start, column < self.end)
+
+
+def user_zone(user) -> ZoneInfo:
+    try:
+        return ZoneInfo(getattr(user, "timezone", None) or "UTC")
+    except (ZoneInfoNotFoundError, ValueError):
+        return ZoneInfo("UTC")
+
+
+def _aware(value: datetime, tz) -> datetime:
+    return value.replace(tzinfo=tz) if value.tzinfo is None else value
+
+
+def local_day(value: datetime, tz) -> date:
+    """
+    Calendar day of a stored timestamp in `tz`. Naive values are UTC.
+    """
+    return _aware(value, UTC).astimezone(tz).date()
+
+
+def epoch_micros(value: datetime) -> int:
+    """
+    Microseconds since the Unix epoch; naive values are UTC.
+    """
+    return (_aware(value, UTC) - EPOCH) // ONE_MICROSECOND
+
+
+def local_days(micros, tz):
+    """
+    Vectorized local_day over an int64 array of epoch_micros values.
+    Returns a numpy datetime64[D] array.
+    """
+    import numpy as np
+
+    micros = np.asarray(micros, dtype=np.int64)
+    utc_days, inverse = np.unique(micros // MICROS_PER_DAY, return_inverse=True)
+
+    # One offset per UTC day, except on days with a transition in them.
+    offsets = np.empty(len(utc_days), dtype=np.int64)
+    changes = np.zeros(len(utc_days), dtype=bool)
+    for index, day in enumerate(utc_days.tolist()):
+        start = EPOCH + timedelta(days=day)
+        offset = start.astimezone(tz).utcoffset()
+        offsets[index] = offset // ONE_MICROSECOND
+        changes[index] = (start + timedelta(days=1, microseconds=-1)).astimezone(tz).utcoffset() != offset
+
+    local = micros + offsets[inverse]
+    for row in np.flatnonzero(changes[inverse]).tolist():
+        instant = EPOCH + timedelta(microseconds=int(micros[row]))
+        local[row] = micros[row] + instant.astimezone(tz).utcoffset() // ONE_MICROSECOND
+
+    return (local // MICROS_PER_DAY).astype("datetime64[D]")
+
+
+def local_today(tz, now: datetime | None = None) -> date:
+    return local_day(now or datetime.now(UTC), tz)
+
+
+def month_start(day: date) -> date:
+    return day.replace(day=1)
+
+
+def next_month(day: date) -> date:
+    return (day.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+
+def _midnight(day: date, tz) -> datetime:
+    return datetime.combine(day, time.min, tzinfo=tz).astimezone(UTC)
+
+
+def days(first: date, last: date, tz) -> Period:
+    """
+    From the start of `first` to the end of `last` (both inclusive), local time.
+    """
+    return Period(_midnight(first, tz), _midnight(last + timedelta(days=1), tz))
+
+
+def month(day: date, tz) -> Period:
+    first = month_start(day)
+    return Period(_midnight(first, tz), _midnight(next_month(first), tz))
+
+
+def this_month(tz, now: datetime | None = None) -> Period:
+    return month(local_today(tz, now), tz)
+
+
+def last_n_dates(n: int, tz, now: datetime | None = None) -> tuple[date, date]:
+    """
+    (first, last) local dates of today and the n - 1 days before it, for
+    date-keyed tables such as the daily rollups.
+    """
+    today = local_today(tz, now)
+    return today - timedelta(days=n - 1), today
+
+
+def last_n_days(n: int, tz, now: datetime | None = None) -> Period:
+    return days(*last_n_dates(n, tz, now), tz)
+
+
+def between(start: datetime, end: datetime, tz) -> Period:
+    """
+    Arbitrary timestamps; naive values are read in `tz`.
+    """
+    return Period(_aware(start, tz).astimezone(UTC), _aware(end, tz).astimezone(UTC))
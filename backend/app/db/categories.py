@@ -0,0 +1,115 @@
+"""
+Shared categories and the move from category names to categories.id.
+
+Schema version 5 replaces the `category` name column of expenses,
+daily_spend, monthly_spend and expense_stats with an integer category_id
+referencing `categories`. `migrate` converts a version 4 database in place:
+
+    python -m app.cli migrate-categories [--vacuum]
+
+Names that match a SHARED category map to it; every other name becomes a
+custom category of the user who used it. Names are collected from every
+converted table, since rollups and statistics may outlive their expenses
+(detached partitions).
+"""
+from sqlalchemy import Table, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.models.category import Category
+from app.models.expense import Expense
+from app.models.expense_stats import ExpenseStats
+from app.models.rollup import DailySpend, MonthlySpend
+
+SHARED = ("Food", "Transport", "Rent", "Utilities", "Entertainment", "Health", "Shopping")
+
+REKEYED = (Expense.__table__, DailySpend.__table__, MonthlySpend.__table__, ExpenseStats.__table__)
+
+
+class CategoryMigrationError(RuntimeError):
+    pass
+
+
+async def ensure_shared(conn: AsyncConnection):
+    stmt = insert(Category).values([{"user_id": None, "name": name} for name in SHARED])
+    await conn.execute(
+        stmt.on_conflict_do_nothing(
+            index_elements=[Category.name], index_where=Category.user_id.is_(None)
+        )
+    )
+
+
+async def _has_column(conn: AsyncConnection, table: str, column: str) -> bool:
+    return bool(await conn.scalar(
+        text(
+            "SELECT EXISTS (SELECT 1 FROM information_schema.columns "
+            "WHERE table_schema = current_schema() AND table_name = :table AND column_name = :column)"
+        ),
+        {"table": table, "column": column},
+    ))
+
+
+async def needs_migration(conn: AsyncConnection) -> bool:
+    return await _has_column(conn, Expense.__tablename__, "category")
+
+
+async def _rekey(conn: AsyncConnection, table: Table) -> int:
+    """
+    Replace table.category with category_id, as declared on `table`.
+    Returns the number of rows converted.
+    """
+    name = table.name
+    await conn.execute(text(f"ALTER TABLE {name} ADD COLUMN category_id INTEGER"))
+    result = await conn.execute(text(
+        f"UPDATE {name} SET category_id = categories.id FROM categories "
+        f"WHERE categories.name = {name}.category "
+        f"AND (categories.user_id IS NULL OR categories.user_id = {name}.user_id)"
+    ))
+
+    unmatched = await conn.scalar(text(f"SELECT count(*) FROM {name} WHERE category_id IS NULL"))
+    if unmatched:
+        raise CategoryMigrationError(f"{unmatched} {name} rows have no matching category")
+
+    # Also drops the indexes and the primary key that include the name.
+    await conn.execute(text(f"ALTER TABLE {name} DROP COLUMN category"))
+    await conn.execute(text(f"ALTER TABLE {name} ALTER COLUMN category_id SET NOT NULL"))
+    await conn.execute(text(
+        f"ALTER TABLE {name} ADD CONSTRAINT {name}_category_id_fkey "
+        f"FOREIGN KEY (category_id) REFERENCES categories (id)"
+    ))
+
+    primary_key = table.primary_key.columns.keys()
+    if "category_id" in primary_key:
+        await conn.execute(text(
+            f"ALTER TABLE {name} ADD CONSTRAINT {name}_pkey PRIMARY KEY ({', '.join(primary_key)})"
+        ))
+    for index in table.indexes:
+        if "category_id" in index.columns:
+            await conn.run_sync(index.create, checkfirst=True)
+
+    return result.rowcount
+
+
+async def migrate(conn: AsyncConnection) -> dict[str, int]:
+    """
+    Convert a database that still stores category names. The caller owns
+    the transaction, which locks every converted table until commit.
+    Returns {table: rows converted}; tables that do not exist yet are
+    skipped and left to init-db.
+    """
+    if not await needs_migration(conn):
+        raise CategoryMigrationError("Expenses already store category ids")
+
+    tables = [table for table in REKEYED if await _has_column(conn, table.name, "category")]
+    names = " UNION ".join(f"SELECT user_id, category FROM {table.name}" for table in tables)
+
+    await conn.run_sync(Category.__table__.create, checkfirst=True)
+    await ensure_shared(conn)
+    await conn.execute(text(
+        "INSERT INTO categories (user_id, name) "
+        f"SELECT user_id, category FROM ({names}) AS used "
+        "WHERE category NOT IN (SELECT name FROM categories WHERE user_id IS NULL) "
+        "ON CONFLICT DO NOTHING"
+    ))
+
+    return {table.name: await _rekey(conn, table) for table in tables}
@@ -0,0 +1,234 @@
+"""
+Monthly range partitioning of `expenses` by created_at.
+
+With EXPENSES_PARTITIONED, expenses is a partitioned table with one
+partition per UTC calendar month (`expenses_2026_10`) plus a DEFAULT
+partition for rows outside every month. Postgres requires the partition key
+in every unique constraint, so the primary key is (id, created_at); the
+mapper still identifies rows by id, which stays unique because ids are
+uuid4s generated by the application. The foreign key to users and every
+index of the model are declared on the parent and inherited by each
+partition.
+
+A query that filters created_at with a half-open range (Period.where) only
+reads the partitions overlapping the range; the planner prunes with
+literal bounds and the executor with bound parameters.
+
+    python -m app.cli partition-expenses     # convert an existing table
+    python -m app.cli ensure-partitions      # create the months ahead
+    python -m app.cli detach-partitions      # apply EXPENSE_RETENTION_MONTHS
+"""
+import re
+from datetime import date, datetime, time
+
+from sqlalchemy import MetaData, PrimaryKeyConstraint, Table, text
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+from app.core.config import settings
+from app.core.time_buckets import UTC, month_start, next_month
+from app.models.base import Base
+from app.models.expense import Expense
+
+PARENT = Expense.__tablename__
+DEFAULT_PARTITION = f"{PARENT}_default"
+UNPARTITIONED = f"{PARENT}_unpartitioned"
+
+_MONTHLY = re.compile(rf"^{PARENT}_(\d{{4}})_(\d{{2}})$")
+
+_PARTITIONS = text(
+    """
+    SELECT child.relname
+    FROM pg_inherits
+    JOIN pg_class child ON child.oid = pg_inherits.inhrelid
+    WHERE pg_inherits.inhparent = to_regclass(:parent)
+    """
+)
+
+
+class PartitionError(RuntimeError):
+    pass
+
+
+def partition_name(month: date) -> str:
+    return f"{PARENT}_{month:%Y_%m}"
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def _month_range(month: date) -> tuple[datetime, datetime]:
+    return (
+        datetime.combine(month, time.min, tzinfo=UTC),
+        datetime.combine(next_month(month), time.min, tzinfo=UTC),
+    )
+
+
+def _bounds(month: date) -> str:
+    # DDL takes no bind parameters; both values come from a date.
+    start, end = _month_range(month)
+    return f"FROM ('{start.isoformat()}') TO ('{end.isoformat()}')"
+
+
+def partitioned_table() -> Table:
+    """
+    expenses as declared by the model, with the partition key added to the
+    primary key and PARTITION BY RANGE (created_at).
+    """
+    metadata = MetaData()
+    for foreign_key in Expense.__table__.foreign_keys:
+        foreign_key.column.table.to_metadata(metadata)
+
+    table = Expense.__table__.to_metadata(metadata)
+    table.c.created_at.primary_key = True
+    table.append_constraint(PrimaryKeyConstraint("id", "created_at", name=f"{PARENT}_pkey"))
+    table.dialect_kwargs["postgresql_partition_by"] = "RANGE (created_at)"
+    return table
+
+
+async def _relkind(conn: AsyncConnection, name: str) -> str | None:
+    return await conn.scalar(
+        text("SELECT relkind::text FROM pg_class WHERE oid = to_regclass(:name)"), {"name": name}
+    )
+
+
+async def is_partitioned(conn: AsyncConnection) -> bool:
+    return await _relkind(conn, PARENT) == "p"
+
+
+async def monthly_partitions(conn: AsyncConnection) -> dict[date, str]:
+    result = await conn.execute(_PARTITIONS, {"parent": PARENT})
+    months = {}
+    for (name,) in result:
+        match = _MONTHLY.match(name)
+        if match:
+            months[date(int(match[1]), int(match[2]), 1)] = name
+    return months
+
+
+async def _create_partition(conn: AsyncConnection, month: date):
+    name = partition_name(month)
+    start, end = _month_range(month)
+    in_range = "created_at >= :start AND created_at < :end"
+
+    stranded = await conn.scalar(
+        text(f"SELECT EXISTS (SELECT 1 FROM {DEFAULT_PARTITION} WHERE {in_range})"),
+        {"start": start, "end": end},
+    )
+    if not stranded:
+        await conn.execute(text(f"CREATE TABLE {name} PARTITION OF {PARENT} FOR VALUES {_bounds(month)}"))
+        return
+
+    # Postgres refuses a new partition while the default one holds rows of
+    # its range, so move them out first.
+    await conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)"))
+    await conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT_PARTITION} WHERE {in_range} RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"start": start, "end": end},
+    )
+    await conn.execute(text(f"ALTER TABLE {PARENT} ATTACH PARTITION {name} FOR VALUES {_bounds(month)}"))
+
+
+async def ensure_partitions(
+    conn: AsyncConnection, first: date | None = None, ahead: int | None = None
+) -> list[str]:
+    """
+    Create the default partition and every missing month from `first`
+    (default: the current month) to `ahead` months after the current one
+    (default: PARTITION_MONTHS_AHEAD). Returns the new partition names.
+    """
+    ahead = settings.PARTITION_MONTHS_AHEAD if ahead is None else ahead
+    this_month = month_start(datetime.now(UTC).date())
+
+    await conn.execute(text(f"CREATE TABLE IF NOT EXISTS {DEFAULT_PARTITION} PARTITION OF {PARENT} DEFAULT"))
+    existing = await monthly_partitions(conn)
+
+    created = []
+    month, last = month_start(first or this_month), add_months(this_month, ahead)
+    while month <= last:
+        if month not in existing:
+            await _create_partition(conn, month)
+            created.append(partition_name(month))
+        month = next_month(month)
+    return created
+
+
+async def create_schema(conn: AsyncConnection):
+    """
+    init_schema for EXPENSES_PARTITIONED: every table as declared, except
+    expenses, which is created partitioned.
+    """
+    if await _relkind(conn, PARENT) == "r":
+        raise PartitionError(
+            f"{PARENT} exists and is not partitioned; run `python -m app.cli partition-expenses`"
+        )
+
+    others = [table for table in Base.metadata.sorted_tables if table.name != PARENT]
+    await conn.run_sync(Base.metadata.create_all, tables=others)
+    await conn.run_sync(partitioned_table().create, checkfirst=True)
+    await ensure_partitions(conn)
+
+
+async def partition_existing(conn: AsyncConnection) -> int:
+    """
+    Replace a plain expenses table with a partitioned one holding the same
+    rows. The old table is kept as expenses_unpartitioned. Locks expenses
+    for the whole copy; the caller owns the transaction. Returns the number
+    of rows copied.
+    """
+    kind = await _relkind(conn, PARENT)
+    if kind is None:
+        raise PartitionError(f"{PARENT} does not exist; run `python -m app.cli init-db`")
+    if kind == "p":
+        raise PartitionError(f"{PARENT} is already partitioned")
+    if await _relkind(conn, UNPARTITIONED) is not None:
+        raise PartitionError(f"{UNPARTITIONED} exists; drop it first")
+
+    undated = await conn.scalar(text(f"SELECT count(*) FROM {PARENT} WHERE created_at IS NULL"))
+    if undated:
+        raise PartitionError(f"{undated} expenses have no created_at; set it before partitioning")
+
+    # Index and primary key names are schema-wide; free them for the new table.
+    await conn.execute(text(f"ALTER TABLE {PARENT} RENAME TO {UNPARTITIONED}"))
+    await conn.execute(text(f"ALTER INDEX IF EXISTS {PARENT}_pkey RENAME TO {UNPARTITIONED}_pkey"))
+    for index in Expense.__table__.indexes:
+        await conn.execute(text(f"ALTER INDEX IF EXISTS {index.name} RENAME TO {index.name}_unpartitioned"))
+
+    await conn.run_sync(partitioned_table().create)
+
+    first = await conn.scalar(text(f"SELECT min(created_at) FROM {UNPARTITIONED}"))
+    await ensure_partitions(conn, first=first.astimezone(UTC).date() if first else None)
+
+    columns = ", ".join(column.name for column in Expense.__table__.columns)
+    result = await conn.execute(
+        text(f"INSERT INTO {PARENT} ({columns}) SELECT {columns} FROM {UNPARTITIONED}")
+    )
+    return result.rowcount
+
+
+async def detach_partitions(
+    conn: AsyncConnection, keep_months: int, drop: bool = False
+) -> tuple[list[str], set]:
+    """
+    Detach (or drop) the monthly partitions that end before the last
+    `keep_months` months plus the current one. Detached partitions stay as
+    plain tables for archiving. Rows in the default partition are kept.
+    Returns the partition names and the ids of the users who had rows in
+    them.
+    """
+    cutoff = add_months(month_start(datetime.now(UTC).date()), -keep_months)
+
+    removed, user_ids = [], set()
+    for month, name in sorted((await monthly_partitions(conn)).items()):
+        if month >= cutoff:
+            break
+        user_ids.update((await conn.scalars(text(f"SELECT DISTINCT user_id FROM {name}"))).all())
+        await conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+        if drop:
+            await conn.execute(text(f"DROP TABLE {name}"))
+        removed.append(name)
+    return removed, user_ids
@@ -0,0 +1,80 @@
+"""
+Schema creation and the boot-time schema version check.
+
+Workers only compare SCHEMA_VERSION with the `schema_version` table on boot;
+DDL runs from `python -m app.cli init-db` (or on boot with
+SCHEMA_AUTO_CREATE=true for local development). Bump SCHEMA_VERSION whenever
+the models change in a way that needs DDL. With EXPENSES_PARTITIONED, expenses
+is created partitioned by month (app/db/partitions.py). Version 5 stores
+category ids instead of names; older databases are converted with
+`python -m app.cli migrate-categories` (app/db/categories.py).
+
+create_all only creates missing tables, so columns added to existing tables
+are also listed in ADDED_COLUMNS (idempotent DDL), and every expenses index
+is created if missing (ADDED_INDEXES); init-db applies both before
+recording the version.
+"""
+from sqlalchemy import Column, DateTime, Integer, delete, insert, select, text
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncConnection
+from sqlalchemy.sql import func
+
+import app.models  # noqa: F401  (registers every table on Base.metadata)
+from app.core.config import settings
+from app.db import categories, partitions
+from app.models.base import Base
+from app.models.expense import Expense
+
+SCHEMA_VERSION = 5
+
+ADDED_COLUMNS = (
+    "ALTER TABLE expenses ADD COLUMN IF NOT EXISTS is_anomaly BOOLEAN NOT NULL DEFAULT false",
+    "ALTER TABLE expenses ADD COLUMN IF NOT EXISTS anomaly_score DOUBLE PRECISION",
+    "ALTER TABLE users ADD COLUMN IF NOT EXISTS timezone VARCHAR NOT NULL DEFAULT 'UTC'",
+)
+
+ADDED_INDEXES = tuple(sorted(Expense.__table__.indexes, key=lambda index: index.name))
+
+
+class SchemaVersion(Base):
+    __tablename__ = "schema_version"
+
+    version = Column(Integer, primary_key=True)
+    applied_at = Column(DateTime(timezone=True), server_default=func.now())
+
+
+class SchemaVersionMismatch(RuntimeError):
+    pass
+
+
+async def init_schema(conn: AsyncConnection):
+    if await categories.needs_migration(conn):
+        raise SchemaVersionMismatch(
+            "Expenses still store category names. Run `python -m app.cli migrate-categories` first."
+        )
+
+    if settings.EXPENSES_PARTITIONED:
+        await partitions.create_schema(conn)
+    else:
+        await conn.run_sync(Base.metadata.create_all)
+    for statement in ADDED_COLUMNS:
+        await conn.execute(text(statement))
+    for index in ADDED_INDEXES:
+        await conn.run_sync(index.create, checkfirst=True)
+    await categories.ensure_shared(conn)
+    await conn.execute(delete(SchemaVersion))
+    await conn.execute(insert(SchemaVersion).values(version=SCHEMA_VERSION))
+
+
+async def check_schema_version(conn: AsyncConnection):
+    try:
+        result = await conn.execute(select(func.max(SchemaVersion.version)))
+        version = result.scalar()
+    except DBAPIError:
+        version = None
+
+    if version != SCHEMA_VERSION:
+        raise SchemaVersionMismatch(
+            f"Database schema version is {version}, expected {SCHEMA_VERSION}. "
+            "Run `python -m app.cli init-db` first."
+        )
@@ -1,5 +1,160 @@
-from app.core.database import AsyncSessionLocal
+"""
+Database sessions for request handlers.
+
+get_db always uses the primary. Read-only handlers use get_read_db
+(app/api/auth/dependencies.py), which reads from READ_DATABASE_URL unless
+
+- no replica is configured,
+- the replica is unreachable or lags more than REPLICA_MAX_LAG_SECONDS
+  (checked at most every REPLICA_CHECK_SECONDS), or
+- the user wrote recently (after_commit calls record_write), so they
+  always read their own writes.
+
+Write times are kept in `recent_writes`, apart from the response-cache LRU
+so cached bodies can never evict them. A shared CACHE_BACKEND also gets
+them, for the other workers; it must keep keys for _sticky_seconds().
+"""
+import asyncio
+import logging
+import time
+from collections import OrderedDict
+from time import monotonic
+
+from sqlalchemy import text
+
+from app.core.cache import MemoryBackend, backend
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, ReadSessionLocal, read_engine
+
+CHECK_TIMEOUT_SECONDS = 1.0
+
+# Zero when the replica has replayed everything it received (an idle
+# primary does not count as lag), or when it is not a standby at all.
+LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+logger = logging.getLogger(__name__)
+
 
 async def get_db():
     async with AsyncSessionLocal() as session:
-        yield session
\ No newline at end of file
+        yield session
+
+
+class ReplicaHealth:
+    def __init__(self):
+        self.usable = False
+        self.lag: float | None = None
+        self._checked_at: float | None = None
+        self._lock = asyncio.Lock()
+
+    async def _measure(self) -> float:
+        async with read_engine.connect() as conn:
+            result = await conn.execute(LAG_QUERY)
+            return float(result.scalar())
+
+    async def check(self) -> bool:
+        fresh = (
+            self._checked_at is not None
+            and monotonic() - self._checked_at < settings.REPLICA_CHECK_SECONDS
+        )
+        # One check at a time; concurrent requests use the last answer.
+        if fresh or self._lock.locked():
+            return self.usable
+
+        async with self._lock:
+            was_usable = self.usable
+            try:
+                self.lag = await asyncio.wait_for(self._measure(), CHECK_TIMEOUT_SECONDS)
+                self.usable = self.lag <= settings.REPLICA_MAX_LAG_SECONDS
+                if not self.usable and was_usable:
+                    logger.warning("Replica lags %.1fs, reading from the primary", self.lag)
+            except Exception:
+                self.lag = None
+                self.usable = False
+                if was_usable or self._checked_at is None:
+                    logger.warning("Replica unavailable, reading from the primary", exc_info=True)
+            self._checked_at = monotonic()
+
+        return self.usable
+
+
+replica_health = ReplicaHealth()
+
+
+def _sticky_seconds() -> float:
+    # Cached responses are keyed by data version, so a replica read right
+    # after a write must never be older than the write: stay on the primary
+    # for at least as long as the replica may lag undetected.
+    return max(
+        settings.READ_YOUR_WRITES_SECONDS,
+        settings.REPLICA_MAX_LAG_SECONDS + settings.REPLICA_CHECK_SECONDS,
+    )
+
+
+def _write_key(user_id) -> str:
+    return f"last-write:{user_id}"
+
+
+class RecentWrites:
+    """
+    user_id -> time of the last write, forgotten once it is older than
+    _sticky_seconds()
+    """
+
+    def __init__(self):
+        self._times: OrderedDict = OrderedDict()
+
+    def record(self, user_id, now: float):
+        self._times[user_id] = now
+        self._times.move_to_end(user_id)
+
+        # Oldest first, so pruning stops at the first recent entry.
+        cutoff = now - _sticky_seconds()
+        while self._times and next(iter(self._times.values())) < cutoff:
+            self._times.popitem(last=False)
+
+    def get(self, user_id) -> float | None:
+        return self._times.get(user_id)
+
+
+recent_writes = RecentWrites()
+
+
+async def record_write(user_id):
+    if read_engine is not None:
+        now = time.time()
+        recent_writes.record(user_id, now)
+        if not isinstance(backend, MemoryBackend):
+            await backend.set(_write_key(user_id), now)
+
+
+async def _last_write(user_id) -> float | None:
+    last_write = recent_writes.get(user_id)
+    if last_write is None and not isinstance(backend, MemoryBackend):
+        last_write = await backend.get(_write_key(user_id))
+    return last_write
+
+
+async def read_sessionmaker(user_id):
+    """
+    The session factory to serve a read-only request of `user_id` from.
+    """
+    if ReadSessionLocal is None:
+        return AsyncSessionLocal
+
+    last_write = await _last_write(user_id)
+    if last_write is not None and time.time() - last_write < _sticky_seconds():
+        return AsyncSessionLocal
+
+    if not await replica_health.check():
+        return AsyncSessionLocal
+
+    return ReadSessionLocal
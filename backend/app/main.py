@@ -1,20 +1,28 @@
+import asyncio
+
 from fastapi import FastAPI, Depends
 from app.core.config import settings
+from app.core.logging import RequestIdMiddleware
+from app.core.request_metrics import MetricsMiddleware, render_metrics
 from app.core.database import engine
-from app.models.base import Base
-from app.models import user
+from app.db.schema import check_schema_version, init_schema
 from app.api.auth.routes import router as auth_router
 from app.core.dependencies import get_current_user
 from app.core.dependencies import require_admin
 from app.api.expenses.routes import router as expense_router
 from fastapi import Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, PlainTextResponse
 from app.core.exceptions import AppException
 from app.api.admin.routes import router as admin_router
 from app.api.analytics.routes import router as analytics_router
 from app.api.budgets.routes import router as budget_router
+from app.core.revocation import refresh_revocations_forever
+from app.services.jobs import jobs
+from app.services.forecasting import refresh_forecasts_forever
 
 app = FastAPI(title=settings.APP_NAME, debug=settings.DEBUG)
+app.add_middleware(MetricsMiddleware)
+app.add_middleware(RequestIdMiddleware)
 app.include_router(admin_router)
 app.include_router(analytics_router)
 app.include_router(budget_router)
@@ -22,7 +30,23 @@ app.include_router(budget_router)
 @app.on_event("startup")
 async def startup():
     async with engine.begin() as conn:
-        await conn.run_sync(Base.metadata.create_all)
+        if settings.SCHEMA_AUTO_CREATE:
+            await init_schema(conn)
+        else:
+            await check_schema_version(conn)
+
+    app.state.revocation_refresher = asyncio.create_task(refresh_revocations_forever())
+    app.state.forecast_refresher = (
+        asyncio.create_task(refresh_forecasts_forever())
+        if settings.FORECAST_REFRESH_SECONDS > 0 else None
+    )
+
+@app.on_event("shutdown")
+async def shutdown():
+    app.state.revocation_refresher.cancel()
+    if app.state.forecast_refresher is not None:
+        app.state.forecast_refresher.cancel()
+    jobs.shutdown()
 
 app.include_router(auth_router)
 app.include_router(expense_router)
@@ -31,6 +55,12 @@ app.include_router(expense_router)
 def health_check():
     return {"status": "ok"}
     
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(
+        render_metrics(engine), media_type="text/plain; version=0.0.4"
+    )
+
 @app.get("/protected")
 def protected(user_id: str = Depends(get_current_user)):
     return {"message": f"Hello user {user_id}"}
@@ -46,5 +76,6 @@ async def app_exception_handler(request: Request, exc: AppException):
         content={
             "success": False,
             "error": exc.detail
-        }
+        },
+        headers=exc.headers
     )
\ No newline at end of file
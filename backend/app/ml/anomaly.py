@@ -1,4 +1,5 @@
 import statistics
+from collections import defaultdict
 
 def detect_anomalies(expenses, threshold=2):
     """
@@ -20,4 +21,108 @@ def detect_anomalies(expenses, threshold=2):
         if abs(e["amount"] - mean) > threshold * std:
             anomalies.append(e)
 
-    return anomalies
\ No newline at end of file
+    return anomalies
+
+MIN_SAMPLES = 5
+
+
+def welford_update(count, mean, m2, value):
+    """
+    Add one value to running (count, mean, M2) statistics.
+    """
+    count += 1
+    delta = value - mean
+    mean += delta / count
+    m2 += delta * (value - mean)
+    return count, mean, m2
+
+
+def welford_stdev(count, m2):
+    # sample standard deviation, same as statistics.stdev
+    if count < 2:
+        return None
+    return (m2 / (count - 1)) ** 0.5
+
+
+def score_amount(count, mean, m2, amount, threshold=2):
+    """
+    Score `amount` against the running statistics of earlier expenses.
+    Returns (is_anomaly, z-score or None).
+    """
+    if count < MIN_SAMPLES:
+        return False, None
+
+    std = welford_stdev(count, m2)
+    deviation = abs(amount - mean)
+
+    if std == 0:
+        return deviation > 0, None
+
+    return deviation > threshold * std, deviation / std
+
+
+def anomalies_by_category(amounts, categories, dates, threshold=2):
+    """
+    amounts, categories, dates: parallel lists, one entry per expense
+
+    Full-history counterpart of score_amount: every expense is compared with
+    the mean and deviation of all expenses in its category, not only the
+    earlier ones. Returns the anomalies as dicts {amount, category, date,
+    score} in input order.
+    """
+    positions = defaultdict(list)
+    for index, category in enumerate(categories):
+        positions[category].append(index)
+
+    flagged = {}
+    for indexes in positions.values():
+        if len(indexes) < MIN_SAMPLES:
+            continue
+
+        values = [amounts[i] for i in indexes]
+        mean = statistics.fmean(values)
+        std = statistics.stdev(values)
+
+        for i in indexes:
+            deviation = abs(amounts[i] - mean)
+            if std == 0:
+                if deviation > 0:
+                    flagged[i] = None
+            elif deviation > threshold * std:
+                flagged[i] = round(deviation / std, 3)
+
+    return [
+        {"amount": amounts[i], "category": categories[i], "date": dates[i], "score": flagged[i]}
+        for i in sorted(flagged)
+    ]
+
+
+def category_anomalies(amounts, codes, threshold=2):
+    """
+    amounts: float array, one entry per expense
+    codes: array of non-negative integer category codes, same length
+
+    anomalies_by_category over NumPy arrays; memory-mapped snapshot columns
+    are read in place. Returns (indexes of the anomalies in input order,
+    their z-scores rounded to 3 places, NaN where the category has no spread).
+    """
+    import numpy as np
+
+    amounts = np.asarray(amounts, dtype=float)
+    codes = np.asarray(codes)
+    if not len(amounts):
+        return np.empty(0, dtype=np.intp), np.empty(0)
+
+    counts = np.bincount(codes)
+    means = np.bincount(codes, weights=amounts) / np.maximum(counts, 1)
+    deviation = np.abs(amounts - means[codes])
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        std = np.sqrt(np.bincount(codes, weights=deviation * deviation) / (counts - 1))[codes]
+        flat = std == 0
+        flagged = (counts[codes] >= MIN_SAMPLES) & np.where(flat, deviation > 0, deviation > threshold * std)
+
+        indexes = np.flatnonzero(flagged)
+        scores = np.where(flat[indexes], np.nan, np.round(deviation[indexes] / std[indexes], 3))
+
+    return indexes, scores
@@ -1,29 +1,32 @@
-import numpy as np
-from sklearn.linear_model import LinearRegression
-from datetime import date
+# numpy and scikit-learn are imported on first use so importing the app
+# (and booting a worker) does not pay for them.
+
+MIN_EXPENSES = 3
 
 def forecast_next_month(expenses):
     """
     expenses: list of dicts with keys {date, amount}
+
+    Reference implementation; the API uses forecast_from_totals over the
+    monthly rollups.
     """
 
-    if len(expenses) < 3:
+    if len(expenses) < MIN_EXPENSES:
         return None  # not enough data
 
-    # Convert to month index
-    months = []
+    import numpy as np
+    from sklearn.linear_model import LinearRegression
+
     totals = {}
 
     for e in expenses:
         key = (e["date"].year, e["date"].month)
         totals[key] = totals.get(key, 0) + e["amount"]
 
-    for i, ((year, month), total) in enumerate(sorted(totals.items())):
-        months.append([i])
-        totals[(year, month)] = total
-
-    X = np.array(months)
-    y = np.array(list(totals.values()))
+    # Month index in chronological order
+    ordered = sorted(totals.items())
+    X = np.array([[i] for i in range(len(ordered))])
+    y = np.array([total for _, total in ordered])
 
     model = LinearRegression()
     model.fit(X, y)
@@ -31,4 +34,61 @@ def forecast_next_month(expenses):
     next_month_index = [[len(X)]]
     prediction = model.predict(next_month_index)
 
-    return round(float(prediction[0]), 2)
\ No newline at end of file
+    return round(float(prediction[0]), 2)
+
+
+def forecast_from_totals(totals):
+    """
+    totals: monthly spend totals in chronological order
+
+    Closed-form least-squares line through (month index, total), evaluated
+    at the next month. Same result as forecast_next_month.
+    """
+    import numpy as np
+
+    y = np.asarray(totals, dtype=float)
+    n = len(y)
+    if n == 0:
+        return None
+
+    x = np.arange(n, dtype=float)
+    x_centered = x - x.mean()
+    y_mean = y.mean()
+
+    denominator = x_centered @ x_centered
+    slope = (x_centered @ (y - y_mean)) / denominator if denominator else 0.0
+
+    prediction = y_mean + slope * (n - x.mean())
+    return round(float(prediction), 2)
+
+
+def forecast_batch(totals, lengths):
+    """
+    totals: (users, max months) array, each row's monthly totals
+            left-aligned in chronological order and zero padded
+    lengths: number of months per row
+
+    forecast_from_totals for every row at once. Returns an array of
+    predictions, NaN for rows without months.
+    """
+    import numpy as np
+
+    y = np.asarray(totals, dtype=float)
+    n = np.asarray(lengths, dtype=float)
+
+    x = np.arange(y.shape[1], dtype=float)
+    mask = x[None, :] < n[:, None]
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        x_mean = (n - 1) / 2
+        y_mean = np.where(mask, y, 0).sum(axis=1) / n
+
+        x_centered = np.where(mask, x[None, :] - x_mean[:, None], 0)
+        covariance = (x_centered * (y - y_mean[:, None])).sum(axis=1)
+        # sum of squared deviations of 0..n-1
+        variance = n * (n * n - 1) / 12
+        slope = np.where(variance > 0, covariance / np.where(variance > 0, variance, 1), 0.0)
+
+        prediction = y_mean + slope * (n - x_mean)
+
+    return np.round(prediction, 2)
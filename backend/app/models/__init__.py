@@ -1 +1,9 @@
-from .expense import Expense
\ No newline at end of file
+from .user import User
+from .category import Category
+from .expense import Expense
+from .budget import Budget
+from .rollup import DailySpend, MonthlySpend
+from .revoked_token import RevokedToken
+from .expense_stats import ExpenseStats
+from .forecast import Forecast
+from .budget_state import BudgetState
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Float, Integer, Date, DateTime, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+from sqlalchemy.sql import func
+
+from app.models.base import Base
+
+class BudgetState(Base):
+    """
+    Current budget and month-to-date spend per user, maintained by the
+    expense write hooks and set_budget (see app/services/budgets.py).
+    """
+    __tablename__ = "budget_states"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+
+    monthly_limit = Column(Float, nullable=True)  # None: no budget set
+    month = Column(Date, nullable=False)  # first day of the user's local month
+    spent = Column(Float, nullable=False, default=0)
+    # Highest alert threshold (percent of the limit) already announced for `month`
+    alerted_threshold = Column(Integer, nullable=False, default=0)
+
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
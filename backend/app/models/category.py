@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Integer, String, ForeignKey, Index, text
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import Base
+
+class Category(Base):
+    """
+    Expense category names. Rows without user_id are shared by every user;
+    the others are one user's custom categories (see
+    app/services/categories.py).
+    """
+    __tablename__ = "categories"
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=True)
+    name = Column(String, nullable=False)
+
+    __table_args__ = (
+        Index("ux_categories_shared_name", "name", unique=True, postgresql_where=text("user_id IS NULL")),
+        Index(
+            "ux_categories_user_name", "user_id", "name", unique=True,
+            postgresql_where=text("user_id IS NOT NULL"),
+        ),
+    )
\ No newline at end of file
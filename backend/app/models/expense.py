@@ -1,4 +1,4 @@
-from sqlalchemy import Column, String, Float, DateTime, ForeignKey
+from sqlalchemy import Column, String, Float, Integer, Boolean, DateTime, ForeignKey, Index, false, text
 from sqlalchemy.dialects.postgresql import UUID
 from sqlalchemy.sql import func
 import uuid
@@ -12,7 +12,24 @@ class Expense(Base):
     user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), nullable=False)
 
     amount = Column(Float, nullable=False)
-    category = Column(String, nullable=False)
+    # Names live in `categories`; the API resolves them (services/categories.py).
+    category_id = Column(Integer, ForeignKey("categories.id"), nullable=False)
     description = Column(String, nullable=True)
 
-    created_at = Column(DateTime(timezone=True), server_default=func.now())
\ No newline at end of file
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    # Scored against the user's category statistics when the row is written.
+    is_anomaly = Column(Boolean, nullable=False, default=False, server_default=false())
+    anomaly_score = Column(Float, nullable=True)
+
+    __table_args__ = (
+        # Keyset pagination: (user_id, sort key, id) serves both the filter and
+        # the ORDER BY, so every page is an index range scan.
+        Index("ix_expenses_user_created_id", "user_id", "created_at", "id"),
+        Index("ix_expenses_user_amount_id", "user_id", "amount", "id"),
+        Index("ix_expenses_user_category_id_created_id", "user_id", "category_id", "created_at", "id"),
+        Index(
+            "ix_expenses_user_anomalies", "user_id", "created_at",
+            postgresql_where=text("is_anomaly"),
+        ),
+    )
@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Float, Integer, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import Base
+
+class ExpenseStats(Base):
+    """
+    Running (Welford) amount statistics per user and category.
+    """
+    __tablename__ = "expense_stats"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+
+    count = Column(Integer, nullable=False, default=0)
+    mean = Column(Float, nullable=False, default=0)
+    m2 = Column(Float, nullable=False, default=0)
@@ -0,0 +1,27 @@
+from sqlalchemy import Column, Float, Integer, Boolean, DateTime, ForeignKey, Index, text, true
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import Base
+
+class Forecast(Base):
+    """
+    Precomputed next-month forecast per user (python -m app.cli
+    precompute-forecasts). Expense writes set `stale` and bump `version`;
+    a precompute only clears `stale` if `version` is unchanged since it
+    read the totals.
+    """
+    __tablename__ = "forecasts"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+
+    prediction = Column(Float, nullable=True)  # None: not enough data
+    months = Column(Integer, nullable=False, default=0)
+    expense_count = Column(Integer, nullable=False, default=0)
+    computed_at = Column(DateTime(timezone=True), nullable=True)
+
+    stale = Column(Boolean, nullable=False, default=True, server_default=true())
+    version = Column(Integer, nullable=False, default=1, server_default=text("1"))
+
+    __table_args__ = (
+        Index("ix_forecasts_stale", "user_id", postgresql_where=text("stale")),
+    )
@@ -0,0 +1,24 @@
+from sqlalchemy import Column, Float, Integer, Date, ForeignKey
+from sqlalchemy.dialects.postgresql import UUID
+
+from app.models.base import Base
+
+class DailySpend(Base):
+    __tablename__ = "daily_spend"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    category_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+
+    total = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
+
+class MonthlySpend(Base):
+    __tablename__ = "monthly_spend"
+
+    user_id = Column(UUID(as_uuid=True), ForeignKey("users.id"), primary_key=True)
+    month = Column(Date, primary_key=True)  # first day of the month
+    category_id = Column(Integer, ForeignKey("categories.id"), primary_key=True)
+
+    total = Column(Float, nullable=False, default=0)
+    count = Column(Integer, nullable=False, default=0)
@@ -14,3 +14,5 @@ class User(Base):
     password_hash = Column(String, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     role = Column(String, default="user", nullable=False)  # <-- now inside class
+    # IANA name; days and months in analytics are taken in this timezone
+    timezone = Column(String, default="UTC", server_default="UTC", nullable=False)
@@ -7,6 +7,9 @@ class ExpenseCreate(BaseModel):
     category: str
     description: str | None = None
 
+class ExpenseImport(ExpenseCreate):
+    created_at: datetime | None = None
+
 class ExpenseResponse(BaseModel):
     id: UUID
     amount: float
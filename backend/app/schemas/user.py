@@ -1,5 +1,22 @@
-from pydantic import BaseModel, EmailStr
+from typing import Literal
+
+from zoneinfo import ZoneInfo, ZoneInfoNotFoundError
+
+from pydantic import BaseModel, EmailStr, field_validator
 
 class UserCreate(BaseModel):
     email: EmailStr
-    password: str
\ No newline at end of file
+    password: str
+    timezone: str = "UTC"
+
+    @field_validator("timezone")
+    @classmethod
+    def known_timezone(cls, value):
+        try:
+            ZoneInfo(value)
+        except (ZoneInfoNotFoundError, ValueError):
+            raise ValueError("Unknown timezone")
+        return value
+
+class RoleUpdate(BaseModel):
+    role: Literal["user", "admin"]
\ No newline at end of file
@@ -0,0 +1,102 @@
+"""
+Aggregation backends for the analytics services.
+
+SqlAggregates pushes the GROUP BY into the database (over the monthly
+rollups, grouped by category id) and returns only the small grouped result. PythonAggregates
+computes the same figures from already-loaded expense rows and is the
+reference the SQL backend is checked against. Both take months in the
+user's timezone, as the rollups do.
+"""
+from collections import defaultdict
+from datetime import date
+from typing import Protocol
+
+from sqlalchemy import extract, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.time_buckets import UTC, local_day
+from app.models.category import Category
+from app.models.rollup import MonthlySpend
+
+
+class ExpenseAggregates(Protocol):
+    async def month_category_totals(self, user_id, months) -> dict:
+        """
+        months: iterable of (year, month)
+        Returns {(year, month, category): total}
+        """
+
+    async def category_totals(self, user_id) -> dict:
+        """
+        Returns {category: total} over the user's whole history
+        """
+
+
+class SqlAggregates:
+    def __init__(self, db: AsyncSession):
+        self.db = db
+
+    async def month_category_totals(self, user_id, months):
+        year = extract("year", MonthlySpend.month)
+        month = extract("month", MonthlySpend.month)
+
+        result = await self.db.execute(
+            select(
+                year.label("year"),
+                month.label("month"),
+                Category.name.label("category"),
+                func.sum(MonthlySpend.total).label("total"),
+            )
+            .join_from(MonthlySpend, Category, MonthlySpend.category_id == Category.id)
+            .where(MonthlySpend.user_id == user_id)
+            .where(MonthlySpend.month.in_([date(y, m, 1) for y, m in months]))
+            .group_by(year, month, Category.id)
+        )
+
+        return {
+            (int(row.year), int(row.month), row.category): row.total
+            for row in result.all()
+        }
+
+    async def category_totals(self, user_id):
+        result = await self.db.execute(
+            select(Category.name.label("category"), func.sum(MonthlySpend.total).label("total"))
+            .join_from(MonthlySpend, Category, MonthlySpend.category_id == Category.id)
+            .where(MonthlySpend.user_id == user_id)
+            .group_by(Category.id)
+        )
+
+        return {row.category: row.total for row in result.all()}
+
+
+class PythonAggregates:
+    """
+    expenses: objects with created_at, category and amount attributes,
+    already filtered to one user
+    tz: that user's timezone (see time_buckets.user_zone)
+    """
+
+    def __init__(self, expenses, tz=UTC):
+        self.expenses = expenses
+        self.tz = tz
+
+    async def month_category_totals(self, user_id, months):
+        wanted = set(months)
+        totals = defaultdict(float)
+
+        for exp in self.expenses:
+            day = local_day(exp.created_at, self.tz)
+            key = (day.year, day.month)
+            if key in wanted:
+                totals[(*key, exp.category)] += exp.amount
+
+        return dict(totals)
+
+    async def category_totals(self, user_id):
+        totals = defaultdict(float)
+
+        for exp in self.expenses:
+            totals[exp.category] += exp.amount
+
+        return dict(totals)
+
@@ -1,25 +1,30 @@
 from datetime import datetime
 from collections import defaultdict
 
-def monthly_comparison(expenses):
-    current_month = datetime.utcnow().month
-    last_month = current_month - 1 or 12
+from app.core.time_buckets import UTC, local_day
 
+def previous_month(year, month):
+    return (year, month - 1) if month > 1 else (year - 1, 12)
+
+def compare_months(totals, current_month, last_month):
+    """
+    totals: {(year, month, category): amount}
+    current_month / last_month: (year, month)
+    """
     current = defaultdict(float)
     previous = defaultdict(float)
 
-    for exp in expenses:
-        month = exp.created_at.month
-        if month == current_month:
-            current[exp.category] += exp.amount
-        elif month == last_month:
-            previous[exp.category] += exp.amount
+    for (year, month, category), amount in totals.items():
+        if (year, month) == current_month:
+            current[category] += amount
+        elif (year, month) == last_month:
+            previous[category] += amount
 
     comparison = []
 
     categories = set(current) | set(previous)
 
-    for cat in categories:
+    for cat in sorted(categories):
         comparison.append({
             "category": cat,
             "current_month": current.get(cat, 0),
@@ -27,4 +32,34 @@ def monthly_comparison(expenses):
             "difference": current.get(cat, 0) - previous.get(cat, 0)
         })
 
-    return comparison
\ No newline at end of file
+    return comparison
+
+async def monthly_comparison_from(aggregates, user_id, today=None):
+    """
+    aggregates: an ExpenseAggregates backend (see services/aggregation.py)
+    """
+    today = today or datetime.utcnow()
+    current_month = (today.year, today.month)
+    last_month = previous_month(*current_month)
+
+    totals = await aggregates.month_category_totals(user_id, [current_month, last_month])
+    return compare_months(totals, current_month, last_month)
+
+def monthly_comparison(expenses, today=None, tz=UTC):
+    """
+    Reference implementation over loaded expense rows; tz is the user's
+    timezone and today a day in it.
+    """
+    today = today or datetime.utcnow()
+    current_month = (today.year, today.month)
+    last_month = previous_month(*current_month)
+
+    totals = defaultdict(float)
+
+    for exp in expenses:
+        day = local_day(exp.created_at, tz)
+        key = (day.year, day.month)
+        if key in (current_month, last_month):
+            totals[(*key, exp.category)] += exp.amount
+
+    return compare_months(totals, current_month, last_month)
@@ -0,0 +1,122 @@
+"""
+Write-time anomaly scoring.
+
+Each new expense is scored against the running statistics of the user's
+earlier expenses in the same category, flagged on the row itself, and then
+folded into those statistics. /analytics/anomalies only reads flagged rows.
+"""
+from sqlalchemy import and_, bindparam, delete, select, tuple_, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import AsyncSessionLocal
+from app.ml.anomaly import score_amount, welford_update
+from app.models.expense import Expense
+from app.models.expense_stats import ExpenseStats
+
+BATCH_SIZE = 1000
+
+# Matches on (id, created_at) so each row is looked up in a single partition
+# when expenses is partitioned (app/db/partitions.py).
+_SET_FLAGS = (
+    update(Expense.__table__)
+    .where(and_(
+        Expense.__table__.c.id == bindparam("b_id"),
+        Expense.__table__.c.created_at == bindparam("b_created_at"),
+    ))
+    .values(is_anomaly=bindparam("b_is_anomaly"), anomaly_score=bindparam("b_anomaly_score"))
+)
+
+
+async def _locked_stats(db: AsyncSession, keys):
+    for start in range(0, len(keys), BATCH_SIZE):
+        await db.execute(
+            insert(ExpenseStats)
+            .values([
+                {"user_id": user_id, "category_id": category_id, "count": 0, "mean": 0.0, "m2": 0.0}
+                for user_id, category_id in keys[start:start + BATCH_SIZE]
+            ])
+            .on_conflict_do_nothing()
+        )
+
+    stats = {}
+    for start in range(0, len(keys), BATCH_SIZE):
+        result = await db.execute(
+            select(ExpenseStats)
+            .where(tuple_(ExpenseStats.user_id, ExpenseStats.category_id).in_(keys[start:start + BATCH_SIZE]))
+            .order_by(ExpenseStats.user_id, ExpenseStats.category_id)
+            .with_for_update()
+        )
+        stats.update(((row.user_id, row.category_id), row) for row in result.scalars())
+
+    return stats
+
+
+async def apply_expenses(db: AsyncSession, rows):
+    """
+    rows: dicts with keys {user_id, amount, category_id}; `is_anomaly` and
+    `anomaly_score` are set on each one before it is inserted.
+    """
+    keys = sorted({(row["user_id"], row["category_id"]) for row in rows})
+    if not keys:
+        return
+
+    # Row locks serialize concurrent writers of the same user/category.
+    stats = await _locked_stats(db, keys)
+
+    for row in rows:
+        current = stats[(row["user_id"], row["category_id"])]
+
+        row["is_anomaly"], row["anomaly_score"] = score_amount(
+            current.count, current.mean, current.m2, row["amount"]
+        )
+        current.count, current.mean, current.m2 = welford_update(
+            current.count, current.mean, current.m2, row["amount"]
+        )
+
+
+async def rebuild_stats(db: AsyncSession, user_id=None):
+    """
+    Replay expenses in insertion order to recompute the statistics and the
+    per-row flags. The caller owns the transaction of `db`; expenses are read
+    through a separate session so memory stays bounded.
+    """
+    stmt = delete(ExpenseStats)
+    if user_id is not None:
+        stmt = stmt.where(ExpenseStats.user_id == user_id)
+    await db.execute(stmt)
+
+    query = (
+        select(Expense.id, Expense.user_id, Expense.category_id, Expense.amount, Expense.created_at)
+        .order_by(Expense.user_id, Expense.created_at, Expense.id)
+        .execution_options(yield_per=BATCH_SIZE)
+    )
+    if user_id is not None:
+        query = query.where(Expense.user_id == user_id)
+
+    stats = {}
+
+    async with AsyncSessionLocal() as reader:
+        result = await reader.stream(query)
+
+        async for rows in result.partitions():
+            flags = []
+            for row in rows:
+                count, mean, m2 = stats.get((row.user_id, row.category_id), (0, 0.0, 0.0))
+                is_anomaly, score = score_amount(count, mean, m2, row.amount)
+                stats[(row.user_id, row.category_id)] = welford_update(count, mean, m2, row.amount)
+                flags.append({
+                    "b_id": row.id,
+                    "b_created_at": row.created_at,
+                    "b_is_anomaly": is_anomaly,
+                    "b_anomaly_score": score,
+                })
+
+            await db.execute(_SET_FLAGS, flags)
+
+    values = [
+        {"user_id": user, "category_id": category_id, "count": count, "mean": mean, "m2": m2}
+        for (user, category_id), (count, mean, m2) in stats.items()
+    ]
+    for start in range(0, len(values), BATCH_SIZE):
+        await db.execute(insert(ExpenseStats).values(values[start:start + BATCH_SIZE]))
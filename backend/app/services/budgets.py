@@ -0,0 +1,216 @@
+"""
+Budget state and threshold alerts.
+
+BudgetState holds each user's current limit and month-to-date spend.
+`apply_expenses` runs inside the expense write transaction, after the
+rollups, and adds the new rows of the current month; `set_limit` runs with
+set_budget. Both compare the spend with BUDGET_ALERT_THRESHOLDS and queue an
+event for every threshold crossed for the first time this month.
+`publish_pending` (called from after_commit) sends them to the user's
+channel, so a rolled-back write never announces anything.
+"""
+from sqlalchemy import Date, and_, case, cast, func, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.pubsub import broker
+from app.core.time_buckets import local_day, local_today, month_start, user_zone
+from app.models.budget import Budget
+from app.models.budget_state import BudgetState
+from app.models.rollup import MonthlySpend
+from app.models.user import User
+
+PENDING_EVENTS = "budget_events"
+
+_RETURNING = (
+    BudgetState.monthly_limit,
+    BudgetState.month,
+    BudgetState.spent,
+    BudgetState.alerted_threshold,
+)
+
+
+def channel(user_id) -> str:
+    return f"budget:{user_id}"
+
+
+def alert_level(spent, limit) -> int:
+    """
+    Highest threshold (percent of `limit`) that `spent` has reached, or 0.
+    """
+    if not limit or limit <= 0:
+        return 0
+    percent = spent / limit * 100
+    return max((t for t in settings.BUDGET_ALERT_THRESHOLDS if percent >= t), default=0)
+
+
+def _alert_level_sql(spent, limit):
+    thresholds = sorted(settings.BUDGET_ALERT_THRESHOLDS, reverse=True)
+    if not thresholds:
+        return 0
+    return case(
+        *((and_(limit > 0, spent >= limit * t / 100.0), t) for t in thresholds),
+        else_=0,
+    )
+
+
+def _month_spend(user_id, month):
+    # Includes the rows of the current transaction: rollups run first.
+    return (
+        select(func.coalesce(func.sum(MonthlySpend.total), 0.0))
+        .where(MonthlySpend.user_id == user_id, MonthlySpend.month == month)
+        .scalar_subquery()
+    )
+
+
+def state_view(state, tz) -> dict:
+    """
+    Limit and spend for the user's current month; a state row last written
+    in an earlier month means nothing has been spent yet this month.
+    """
+    month = month_start(local_today(tz))
+    spent = state.spent if state.month == month else 0.0
+    return {"limit": state.monthly_limit, "spent": spent, "month": month}
+
+
+async def _announce(db: AsyncSession, user_id, state):
+    level = alert_level(state.spent, state.monthly_limit)
+    if level == state.alerted_threshold:
+        return
+
+    await db.execute(
+        update(BudgetState)
+        .where(BudgetState.user_id == user_id)
+        .values(alerted_threshold=level)
+    )
+
+    events = db.info.setdefault(PENDING_EVENTS, [])
+    events.extend(
+        (
+            channel(user_id),
+            {
+                "type": "budget_threshold",
+                "threshold": threshold,
+                "limit": state.monthly_limit,
+                "spent": state.spent,
+                "month": state.month.isoformat(),
+            },
+        )
+        for threshold in sorted(settings.BUDGET_ALERT_THRESHOLDS)
+        if state.alerted_threshold < threshold <= level
+    )
+
+
+async def apply_expenses(db: AsyncSession, user, rows):
+    """
+    rows: dicts with keys {amount, created_at} of the user's new expenses
+    """
+    tz = user_zone(user)
+    month = month_start(local_today(tz))
+    current = [row for row in rows if month_start(local_day(row["created_at"], tz)) == month]
+    if not current:
+        return
+
+    delta = sum(row["amount"] for row in current)
+    same_month = BudgetState.month == month
+
+    stmt = insert(BudgetState).values(
+        user_id=user.id, month=month, spent=_month_spend(user.id, month), alerted_threshold=0
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BudgetState.user_id],
+        set_={
+            # First write of a new month: start from the rollup, which
+            # already includes these rows.
+            "spent": case((same_month, BudgetState.spent + delta), else_=_month_spend(user.id, month)),
+            "alerted_threshold": case((same_month, BudgetState.alerted_threshold), else_=0),
+            "month": month,
+        },
+    ).returning(*_RETURNING)
+
+    state = (await db.execute(stmt)).one()
+    await _announce(db, user.id, state)
+
+
+async def set_limit(db: AsyncSession, user, monthly_limit: float):
+    month = month_start(local_today(user_zone(user)))
+
+    stmt = insert(BudgetState).values(
+        user_id=user.id,
+        monthly_limit=monthly_limit,
+        month=month,
+        spent=_month_spend(user.id, month),
+        alerted_threshold=0,
+    )
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BudgetState.user_id],
+        set_={
+            "monthly_limit": monthly_limit,
+            "spent": stmt.excluded.spent,
+            "alerted_threshold": case(
+                (BudgetState.month == month, BudgetState.alerted_threshold), else_=0
+            ),
+            "month": month,
+        },
+    ).returning(*_RETURNING)
+
+    state = (await db.execute(stmt)).one()
+    await _announce(db, user.id, state)
+
+
+async def publish_pending(db: AsyncSession):
+    for event_channel, message in db.info.pop(PENDING_EVENTS, []):
+        await broker.publish(event_channel, message)
+
+
+async def current_state(db: AsyncSession, user_id):
+    return await db.get(BudgetState, user_id)
+
+
+async def rebuild_states(db: AsyncSession, user_id=None):
+    """
+    Recompute every user's state (or one user's) from the latest budget and
+    the monthly rollups. Thresholds already reached are marked as announced.
+    The caller owns the transaction.
+    """
+    latest = (
+        select(Budget.user_id, Budget.monthly_limit)
+        .distinct(Budget.user_id)
+        .order_by(Budget.user_id, Budget.created_at.desc())
+        .subquery()
+    )
+    month = cast(func.date_trunc("month", func.timezone(User.timezone, func.now())), Date)
+
+    query = (
+        select(
+            User.id,
+            latest.c.monthly_limit,
+            month.label("month"),
+            func.coalesce(func.sum(MonthlySpend.total), 0.0).label("spent"),
+        )
+        .select_from(User)
+        .outerjoin(latest, latest.c.user_id == User.id)
+        .outerjoin(MonthlySpend, and_(MonthlySpend.user_id == User.id, MonthlySpend.month == month))
+        .group_by(User.id, latest.c.monthly_limit)
+    )
+    if user_id is not None:
+        query = query.where(User.id == user_id)
+
+    stmt = insert(BudgetState).from_select(["user_id", "monthly_limit", "month", "spent"], query)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[BudgetState.user_id],
+        set_={
+            "monthly_limit": stmt.excluded.monthly_limit,
+            "month": stmt.excluded.month,
+            "spent": stmt.excluded.spent,
+        },
+    )
+    await db.execute(stmt)
+
+    reset = update(BudgetState).values(
+        alerted_threshold=_alert_level_sql(BudgetState.spent, BudgetState.monthly_limit)
+    )
+    if user_id is not None:
+        reset = reset.where(BudgetState.user_id == user_id)
+    await db.execute(reset)
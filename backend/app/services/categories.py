@@ -0,0 +1,112 @@
+"""
+Category names at the API edge, integer ids in storage.
+
+Expenses, rollups and anomaly statistics store categories.id. A name
+resolves to the shared category of that name (seeded by init-db, see
+app/db/categories.py) or else to the user's own category, created on first
+use. Categories are never renamed or deleted, so resolved ids stay valid and
+are cached in process (up to CACHE_SIZE names).
+
+New categories are inserted in the caller's transaction. Their ids are kept
+on the session (db.info) until write_hooks.after_commit calls `publish`, so
+a rolled-back write never leaves a cached id without a row.
+"""
+from collections import OrderedDict
+
+from sqlalchemy import or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.category import Category
+
+CACHE_SIZE = 100_000
+
+PENDING_IDS = "category_ids"
+
+# (user_id, name) -> id; user_id is None for shared categories
+_ids: OrderedDict = OrderedDict()
+
+
+def _remember(user_id, name, category_id):
+    _ids[(user_id, name)] = category_id
+    if len(_ids) > CACHE_SIZE:
+        _ids.popitem(last=False)
+
+
+def _cached(db: AsyncSession, user_id, name) -> int | None:
+    for key in ((None, name), (user_id, name)):
+        if key in _ids:
+            _ids.move_to_end(key)
+            return _ids[key]
+    return db.info.get(PENDING_IDS, {}).get((user_id, name))
+
+
+async def _load(db: AsyncSession, user_id, names):
+    pending = db.info.get(PENDING_IDS, {})
+    result = await db.execute(
+        select(Category.id, Category.user_id, Category.name)
+        .where(Category.name.in_(names))
+        .where(or_(Category.user_id.is_(None), Category.user_id == user_id))
+    )
+    for row in result.all():
+        # Rows this transaction created are not committed yet.
+        if (row.user_id, row.name) not in pending:
+            _remember(row.user_id, row.name, row.id)
+
+
+async def _create(db: AsyncSession, user_id, names):
+    stmt = insert(Category).values([{"user_id": user_id, "name": name} for name in sorted(names)])
+    result = await db.execute(
+        stmt.on_conflict_do_nothing(
+            index_elements=[Category.user_id, Category.name],
+            index_where=Category.user_id.is_not(None),
+        ).returning(Category.id, Category.name)
+    )
+
+    pending = db.info.setdefault(PENDING_IDS, {})
+    for row in result.all():
+        pending[(user_id, row.name)] = row.id
+
+
+async def resolve(db: AsyncSession, user_id, names, create=True) -> dict[str, int]:
+    """
+    {name: category id} for `names` as seen by the user. With `create`,
+    names without a category get a new custom one; otherwise they are
+    left out.
+    """
+    names = set(names)
+    missing = [name for name in names if _cached(db, user_id, name) is None]
+
+    if missing:
+        await _load(db, user_id, missing)
+        missing = [name for name in missing if _cached(db, user_id, name) is None]
+    if missing and create:
+        await _create(db, user_id, missing)
+        # Names another transaction created first
+        missing = [name for name in missing if _cached(db, user_id, name) is None]
+        if missing:
+            await _load(db, user_id, missing)
+
+    return {name: category_id for name in names if (category_id := _cached(db, user_id, name)) is not None}
+
+
+async def find(db: AsyncSession, user_id, name: str) -> int | None:
+    return (await resolve(db, user_id, [name], create=False)).get(name)
+
+
+async def assign_ids(db: AsyncSession, user_id, rows: list[dict]):
+    """
+    rows: expense dicts about to be inserted; sets "category_id" from
+    "category" (the name)
+    """
+    ids = await resolve(db, user_id, {row["category"] for row in rows})
+    for row in rows:
+        row["category_id"] = ids[row["category"]]
+
+
+def publish(db: AsyncSession):
+    """
+    Cache the ids of the categories created in `db`'s committed transaction.
+    """
+    for (user_id, name), category_id in db.info.pop(PENDING_IDS, {}).items():
+        _remember(user_id, name, category_id)
@@ -0,0 +1,103 @@
+"""
+Dashboard summary in one round trip.
+
+Every figure is a scalar subquery over the rollups or an index-ordered
+LIMIT 1 lookup, so the query never hydrates ORM objects and its cost does
+not depend on how many expenses the user has.
+"""
+from sqlalchemy import JSON, func, select, text
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.models.budget import Budget
+from app.models.category import Category
+from app.models.expense import Expense
+from app.models.rollup import MonthlySpend
+from app.core.time_buckets import local_today, month_start
+
+TOP_CATEGORIES = 5
+
+
+def _summary_query(user_id, month, top_n):
+    spend = select(MonthlySpend).where(MonthlySpend.user_id == user_id).subquery()
+
+    top = (
+        select(spend.c.category_id, func.sum(spend.c.total).label("total"))
+        .group_by(spend.c.category_id)
+        .order_by(func.sum(spend.c.total).desc())
+        .limit(top_n)
+        .subquery()
+    )
+
+    return select(
+        select(func.coalesce(func.sum(spend.c.total), 0)).scalar_subquery().label("total"),
+        select(func.coalesce(func.sum(spend.c.count), 0)).scalar_subquery().label("count"),
+        select(func.coalesce(func.sum(spend.c.total), 0))
+        .where(spend.c.month == month)
+        .scalar_subquery()
+        .label("month_total"),
+        select(
+            func.json_build_object(
+                "amount", Expense.amount,
+                "category", Category.name,
+                "created_at", Expense.created_at,
+                type_=JSON,
+            )
+        )
+        .join_from(Expense, Category, Expense.category_id == Category.id)
+        .where(Expense.user_id == user_id)
+        .order_by(Expense.created_at.desc(), Expense.id.desc())
+        .limit(1)
+        .scalar_subquery()
+        .label("latest"),
+        select(
+            func.coalesce(
+                func.json_agg(
+                    aggregate_order_by(
+                        func.json_build_object("category", Category.name, "total", top.c.total),
+                        top.c.total.desc(),
+                    ),
+                    type_=JSON,
+                ),
+                text("'[]'::json"),
+            )
+        )
+        .join_from(top, Category, top.c.category_id == Category.id)
+        .scalar_subquery()
+        .label("top_categories"),
+        select(Budget.monthly_limit)
+        .where(Budget.user_id == user_id)
+        .order_by(Budget.created_at.desc())
+        .limit(1)
+        .scalar_subquery()
+        .label("budget_limit"),
+    )
+
+
+async def dashboard_summary(db: AsyncSession, user_id, tz, top_n=TOP_CATEGORIES):
+    today = local_today(tz)
+    result = await db.execute(_summary_query(user_id, month_start(today), top_n))
+    row = result.one()
+
+    latest = row.latest or {}
+
+    if row.budget_limit is None:
+        budget = {"alert": "No budget set"}
+    else:
+        budget = {
+            "alert": "Over budget" if row.month_total > row.budget_limit else "Within budget",
+            "limit": row.budget_limit,
+            "spent": row.month_total,
+        }
+
+    return {
+        "total_expenses": row.total,
+        "expense_count": row.count,
+        "latest_expense": latest.get("amount", 0),
+        "latest_expense_category": latest.get("category"),
+        "latest_expense_at": latest.get("created_at"),
+        "current_month": today.strftime("%B"),
+        "current_month_total": row.month_total,
+        "top_categories": row.top_categories,
+        "budget": budget,
+    }
@@ -0,0 +1,62 @@
+"""
+Streaming exports over a server-side cursor.
+
+Rows are fetched `CHUNK_ROWS` at a time and each chunk is encoded and
+yielded before the next one is fetched, so memory stays bounded no matter
+how many rows the query returns.
+"""
+import csv
+import io
+import json
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.time_buckets import local_day
+
+CHUNK_ROWS = 1000
+
+EXPORT_FORMATS = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+}
+
+
+def _record(row, tz) -> dict:
+    return {
+        "amount": row.amount,
+        "category": row.category,
+        "date": local_day(row.created_at, tz).isoformat(),
+    }
+
+
+def _ndjson_chunk(rows, tz) -> str:
+    return "".join(json.dumps(_record(row, tz)) + "\n" for row in rows)
+
+
+def _csv_chunk(rows, tz, header=False) -> str:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=["amount", "category", "date"])
+    if header:
+        writer.writeheader()
+    writer.writerows(_record(row, tz) for row in rows)
+    return buffer.getvalue()
+
+
+async def stream_dataset(db: AsyncSession, query, export_format: str, tz):
+    """
+    query: select of (amount, category, created_at)
+    export_format: one of EXPORT_FORMATS
+    tz: the user's timezone, for the date column
+    """
+    result = await db.stream(query.execution_options(yield_per=CHUNK_ROWS))
+
+    if export_format == "csv":
+        first = True
+        async for rows in result.partitions():
+            yield _csv_chunk(rows, tz, header=first)
+            first = False
+        if first:
+            yield _csv_chunk([], tz, header=True)
+    else:
+        async for rows in result.partitions():
+            yield _ndjson_chunk(rows, tz)
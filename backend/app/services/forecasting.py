@@ -0,0 +1,220 @@
+"""
+Monthly spend forecasts.
+
+`precompute_forecasts` fits every user whose data changed in one vectorized
+pass and stores the results in the `forecasts` table, which the API reads
+with a primary-key lookup (`stored_forecast`). Users without a fresh row
+fall back to `monthly_forecast`, computed on demand from the monthly
+rollups and cached per user and data version (see app/core/cache.py).
+"""
+import asyncio
+import logging
+from collections import OrderedDict
+from time import perf_counter
+
+from sqlalchemy import func, or_, select, update
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.ml.forecast import MIN_EXPENSES, forecast_batch, forecast_from_totals
+from app.models.forecast import Forecast
+from app.models.rollup import MonthlySpend
+
+CACHE_SIZE = 10_000
+
+# Users fitted per vectorized batch, and rows per upsert statement.
+BATCH_USERS = 10_000
+WRITE_BATCH_SIZE = 1000
+
+logger = logging.getLogger(__name__)
+
+_cache: OrderedDict = OrderedDict()
+
+
+async def monthly_totals(db: AsyncSession, user_id):
+    """
+    Returns ([monthly totals in chronological order], number of expenses).
+    """
+    result = await db.execute(
+        select(
+            MonthlySpend.month,
+            func.sum(MonthlySpend.total).label("total"),
+            func.sum(MonthlySpend.count).label("count"),
+        )
+        .where(MonthlySpend.user_id == user_id)
+        .group_by(MonthlySpend.month)
+        .order_by(MonthlySpend.month)
+    )
+    rows = result.all()
+
+    return [row.total for row in rows], sum(row.count for row in rows)
+
+
+async def monthly_forecast(db: AsyncSession, user_id, version):
+    key = (user_id, version)
+    if key in _cache:
+        _cache.move_to_end(key)
+        return _cache[key]
+
+    totals, expense_count = await monthly_totals(db, user_id)
+    prediction = forecast_from_totals(totals) if expense_count >= MIN_EXPENSES else None
+
+    _cache[key] = prediction
+    if len(_cache) > CACHE_SIZE:
+        _cache.popitem(last=False)
+
+    return prediction
+
+
+async def mark_stale(db: AsyncSession, user_ids=None):
+    """
+    Flag the users' stored forecasts as out of date (all rows when
+    user_ids is None). Runs in the caller's transaction.
+    """
+    if user_ids is None:
+        await db.execute(update(Forecast).values(stale=True, version=Forecast.version + 1))
+        return
+
+    # Sorted keys give concurrent writers a consistent lock order.
+    stmt = insert(Forecast).values([{"user_id": user_id} for user_id in sorted(user_ids)])
+    await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[Forecast.user_id],
+            set_={"stale": True, "version": Forecast.version + 1},
+        )
+    )
+
+
+async def stored_forecast(db: AsyncSession, user_id):
+    """
+    Returns (True, prediction) from a fresh precomputed row, else (False, None).
+    """
+    result = await db.execute(
+        select(Forecast.prediction, Forecast.stale).where(Forecast.user_id == user_id)
+    )
+    row = result.first()
+    if row is None or row.stale:
+        return False, None
+    return True, row.prediction
+
+
+def _totals_query(full: bool):
+    totals = (
+        select(
+            MonthlySpend.user_id,
+            MonthlySpend.month,
+            func.sum(MonthlySpend.total).label("total"),
+            func.sum(MonthlySpend.count).label("count"),
+        )
+        .group_by(MonthlySpend.user_id, MonthlySpend.month)
+        .subquery()
+    )
+
+    query = (
+        select(
+            totals.c.user_id,
+            totals.c.total,
+            totals.c.count,
+            func.coalesce(Forecast.version, 0).label("version"),
+        )
+        .outerjoin(Forecast, Forecast.user_id == totals.c.user_id)
+        .order_by(totals.c.user_id, totals.c.month)
+    )
+    if not full:
+        query = query.where(or_(Forecast.user_id.is_(None), Forecast.stale))
+
+    return query
+
+
+async def _write_batch(db: AsyncSession, users: list):
+    """
+    users: [(user_id, version, [monthly totals], expense count)]
+    """
+    import numpy as np
+
+    lengths = [len(totals) for _, _, totals, _ in users]
+    matrix = np.zeros((len(users), max(lengths)))
+    for row, (_, _, totals, _) in enumerate(users):
+        matrix[row, :len(totals)] = totals
+
+    predictions = forecast_batch(matrix, lengths)
+
+    values = [
+        {
+            "user_id": user_id,
+            "prediction": float(prediction) if expense_count >= MIN_EXPENSES else None,
+            "months": len(totals),
+            "expense_count": expense_count,
+            "computed_at": func.now(),
+            "stale": False,
+            "version": version,
+        }
+        for (user_id, version, totals, expense_count), prediction in zip(users, predictions)
+    ]
+
+    for start in range(0, len(values), WRITE_BATCH_SIZE):
+        stmt = insert(Forecast).values(values[start:start + WRITE_BATCH_SIZE])
+        await db.execute(
+            stmt.on_conflict_do_update(
+                index_elements=[Forecast.user_id],
+                set_={
+                    "prediction": stmt.excluded.prediction,
+                    "months": stmt.excluded.months,
+                    "expense_count": stmt.excluded.expense_count,
+                    "computed_at": stmt.excluded.computed_at,
+                    "stale": False,
+                },
+                # A write since the totals were read bumped the version;
+                # leave that user stale for the next run.
+                where=Forecast.version == stmt.excluded.version,
+            )
+        )
+
+
+async def precompute_forecasts(full=False, batch_users=BATCH_USERS):
+    """
+    Fit and store forecasts for users with stale or missing rows, or for
+    every user with `full`. Monthly totals for all of them come from one
+    streamed query. Returns (users, seconds).
+    """
+    start = perf_counter()
+    written = 0
+    batch = []
+    current = None
+
+    async with AsyncSessionLocal() as reader, AsyncSessionLocal() as writer:
+        result = await reader.stream(_totals_query(full).execution_options(yield_per=batch_users))
+
+        async for row in result:
+            if current is None or current[0] != row.user_id:
+                if len(batch) == batch_users:
+                    await _write_batch(writer, batch)
+                    await writer.commit()
+                    written += len(batch)
+                    batch = []
+
+                current = [row.user_id, row.version, [], 0]
+                batch.append(current)
+
+            current[2].append(row.total)
+            current[3] += row.count
+
+        if batch:
+            await _write_batch(writer, batch)
+            await writer.commit()
+            written += len(batch)
+
+    return written, perf_counter() - start
+
+
+async def refresh_forecasts_forever():
+    while True:
+        await asyncio.sleep(settings.FORECAST_REFRESH_SECONDS)
+        try:
+            users, seconds = await precompute_forecasts()
+            if users:
+                logger.info("Forecasts refreshed | users=%s | seconds=%.2f", users, seconds)
+        except Exception:
+            logger.exception("Forecast refresh failed")
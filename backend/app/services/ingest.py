@@ -0,0 +1,176 @@
+"""
+Bulk expense ingestion.
+
+Records are validated `CHUNK_ROWS` at a time and each valid chunk is written
+with a single COPY (asyncpg) or a batched multi-row INSERT, together with the
+write hooks, inside the caller's transaction.
+"""
+import codecs
+import csv
+import uuid
+from datetime import datetime, timezone
+
+from pydantic import ValidationError
+from sqlalchemy import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.exceptions import AppException
+from app.models.expense import Expense
+from app.schemas.expense import ExpenseImport
+from app.services.write_hooks import on_expenses_created
+
+CHUNK_ROWS = 5000
+MAX_ROWS = 500_000
+
+COPY_COLUMNS = (
+    "id", "user_id", "amount", "category_id", "description", "created_at",
+    "is_anomaly", "anomaly_score",
+)
+
+
+async def json_records(records):
+    for record in records:
+        yield record
+
+
+async def _lines(chunks):
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    pending = ""
+
+    async for chunk in chunks:
+        pending += decoder.decode(chunk)
+        *lines, pending = pending.split("\n")
+        for line in lines:
+            yield line
+
+    pending += decoder.decode(b"", final=True)
+    if pending:
+        yield pending
+
+
+async def csv_records(chunks):
+    """
+    Parse a streamed CSV body with a header row into dicts.
+    Quoted fields may not span lines.
+    """
+    header = None
+
+    async for line in _lines(chunks):
+        if not line.strip():
+            continue
+
+        values = next(csv.reader([line]))
+        if header is None:
+            header = [name.strip().lower() for name in values]
+            continue
+
+        yield {name: value.strip() or None for name, value in zip(header, values)}
+
+
+def _created_at(value: datetime | None, now: datetime) -> datetime:
+    if value is None:
+        return now
+    # Naive values are UTC; stored aware, like create_expense.
+    if value.tzinfo is None:
+        return value.replace(tzinfo=timezone.utc)
+    return value.astimezone(timezone.utc)
+
+
+def validate_chunk(user_id, records, first_row: int):
+    rows = []
+    errors = []
+    now = datetime.now(timezone.utc)
+
+    for number, record in enumerate(records, start=first_row):
+        try:
+            expense = ExpenseImport.model_validate(record)
+        except ValidationError as exc:
+            errors.append({
+                "row": number,
+                "errors": [
+                    {"field": ".".join(str(part) for part in error["loc"]), "message": error["msg"]}
+                    for error in exc.errors()
+                ],
+            })
+            continue
+
+        rows.append({
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "amount": expense.amount,
+            "category": expense.category,
+            "description": expense.description,
+            "created_at": _created_at(expense.created_at, now),
+        })
+
+    return rows, errors
+
+
+async def _copy_connection(db: AsyncSession):
+    """
+    The raw asyncpg connection, if COPY can run inside the current transaction.
+    """
+    if db.bind.dialect.driver != "asyncpg":
+        return None
+
+    connection = await db.connection()
+    raw = await connection.get_raw_connection()
+    driver_connection = raw.driver_connection
+
+    return driver_connection if driver_connection.is_in_transaction() else None
+
+
+async def write_rows(db: AsyncSession, user, rows: list[dict]):
+    if not rows:
+        return
+
+    await on_expenses_created(db, user, rows)
+
+    copy_connection = await _copy_connection(db)
+    if copy_connection is not None:
+        await copy_connection.copy_records_to_table(
+            Expense.__tablename__,
+            records=[tuple(row[column] for column in COPY_COLUMNS) for row in rows],
+            columns=COPY_COLUMNS,
+        )
+    else:
+        # Rows also carry the category name, which is not a column.
+        await db.execute(insert(Expense), [{column: row[column] for column in COPY_COLUMNS} for row in rows])
+
+
+async def ingest(db: AsyncSession, user, records) -> dict:
+    """
+    records: async iterator of raw dicts (see json_records / csv_records)
+    Row numbers in the report are 1-based positions in the input.
+    """
+    inserted = 0
+    errors = []
+    chunk = []
+    seen = 0
+
+    async def flush():
+        nonlocal inserted
+        rows, chunk_errors = validate_chunk(user.id, chunk, seen - len(chunk) + 1)
+        await write_rows(db, user, rows)
+        inserted += len(rows)
+        errors.extend(chunk_errors)
+        chunk.clear()
+
+    async for record in records:
+        seen += 1
+        if seen > MAX_ROWS:
+            raise AppException(f"At most {MAX_ROWS} rows per import", status_code=413)
+
+        chunk.append(record)
+        if len(chunk) == CHUNK_ROWS:
+            await flush()
+
+    if chunk:
+        await flush()
+
+    return {
+        "success": not errors,
+        "inserted": inserted,
+        "failed": len(errors),
+        "errors": errors,
+    }
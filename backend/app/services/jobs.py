@@ -0,0 +1,218 @@
+"""
+Background jobs for CPU-heavy analytics.
+
+    job = await jobs.submit(user, "forecast")    # returns at once
+    job = jobs.get(job_id, user.id)
+    await jobs.wait(job, timeout=5)
+
+A job loads its inputs with its own session and runs the computation in a
+bounded ProcessPoolExecutor, so the event loop never runs model code.
+Jobs are keyed by (user, kind, data version): submitting again while the
+data is unchanged returns the same job, finished or not, and any committed
+write starts a fresh one. Finished jobs are kept for JOB_RESULT_TTL_SECONDS.
+
+Submissions beyond JOB_MAX_PER_USER active jobs for one user, or
+JOB_WORKERS + JOB_MAX_QUEUE active jobs overall, are rejected with 429.
+Jobs live in the worker process that accepted them, so with several
+workers clients must poll the same worker (sticky sessions).
+"""
+import asyncio
+import multiprocessing
+import uuid
+from collections import Counter, OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from time import monotonic
+from typing import Any, Callable
+
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.cache import data_version
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.core.exceptions import AppException
+from app.core.time_buckets import local_day, user_zone
+from app.ml.anomaly import anomalies_by_category
+from app.ml.forecast import MIN_EXPENSES, forecast_from_totals
+from app.models.category import Category
+from app.models.expense import Expense
+from app.services import snapshots
+from app.services.forecasting import monthly_totals
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+async def _forecast_inputs(db: AsyncSession, user):
+    totals, expense_count = await monthly_totals(db, user.id)
+    return (totals,) if expense_count >= MIN_EXPENSES else None
+
+
+async def _anomaly_inputs(db: AsyncSession, user):
+    tz = user_zone(user)
+    result = await db.execute(
+        select(Expense.amount, Category.name.label("category"), Expense.created_at)
+        .join_from(Expense, Category, Expense.category_id == Category.id)
+        .where(Expense.user_id == user.id)
+        .order_by(Expense.created_at)
+    )
+    rows = result.all()
+    return (
+        [row.amount for row in rows],
+        [row.category for row in rows],
+        [local_day(row.created_at, tz).isoformat() for row in rows],
+    )
+
+
+async def _snapshot_anomaly_inputs(db: AsyncSession, user):
+    # The snapshot pickles as its file location; the job process maps it.
+    snapshot = await snapshots.load(db, user.id)
+    return (snapshot, user_zone(user).key) if len(snapshot) else None
+
+
+@dataclass(frozen=True)
+class JobKind:
+    # async (db, user) -> positional arguments for `compute`, or None when
+    # there is nothing to compute
+    load: Callable
+    # module-level function, pickled to the worker process
+    compute: Callable
+    # result when `load` returns None
+    empty: Any = None
+
+
+JOB_KINDS = {
+    "forecast": JobKind(_forecast_inputs, forecast_from_totals),
+    "anomalies": (
+        JobKind(_snapshot_anomaly_inputs, snapshots.anomalies, empty=[])
+        if settings.SNAPSHOT_DIR
+        else JobKind(_anomaly_inputs, anomalies_by_category, empty=[])
+    ),
+}
+
+
+@dataclass
+class Job:
+    id: str
+    user_id: Any
+    kind: str
+    version: str
+    status: str = QUEUED
+    result: Any = None
+    error: str | None = None
+    created_at: datetime = field(default_factory=lambda: datetime.now(timezone.utc))
+    finished_at: datetime | None = None
+    task: asyncio.Task | None = None
+    expires: float | None = None
+
+    def describe(self) -> dict:
+        return {
+            "id": self.id,
+            "kind": self.kind,
+            "status": self.status,
+            "result": self.result,
+            "error": self.error,
+            "created_at": self.created_at,
+            "finished_at": self.finished_at,
+        }
+
+
+class JobManager:
+    def __init__(self):
+        self._executor: ProcessPoolExecutor | None = None
+        self._jobs: OrderedDict[str, Job] = OrderedDict()
+        self._by_key: dict[tuple, str] = {}
+        self._active_by_user: Counter = Counter()
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # spawn: forking a process that runs an event loop and logging
+            # threads can deadlock the child.
+            self._executor = ProcessPoolExecutor(
+                max_workers=settings.JOB_WORKERS,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    def _expire(self):
+        now = monotonic()
+        for job_id in [job_id for job_id, job in self._jobs.items() if job.expires and job.expires <= now]:
+            job = self._jobs.pop(job_id)
+            self._by_key.pop((job.user_id, job.kind, job.version), None)
+
+    async def submit(self, user, kind: str) -> Job:
+        self._expire()
+
+        version = await data_version(user.id)
+        key = (user.id, kind, version)
+        if key in self._by_key:
+            return self._jobs[self._by_key[key]]
+
+        if self._active_by_user[user.id] >= settings.JOB_MAX_PER_USER:
+            raise AppException(
+                "Too many running jobs, wait for one to finish",
+                status_code=429, headers={"Retry-After": "1"}
+            )
+        if sum(self._active_by_user.values()) >= settings.JOB_WORKERS + settings.JOB_MAX_QUEUE:
+            raise AppException(
+                "Job queue is full, try again later",
+                status_code=429, headers={"Retry-After": "5"}
+            )
+
+        job = Job(id=uuid.uuid4().hex, user_id=user.id, kind=kind, version=version)
+        self._jobs[job.id] = job
+        self._by_key[key] = job.id
+        self._active_by_user[user.id] += 1
+        job.task = asyncio.create_task(self._run(job, user))
+        return job
+
+    async def _run(self, job: Job, user):
+        spec = JOB_KINDS[job.kind]
+        try:
+            async with AsyncSessionLocal() as db:
+                args = await spec.load(db, user)
+
+            job.status = RUNNING
+            if args is None:
+                job.result = spec.empty
+            else:
+                loop = asyncio.get_running_loop()
+                job.result = await loop.run_in_executor(self._pool(), spec.compute, *args)
+            job.status = DONE
+        except Exception as exc:
+            job.status = FAILED
+            job.error = f"{type(exc).__name__}: {exc}"
+            # A failed job is not a cached result; let the next submit retry.
+            self._by_key.pop((job.user_id, job.kind, job.version), None)
+        finally:
+            job.finished_at = datetime.now(timezone.utc)
+            job.expires = monotonic() + settings.JOB_RESULT_TTL_SECONDS
+            self._active_by_user[job.user_id] -= 1
+            if not self._active_by_user[job.user_id]:
+                del self._active_by_user[job.user_id]
+
+    def get(self, job_id: str, user_id) -> Job:
+        self._expire()
+        job = self._jobs.get(job_id)
+        if job is None or job.user_id != user_id:
+            raise AppException("Job not found", status_code=404)
+        return job
+
+    async def wait(self, job: Job, timeout: float):
+        if job.task is not None and not job.task.done():
+            try:
+                await asyncio.wait_for(asyncio.shield(job.task), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+jobs = JobManager()
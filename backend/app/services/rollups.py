@@ -0,0 +1,175 @@
+"""
+Per-user spend rollups keyed by (user_id, day, category_id) and
+(user_id, month, category_id).
+
+`apply_expenses` must run in the same transaction as the expense insert so
+the rollups never drift from the raw table. `rebuild_rollups` and
+`check_rollups` back the `python -m app.cli` maintenance commands.
+
+Days and months follow the user's own calendar (User.timezone); rebuild a
+user's rollups after changing their timezone.
+"""
+from collections import defaultdict
+
+from sqlalchemy import Date, and_, cast, delete, func, or_, select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.time_buckets import local_day, month_start
+from app.models.expense import Expense
+from app.models.rollup import DailySpend, MonthlySpend
+from app.models.user import User
+
+# Rows per multi-row upsert; keeps us well under the 32767 bind-parameter limit.
+UPSERT_BATCH_SIZE = 1000
+
+# Float sums are order dependent, so allow a little slack when comparing.
+TOTAL_TOLERANCE = 1e-6
+
+
+def _group(rows, tz):
+    daily = defaultdict(lambda: [0.0, 0])
+    monthly = defaultdict(lambda: [0.0, 0])
+
+    for row in rows:
+        day = local_day(row["created_at"], tz)
+
+        for groups, period in ((daily, day), (monthly, month_start(day))):
+            bucket = groups[(row["user_id"], period, row["category_id"])]
+            bucket[0] += row["amount"]
+            bucket[1] += 1
+
+    return daily, monthly
+
+
+async def _upsert(db: AsyncSession, model, period: str, groups: dict):
+    # Sorted keys give concurrent writers a consistent lock order.
+    values = [
+        {
+            "user_id": user_id,
+            period: period_value,
+            "category_id": category_id,
+            "total": total,
+            "count": count,
+        }
+        for (user_id, period_value, category_id), (total, count) in sorted(groups.items())
+    ]
+
+    for start in range(0, len(values), UPSERT_BATCH_SIZE):
+        stmt = insert(model).values(values[start:start + UPSERT_BATCH_SIZE])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[model.user_id, getattr(model, period), model.category_id],
+            set_={
+                "total": model.total + stmt.excluded.total,
+                "count": model.count + stmt.excluded.count,
+            },
+        )
+        await db.execute(stmt)
+
+
+async def apply_expenses(db: AsyncSession, rows, tz):
+    """
+    rows: iterable of dicts with keys {user_id, amount, category_id, created_at}
+    tz: the owning user's timezone
+    """
+    daily, monthly = _group(rows, tz)
+
+    await _upsert(db, DailySpend, "day", daily)
+    await _upsert(db, MonthlySpend, "month", monthly)
+
+
+def _periods():
+    created_at = func.timezone(User.timezone, Expense.created_at)
+
+    return (
+        (DailySpend, DailySpend.day, func.date(created_at)),
+        (MonthlySpend, MonthlySpend.month, cast(func.date_trunc("month", created_at), Date)),
+    )
+
+
+def _raw_totals(period_expr, user_id=None):
+    query = select(
+        Expense.user_id,
+        period_expr.label("period"),
+        Expense.category_id,
+        func.sum(Expense.amount).label("total"),
+        func.count().label("count"),
+    ).join(User, User.id == Expense.user_id)
+
+    if user_id is not None:
+        query = query.where(Expense.user_id == user_id)
+
+    return query.group_by(Expense.user_id, period_expr, Expense.category_id)
+
+
+async def rebuild_rollups(db: AsyncSession, user_id=None):
+    """
+    Recompute the rollups from the raw expenses table, for one user or all.
+    The caller owns the transaction.
+    """
+    for model, period_column, period_expr in _periods():
+        stmt = delete(model)
+        if user_id is not None:
+            stmt = stmt.where(model.user_id == user_id)
+        await db.execute(stmt)
+
+        await db.execute(
+            insert(model).from_select(
+                ["user_id", period_column.key, "category_id", "total", "count"],
+                _raw_totals(period_expr, user_id),
+            )
+        )
+
+
+async def check_rollups(db: AsyncSession, user_id=None):
+    """
+    Compare the rollups against the raw expenses table.
+    Returns a list of mismatching (table, user_id, period, category_id) rows.
+    """
+    mismatches = []
+
+    for model, period_column, period_expr in _periods():
+        raw = _raw_totals(period_expr, user_id).subquery()
+
+        stored = select(model)
+        if user_id is not None:
+            stored = stored.where(model.user_id == user_id)
+        stored = stored.subquery()
+
+        result = await db.execute(
+            select(
+                func.coalesce(raw.c.user_id, stored.c.user_id).label("user_id"),
+                func.coalesce(raw.c.period, stored.c[period_column.key]).label("period"),
+                func.coalesce(raw.c.category_id, stored.c.category_id).label("category_id"),
+                raw.c.total.label("raw_total"),
+                raw.c.count.label("raw_count"),
+                stored.c.total.label("rollup_total"),
+                stored.c.count.label("rollup_count"),
+            )
+            .select_from(
+                raw.outerjoin(
+                    stored,
+                    and_(
+                        raw.c.user_id == stored.c.user_id,
+                        raw.c.period == stored.c[period_column.key],
+                        raw.c.category_id == stored.c.category_id,
+                    ),
+                    full=True,
+                )
+            )
+            .where(
+                or_(
+                    raw.c.count.is_distinct_from(stored.c.count),
+                    func.abs(
+                        func.coalesce(raw.c.total, 0) - func.coalesce(stored.c.total, 0)
+                    ) > TOTAL_TOLERANCE,
+                )
+            )
+        )
+
+        mismatches.extend(
+            {"table": model.__tablename__, **row._asdict()}
+            for row in result.all()
+        )
+
+    return mismatches
@@ -0,0 +1,491 @@
+"""
+Per-user columnar expense snapshots in memory-mapped files.
+
+With SNAPSHOT_DIR set, each user's expenses are kept under
+SNAPSHOT_DIR/<user_id>/<generation>/ as three flat little-endian arrays,
+one element per expense:
+
+    created_at  int64    microseconds since the epoch, UTC
+    amount      float64
+    category    int16    index into meta.json "categories"
+
+`load` maps them with numpy.memmap, so the ML code reads the page cache in
+place: no ORM objects, no per-row Python values, no copy.
+
+Freshness: Forecast.version is bumped in every transaction that writes
+expenses (forecasting.mark_stale), which makes it a durable per-user write
+counter. meta.json records the version the arrays reflect. Writes `stage`
+their rows and `publish` appends them after commit when the snapshot is
+exactly that transaction behind; otherwise nothing is appended, and the
+next `load` sees an older version than the database and rebuilds.
+
+Rows appended out of time order leave an unsorted tail that `ordered`
+sorts on read until `compact` (python -m app.cli compact-snapshots)
+rewrites the arrays. Rebuilds and compactions write a new generation and
+switch meta.json atomically; retired generations are deleted after
+RETIRED_SECONDS, so readers that already hold a meta.json (including job
+processes) keep a consistent view. A lock file (flock, or msvcrt.locking
+on Windows) serializes writers across worker processes.
+"""
+import asyncio
+import json
+import os
+import shutil
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass
+from pathlib import Path
+
+from sqlalchemy import BigInteger, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.core.responses import FastJSONResponse
+from app.core.time_buckets import Period, epoch_micros, local_days
+from app.ml.anomaly import category_anomalies
+from app.models.category import Category
+from app.models.expense import Expense
+from app.models.forecast import Forecast
+
+COLUMNS = {"created_at": "<i8", "amount": "<f8", "category": "<i2"}
+MAX_CATEGORIES = 2 ** 15
+
+PENDING_ROWS = "snapshot_rows"
+RETIRED_SECONDS = 300
+BUILD_CHUNK_ROWS = 10_000
+
+
+class SnapshotError(RuntimeError):
+    pass
+
+
+@dataclass(frozen=True)
+class Snapshot:
+    created_at: "np.ndarray"
+    amount: "np.ndarray"
+    category: "np.ndarray"
+    categories: list[str]
+    version: int
+    sorted_rows: int
+    # (user directory, meta) when the arrays are mapped from files
+    source: tuple | None = None
+
+    def __reduce_ex__(self, protocol):
+        # Job processes map the same files instead of receiving a copy.
+        if self.source is None:
+            return super().__reduce_ex__(protocol)
+        return _open, self.source
+
+    def __len__(self):
+        return len(self.created_at)
+
+    def ordered(self) -> "Snapshot":
+        """
+        The rows in created_at order; the mapped arrays themselves when
+        there is no unsorted tail.
+        """
+        if self.sorted_rows == len(self):
+            return self
+
+        import numpy as np
+
+        order = np.argsort(self.created_at, kind="stable")
+        return Snapshot(
+            self.created_at[order], self.amount[order], self.category[order],
+            self.categories, self.version, len(self),
+        )
+
+    def between(self, period: Period) -> "Snapshot":
+        """
+        Rows inside `period`, as views; the snapshot must be ordered.
+        """
+        import numpy as np
+
+        start, end = np.searchsorted(
+            self.created_at, [epoch_micros(period.start), epoch_micros(period.end)]
+        )
+        return Snapshot(
+            self.created_at[start:end], self.amount[start:end], self.category[start:end],
+            self.categories, self.version, end - start,
+        )
+
+
+def _user_dir(user_id) -> Path:
+    return Path(settings.SNAPSHOT_DIR) / str(user_id)
+
+
+@contextmanager
+def _locked(user_dir: Path):
+    user_dir.mkdir(parents=True, exist_ok=True)
+    with open(user_dir / "lock", "a+") as lock_file:
+        _lock(lock_file, True)
+        try:
+            yield
+        finally:
+            _lock(lock_file, False)
+
+
+def _lock(lock_file, acquire: bool):
+    # Imported here: the module loads on every platform, snapshots are opt-in.
+    if os.name == "nt":
+        import msvcrt
+
+        lock_file.seek(0)
+        if not acquire:
+            msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+            return
+        while True:
+            try:
+                # LK_LOCK gives up after 10 one-second attempts.
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+                return
+            except OSError:
+                continue
+    else:
+        import fcntl
+
+        fcntl.flock(lock_file, fcntl.LOCK_EX if acquire else fcntl.LOCK_UN)
+
+
+def _read_meta(user_dir: Path) -> dict | None:
+    try:
+        return json.loads((user_dir / "meta.json").read_text())
+    except FileNotFoundError:
+        return None
+
+
+def _write_meta(user_dir: Path, meta: dict):
+    pending = user_dir / "meta.json.tmp"
+    pending.write_text(json.dumps(meta))
+    os.replace(pending, user_dir / "meta.json")
+
+
+def _map(path: Path, dtype: str, rows: int):
+    import numpy as np
+
+    if not rows:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode="r", shape=(rows,))
+
+
+def _open(user_dir, meta: dict) -> Snapshot:
+    generation = Path(user_dir) / meta["generation"]
+    return Snapshot(
+        **{name: _map(generation / name, dtype, meta["rows"]) for name, dtype in COLUMNS.items()},
+        categories=meta["categories"],
+        version=meta["version"],
+        sorted_rows=meta["sorted_rows"],
+        source=(str(user_dir), meta),
+    )
+
+
+def read(user_id) -> Snapshot | None:
+    user_dir = _user_dir(user_id)
+    meta = _read_meta(user_dir)
+    return None if meta is None else _open(user_dir, meta)
+
+
+def _sorted_prefix(created_at) -> int:
+    import numpy as np
+
+    descents = np.flatnonzero(np.diff(created_at) < 0)
+    return int(descents[0]) + 1 if len(descents) else len(created_at)
+
+
+def _encode(names, categories: list[str]):
+    """
+    Category codes for `names`, extending `categories` in place.
+    """
+    import numpy as np
+
+    codes = {name: code for code, name in enumerate(categories)}
+    for name in names:
+        if name not in codes:
+            codes[name] = len(categories)
+            categories.append(name)
+    if len(categories) > MAX_CATEGORIES:
+        raise SnapshotError(f"More than {MAX_CATEGORIES} categories")
+    return np.fromiter((codes[name] for name in names), dtype=COLUMNS["category"], count=len(names))
+
+
+def _retire(user_dir: Path, meta: dict, old: dict | None):
+    """
+    Point meta.json at a new generation and delete generations retired
+    more than RETIRED_SECONDS ago. Call with the lock held.
+    """
+    now = time.time()
+    retired = dict(old.get("retired", {})) if old else {}
+    if old:
+        retired[old["generation"]] = now
+
+    for generation, since in list(retired.items()):
+        if since < now - RETIRED_SECONDS:
+            shutil.rmtree(user_dir / generation, ignore_errors=True)
+            del retired[generation]
+
+    _write_meta(user_dir, {**meta, "retired": retired})
+
+
+def _replace(user_id, version: int, categories: list[str], arrays: dict, expected: dict | None = None):
+    """
+    Write `arrays` as a new generation and make it current, unless the
+    snapshot moved on meanwhile: a newer version, or (with `expected`) any
+    change from that meta. Returns the current snapshot.
+    """
+    import numpy as np
+
+    user_dir = _user_dir(user_id)
+    generation = uuid.uuid4().hex
+    path = user_dir / generation
+    path.mkdir(parents=True)
+    for name, dtype in COLUMNS.items():
+        np.ascontiguousarray(arrays[name], dtype=dtype).tofile(path / name)
+
+    meta = {
+        "generation": generation,
+        "rows": len(arrays["created_at"]),
+        "sorted_rows": _sorted_prefix(arrays["created_at"]),
+        "version": version,
+        "categories": categories,
+    }
+    with _locked(user_dir):
+        old = _read_meta(user_dir)
+        superseded = (
+            old is not None and old["version"] > version
+            if expected is None
+            else old != expected
+        )
+        if superseded:
+            shutil.rmtree(path, ignore_errors=True)
+        else:
+            _retire(user_dir, meta, old)
+        return read(user_id)
+
+
+def append(user_id, base: int, version: int, rows: list[tuple]) -> bool:
+    """
+    rows: (created_at, amount, category) of expenses committed by the
+    transaction that moved the user's version from `base` to `version`.
+    Returns False (and appends nothing) when the snapshot is not at `base`.
+    """
+    import numpy as np
+
+    user_dir = _user_dir(user_id)
+    if _read_meta(user_dir) is None:
+        return False
+
+    with _locked(user_dir):
+        meta = _read_meta(user_dir)
+        if meta is None or meta["version"] != base:
+            return False
+
+        categories = list(meta["categories"])
+        arrays = {
+            "created_at": np.fromiter((epoch_micros(row[0]) for row in rows), dtype="<i8", count=len(rows)),
+            "amount": np.fromiter((row[1] for row in rows), dtype="<f8", count=len(rows)),
+            "category": _encode([row[2] for row in rows], categories),
+        }
+
+        # Write at the recorded length, over anything a crashed append left.
+        generation = user_dir / meta["generation"]
+        for name, values in arrays.items():
+            with open(generation / name, "r+b") as column:
+                column.seek(meta["rows"] * values.itemsize)
+                column.write(values.tobytes())
+                column.truncate()
+
+        sorted_rows = meta["sorted_rows"]
+        if sorted_rows == meta["rows"]:
+            stamps = arrays["created_at"]
+            last = _map(generation / "created_at", COLUMNS["created_at"], meta["rows"])[-1:]
+            if not len(last) or stamps[0] >= last[0]:
+                sorted_rows += _sorted_prefix(stamps)
+
+        _write_meta(user_dir, {
+            **meta,
+            "rows": meta["rows"] + len(rows),
+            "sorted_rows": sorted_rows,
+            "version": version,
+            "categories": categories,
+        })
+        return True
+
+
+async def _database_version(db: AsyncSession, user_id) -> int:
+    version = await db.scalar(select(Forecast.version).where(Forecast.user_id == user_id))
+    return version or 0
+
+
+async def _build(db: AsyncSession, user_id) -> Snapshot:
+    import numpy as np
+
+    # One statement, so the rows and the version come from the same
+    # database snapshot.
+    version = select(
+        func.coalesce(
+            select(Forecast.version).where(Forecast.user_id == user_id).scalar_subquery(), 0
+        ).label("version")
+    ).subquery()
+    query = (
+        select(
+            version.c.version,
+            cast(func.extract("epoch", Expense.created_at) * 1_000_000, BigInteger).label("created_at"),
+            Expense.amount,
+            Category.name.label("category"),
+        )
+        .select_from(version)
+        .outerjoin(Expense, Expense.user_id == user_id)
+        .outerjoin(Category, Category.id == Expense.category_id)
+        .order_by(Expense.created_at)
+        .execution_options(yield_per=BUILD_CHUNK_ROWS)
+    )
+
+    current, stamps, amounts, names = 0, [], [], []
+    result = await db.stream(query)
+    async for rows in result.partitions():
+        for row in rows:
+            current = row.version
+            if row.created_at is not None:
+                stamps.append(row.created_at)
+                amounts.append(row.amount)
+                names.append(row.category)
+
+    categories = []
+    arrays = {
+        "created_at": np.array(stamps, dtype="<i8"),
+        "amount": np.array(amounts, dtype="<f8"),
+        "category": _encode(names, categories),
+    }
+    return await asyncio.to_thread(_replace, user_id, current, categories, arrays)
+
+
+async def load(db: AsyncSession, user_id) -> Snapshot | None:
+    """
+    The user's snapshot, rebuilt first when it is missing or older than
+    what `db` sees. None when SNAPSHOT_DIR is not set.
+    """
+    if not settings.SNAPSHOT_DIR:
+        return None
+
+    snapshot = read(user_id)
+    if snapshot is None or snapshot.version < await _database_version(db, user_id):
+        snapshot = await _build(db, user_id)
+    return snapshot
+
+
+def from_rows(rows) -> Snapshot:
+    """
+    An in-memory snapshot of (amount, category, created_at) rows in
+    created_at order, for when SNAPSHOT_DIR is not set.
+    """
+    import numpy as np
+
+    categories = []
+    return Snapshot(
+        np.fromiter((epoch_micros(row.created_at) for row in rows), dtype="<i8", count=len(rows)),
+        np.fromiter((row.amount for row in rows), dtype="<f8", count=len(rows)),
+        _encode([row.category for row in rows], categories),
+        categories,
+        version=0,
+        sorted_rows=len(rows),
+    )
+
+
+async def stage(db: AsyncSession, user_id, rows: list[dict]):
+    """
+    Queue new expenses for `publish`. Runs in the write transaction after
+    forecasting.mark_stale has bumped the user's version.
+    """
+    if not settings.SNAPSHOT_DIR:
+        return
+
+    version = await _database_version(db, user_id)
+    pending = db.info.setdefault(PENDING_ROWS, {})
+    base, _, staged = pending.get(user_id, (version - 1, None, []))
+    staged.extend((row["created_at"], row["amount"], row["category"]) for row in rows)
+    pending[user_id] = (base, version, staged)
+
+
+async def publish(db: AsyncSession):
+    for user_id, (base, version, rows) in db.info.pop(PENDING_ROWS, {}).items():
+        await asyncio.to_thread(append, user_id, base, version, rows)
+
+
+def compact(user_id) -> bool:
+    """
+    Rewrite a snapshot with an unsorted tail in created_at order. Returns
+    False when there was nothing to do or a write got there first.
+    """
+    user_dir = _user_dir(user_id)
+    meta = _read_meta(user_dir)
+    if meta is None or meta["sorted_rows"] == meta["rows"]:
+        return False
+
+    snapshot = _open(user_dir, meta).ordered()
+    arrays = {"created_at": snapshot.created_at, "amount": snapshot.amount, "category": snapshot.category}
+    current = _replace(user_id, meta["version"], meta["categories"], arrays, expected=meta)
+    return current is not None and current.sorted_rows == len(current)
+
+
+def compact_all() -> tuple[int, int]:
+    """
+    Returns (snapshots seen, snapshots compacted).
+    """
+    root = Path(settings.SNAPSHOT_DIR)
+    if not root.is_dir():
+        return 0, 0
+
+    seen = compacted = 0
+    for user_dir in root.iterdir():
+        if (user_dir / "meta.json").exists():
+            seen += 1
+            compacted += compact(user_dir.name)
+    return seen, compacted
+
+
+def dataset_response(snapshot: Snapshot, tz, columnar: bool = False):
+    """
+    The ML dataset of an ordered snapshot: records {amount, category,
+    date}, or with `columnar` the arrays themselves with the category
+    names alongside the codes.
+    """
+    import numpy as np
+
+    dates = local_days(snapshot.created_at, tz).astype(str).tolist()
+    if columnar:
+        return FastJSONResponse({
+            "categories": snapshot.categories,
+            "amount": np.asarray(snapshot.amount),
+            "category": np.asarray(snapshot.category),
+            "date": dates,
+        })
+
+    names = np.asarray(snapshot.categories, dtype=object)[snapshot.category].tolist()
+    return FastJSONResponse([
+        {"amount": amount, "category": name, "date": day}
+        for amount, name, day in zip(snapshot.amount.tolist(), names, dates)
+    ])
+
+
+def anomalies(snapshot: Snapshot, tz_name: str, threshold=2):
+    """
+    anomalies_by_category for the anomalies job, run in a job process; the
+    pickled snapshot carries only its file location (see __reduce__).
+    """
+    import math
+    from zoneinfo import ZoneInfo
+
+    snapshot = snapshot.ordered()
+    indexes, scores = category_anomalies(snapshot.amount, snapshot.category, threshold)
+    dates = local_days(snapshot.created_at[indexes], ZoneInfo(tz_name)).astype(str).tolist()
+
+    return [
+        {
+            "amount": float(snapshot.amount[index]),
+            "category": snapshot.categories[snapshot.category[index]],
+            "date": day,
+            "score": None if math.isnan(score) else score,
+        }
+        for index, score, day in zip(indexes.tolist(), scores.tolist(), dates)
+    ]
@@ -1,18 +1,16 @@
-from datetime import datetime, timedelta
 from collections import defaultdict
 
-def analyze_trends(expenses):
-    if not expenses:
+def trends_from_totals(category_totals):
+    """
+    category_totals: {category: amount} over the whole history
+    """
+    if not category_totals:
         return {"message": "No expense data available."}
 
-    category_totals = defaultdict(float)
-    for exp in expenses:
-        category_totals[exp.category] += exp.amount
-
     alerts = []
     total_spent = sum(category_totals.values())
 
-    for category, amount in category_totals.items():
+    for category, amount in sorted(category_totals.items()):
         percent = (amount / total_spent) * 100
 
         if percent > 40:
@@ -26,7 +24,23 @@ def analyze_trends(expenses):
         "alerts": alerts
     }
 
+async def analyze_trends_from(aggregates, user_id):
+    """
+    aggregates: an ExpenseAggregates backend (see services/aggregation.py)
+    """
+    return trends_from_totals(await aggregates.category_totals(user_id))
+
+def analyze_trends(expenses):
+    """
+    Reference implementation over loaded expense rows.
+    """
+    category_totals = defaultdict(float)
+    for exp in expenses:
+        category_totals[exp.category] += exp.amount
+
+    return trends_from_totals(category_totals)
+
 def overspending_alert(total, limit=10000):
     if total > limit:
         return f"Alert: You exceeded your monthly limit of {limit}."
-    return None
\ No newline at end of file
+    return None
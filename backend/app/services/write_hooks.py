@@ -0,0 +1,47 @@
+"""
+Derived state that has to change whenever expenses are written.
+
+Every expense write path (single create, bulk ingestion) calls
+on_expenses_created inside its own transaction so derived tables commit or
+roll back with the rows. Every write path calls after_commit once its
+transaction has committed.
+"""
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.time_buckets import user_zone
+from app.core.cache import bump_data_version
+from app.db.session import record_write
+from app.services import anomaly_stats, budgets, categories, forecasting, rollups, snapshots
+
+
+async def on_expenses_created(db: AsyncSession, user, rows: list[dict]):
+    """
+    rows: dicts with the Expense column values about to be inserted;
+    plus "category", the name; hooks may add column values (e.g.
+    category_id, anomaly flags) before the insert
+    """
+    await categories.assign_ids(db, user.id, rows)
+    await anomaly_stats.apply_expenses(db, rows)
+    await rollups.apply_expenses(db, rows, user_zone(user))
+    await forecasting.mark_stale(db, {row["user_id"] for row in rows})
+    # After mark_stale: snapshot appends are keyed by the bumped version.
+    await snapshots.stage(db, user.id, rows)
+    # After the rollups: a new month's spend is read from them.
+    await budgets.apply_expenses(db, user, rows)
+
+
+async def after_commit(db: AsyncSession, user_id):
+    """
+    Bump the user's data version, invalidating cached responses, pin the
+    user's reads to the primary for a while, and publish the category ids,
+    events and snapshot rows the hooks queued on `db`. Call after any
+    committed write to the user's data (expenses, budgets, ...); running
+    after commit means a concurrent reader cannot cache pre-commit results
+    under the new version, and subscribers never hear about rolled-back
+    writes.
+    """
+    await record_write(user_id)
+    categories.publish(db)
+    await bump_data_version(user_id)
+    await budgets.publish_pending(db)
+    await snapshots.publish(db)
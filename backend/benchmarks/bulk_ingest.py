@@ -0,0 +1,66 @@
+"""
+Throughput of POST /expenses/bulk.
+
+    python -m benchmarks.bulk_ingest --rows 100000 --format csv
+"""
+import argparse
+import asyncio
+import csv
+import io
+import json
+
+from app.core.database import AsyncSessionLocal, engine
+from benchmarks.common import asgi_request, auth_headers, create_user, ensure_schema, synthetic_rows
+
+
+def payload(rows, body_format):
+    records = [
+        {
+            "amount": row["amount"],
+            "category": row["category"],
+            "description": row["description"],
+            "created_at": row["created_at"].isoformat(),
+        }
+        for row in rows
+    ]
+
+    if body_format == "json":
+        return "application/json", json.dumps(records).encode()
+
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=["amount", "category", "description", "created_at"])
+    writer.writeheader()
+    writer.writerows(records)
+    return "text/csv", buffer.getvalue().encode()
+
+
+async def run(rows, body_format):
+    from app.main import app
+
+    await ensure_schema()
+    async with AsyncSessionLocal() as db:
+        user = await create_user(db)
+        await db.commit()
+
+    content_type, body = payload(list(synthetic_rows(user.id, rows)), body_format)
+    headers = {**auth_headers(user.id), "Content-Type": content_type}
+
+    timing = await asgi_request(app, "POST", "/expenses/bulk", headers=headers, body=body)
+    await engine.dispose()
+
+    print(
+        f"{body_format}: {rows} rows, {len(body) / 1e6:.1f} MB, status {timing.status}, "
+        f"{timing.total:.2f}s, {rows / timing.total:,.0f} rows/s"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--format", choices=["csv", "json"], default="csv")
+    args = parser.parse_args()
+    asyncio.run(run(args.rows, args.format))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""
+Storage and GROUP BY cost of category names vs. category ids.
+
+    python -m benchmarks.categories --rows 100000 1000000
+
+For each size a fresh user is seeded, then the user's expenses are copied
+into two temporary tables shaped like schema version 4 (`category` name)
+and version 5 (`category_id`), each with its (user_id, category,
+created_at, id) index. Reported per layout:
+
+    row B     average pg_column_size of a whole row
+    table MB  heap size
+    index MB  size of the category index
+    group ms  per-category totals over the user's rows, best of --repeats;
+              the id layout joins the names onto the grouped result
+
+Exits non-zero if the two layouts give different totals.
+"""
+import argparse
+import asyncio
+import math
+import sys
+from time import perf_counter
+
+from sqlalchemy import text
+
+from app.core.database import engine
+from benchmarks.common import seed_user
+
+# layout: (key column, its value in the copy, per-category totals)
+LAYOUTS = {
+    "name": (
+        "category",
+        "c.name",
+        "SELECT category, sum(amount) FROM bench_by_name WHERE user_id = :user_id GROUP BY category",
+    ),
+    "id": (
+        "category_id",
+        "e.category_id",
+        "SELECT c.name, t.total FROM ("
+        "SELECT category_id, sum(amount) AS total FROM bench_by_id WHERE user_id = :user_id "
+        "GROUP BY category_id) t JOIN categories c ON c.id = t.category_id",
+    ),
+}
+
+
+async def _copy(conn, layout, key, value, user_id):
+    table = f"bench_by_{layout}"
+    await conn.execute(text(f"DROP TABLE IF EXISTS {table}"))
+    await conn.execute(
+        text(
+            f"CREATE TEMPORARY TABLE {table} AS "
+            f"SELECT e.id, e.user_id, e.amount, {value} AS {key}, e.description, e.created_at, "
+            f"e.is_anomaly, e.anomaly_score "
+            f"FROM expenses e JOIN categories c ON c.id = e.category_id WHERE e.user_id = :user_id"
+        ),
+        {"user_id": user_id},
+    )
+    await conn.execute(text(f"CREATE INDEX {table}_category ON {table} (user_id, {key}, created_at, id)"))
+    await conn.execute(text(f"ANALYZE {table}"))
+
+    row_bytes, table_bytes, index_bytes = (
+        await conn.execute(
+            text(
+                f"SELECT (SELECT avg(pg_column_size(t.*)) FROM {table} t), "
+                f"pg_relation_size('{table}'), pg_relation_size('{table}_category')"
+            )
+        )
+    ).one()
+    return float(row_bytes or 0), table_bytes, index_bytes
+
+
+async def _group(conn, query, user_id, repeats):
+    best, totals = None, None
+    for _ in range(repeats):
+        start = perf_counter()
+        totals = dict((await conn.execute(text(query), {"user_id": user_id})).all())
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, totals
+
+
+def _same(a, b):
+    return a.keys() == b.keys() and all(math.isclose(a[k], b[k], rel_tol=1e-9) for k in a)
+
+
+async def run(sizes, repeats):
+    failures = 0
+
+    print(f"{'rows':>9} {'layout':<7} {'row B':>7} {'table MB':>9} {'index MB':>9} {'group ms':>9} {'equal':>6}")
+    for size in sizes:
+        user_id = await seed_user(size)
+
+        async with engine.connect() as conn:
+            results = {}
+            for layout, (key, value, query) in LAYOUTS.items():
+                storage = await _copy(conn, layout, key, value, user_id)
+                results[layout] = (*storage, *await _group(conn, query, user_id, repeats))
+            await conn.rollback()
+
+        equal = _same(results["name"][4], results["id"][4])
+        failures += not equal
+        for layout, (row_bytes, table_bytes, index_bytes, seconds, _) in results.items():
+            print(
+                f"{size:>9} {layout:<7} {row_bytes:>7.1f} {table_bytes / 2**20:>9.2f} "
+                f"{index_bytes / 2**20:>9.2f} {seconds * 1000:>9.1f} {str(equal):>6}"
+            )
+
+    await engine.dispose()
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[100_000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    return asyncio.run(run(args.rows, args.repeats))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
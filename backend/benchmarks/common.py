@@ -0,0 +1,175 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against the database in DATABASE_URL and drive the real
+FastAPI app in-process through its ASGI interface, so they measure the full
+request path (auth, DB, serialization) without a network hop.
+"""
+import asyncio
+import random
+import resource
+import sys
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from time import perf_counter
+
+from sqlalchemy import insert
+
+from app.core.database import AsyncSessionLocal, engine
+from app.core.jwt import create_access_token
+from app.core.security import hash_password
+from app.core.time_buckets import UTC
+from app.db.schema import init_schema
+from app.models.expense import Expense
+from app.models.user import User
+from app.services import anomaly_stats, categories, rollups
+
+CATEGORIES = ["Food", "Transport", "Rent", "Utilities", "Entertainment", "Health", "Shopping"]
+
+BENCH_PASSWORD = "benchmark-password"
+
+
+@dataclass
+class Timing:
+    status: int
+    first_byte: float | None
+    total: float
+    size: int
+
+
+async def asgi_request(app, method, path, query="", headers=None, body=b""):
+    """
+    Send one HTTP request straight into an ASGI app and time it.
+    `first_byte` is measured at the first non-empty body chunk, so it shows
+    time-to-first-byte for streaming responses.
+    """
+    start = perf_counter()
+    timing = Timing(status=0, first_byte=None, total=0.0, size=0)
+    request_sent = False
+    done = asyncio.Event()
+
+    async def receive():
+        nonlocal request_sent
+        if not request_sent:
+            request_sent = True
+            return {"type": "http.request", "body": body, "more_body": False}
+        await done.wait()
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        if message["type"] == "http.response.start":
+            timing.status = message["status"]
+        elif message["type"] == "http.response.body":
+            chunk = message.get("body", b"")
+            if chunk and timing.first_byte is None:
+                timing.first_byte = perf_counter() - start
+            timing.size += len(chunk)
+
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0"},
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "raw_path": path.encode(),
+        "query_string": query.encode(),
+        "root_path": "",
+        "headers": [
+            (name.lower().encode(), value.encode())
+            for name, value in (headers or {}).items()
+        ],
+        "client": ("127.0.0.1", 50000),
+        "server": ("benchmark", 80),
+    }
+
+    try:
+        await app(scope, receive, send)
+    finally:
+        done.set()
+
+    timing.total = perf_counter() - start
+    return timing
+
+
+def peak_rss_mb() -> float:
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024
+
+
+def percentile(values, pct):
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def auth_headers(user_id, role="user"):
+    token = create_access_token({"sub": str(user_id), "role": role})
+    return {"Authorization": f"Bearer {token}"}
+
+
+async def ensure_schema():
+    async with engine.begin() as conn:
+        await init_schema(conn)
+
+
+async def create_user(db, email=None, timezone="UTC"):
+    user = User(
+        id=uuid.uuid4(),
+        email=email or f"bench-{uuid.uuid4().hex[:12]}@example.com",
+        password_hash=hash_password(BENCH_PASSWORD),
+        timezone=timezone,
+    )
+    db.add(user)
+    await db.flush()
+    return user
+
+
+def synthetic_rows(user_id, count, days=3 * 365, seed=0):
+    rng = random.Random(seed)
+    now = datetime.now(UTC)
+
+    for _ in range(count):
+        yield {
+            "id": uuid.uuid4(),
+            "user_id": user_id,
+            "amount": round(rng.lognormvariate(3, 1), 2),
+            "category": rng.choice(CATEGORIES),
+            "description": None,
+            "created_at": now - timedelta(seconds=rng.randrange(days * 86400)),
+        }
+
+
+async def seed_user(rows, batch_size=5000):
+    """
+    Create a throwaway user with `rows` synthetic expenses and rebuilt
+    derived state.
+    Returns the user id.
+    """
+    await ensure_schema()
+
+    async with AsyncSessionLocal() as db:
+        user = await create_user(db)
+        await db.commit()
+        category_ids = await categories.resolve(db, user.id, CATEGORIES)
+        batch = []
+
+        for row in synthetic_rows(user.id, rows):
+            row["category_id"] = category_ids[row.pop("category")]
+            batch.append(row)
+            if len(batch) == batch_size:
+                await db.execute(insert(Expense), batch)
+                batch = []
+        if batch:
+            await db.execute(insert(Expense), batch)
+        await db.commit()
+
+        # Derived state is rebuilt from the committed rows.
+        await rollups.rebuild_rollups(db, user.id)
+        await anomaly_stats.rebuild_stats(db, user.id)
+        await db.commit()
+        return user.id
@@ -0,0 +1,54 @@
+"""
+Monthly forecast: sklearn reference vs. closed form over monthly totals.
+
+    python -m benchmarks.forecast --sizes 10 1000 100000 1000000
+
+The reference times forecast_next_month over per-expense dicts, which is
+what the endpoint used to do. The closed form times what the endpoint does
+now: fold the monthly totals (served by the rollups) into a least-squares
+fit. Both columns report the same prediction.
+"""
+import argparse
+from collections import defaultdict
+from time import perf_counter
+
+from app.ml.forecast import forecast_from_totals, forecast_next_month
+from benchmarks.common import synthetic_rows
+
+
+def timed(fn, *args, repeat=3):
+    best = None
+    for _ in range(repeat):
+        start = perf_counter()
+        result = fn(*args)
+        elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return result, best
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1_000, 100_000, 1_000_000])
+    args = parser.parse_args()
+
+    print(f"{'rows':>9} {'months':>6} {'sklearn ms':>11} {'closed ms':>10} {'speedup':>8} {'|diff|':>8}")
+    for size in args.sizes:
+        rows = list(synthetic_rows(None, size))
+        expenses = [{"date": row["created_at"].date(), "amount": row["amount"]} for row in rows]
+
+        monthly = defaultdict(float)
+        for row in rows:
+            monthly[(row["created_at"].year, row["created_at"].month)] += row["amount"]
+        totals = [total for _, total in sorted(monthly.items())]
+
+        reference, reference_time = timed(forecast_next_month, expenses)
+        closed, closed_time = timed(forecast_from_totals, totals)
+
+        print(
+            f"{size:>9} {len(totals):>6} {reference_time * 1000:>11.2f} {closed_time * 1000:>10.3f} "
+            f"{reference_time / closed_time:>7.0f}x {abs(reference - closed):>8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
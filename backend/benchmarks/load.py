@@ -0,0 +1,211 @@
+"""
+HTTP load benchmark against users created by benchmarks.seed.
+
+    python -m benchmarks.seed --users 20 --rows 1000000
+    python -m benchmarks.load --requests 500 --concurrency 32 --output before.json
+    python -m benchmarks.load --output after.json --compare before.json
+
+Every endpoint is driven through the in-process ASGI app, rotating over the
+seeded users, and reports p50/p95/p99 latency and throughput. With
+--compare the run is checked against a previous result file. An endpoint
+regresses when its p95 grows, or its throughput drops, by more than
+--threshold. The exit status is non-zero on any regression or failed request.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import platform
+import subprocess
+import sys
+from datetime import datetime, timezone
+from time import perf_counter
+from urllib.parse import urlencode
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.user import User
+from benchmarks.common import BENCH_PASSWORD, asgi_request, auth_headers, percentile
+
+JSON_HEADERS = {"Content-Type": "application/json"}
+FORM_HEADERS = {"Content-Type": "application/x-www-form-urlencoded"}
+
+
+def _get(path, query=""):
+    def request(user, headers):
+        return "GET", path, query, headers, b""
+    return request
+
+
+def _create_expense(user, headers):
+    body = json.dumps({"amount": 12.5, "category": "Food", "description": "load test"}).encode()
+    return "POST", "/expenses/", "", {**headers, **JSON_HEADERS}, body
+
+
+def _login(user, headers):
+    body = urlencode({"username": user.email, "password": BENCH_PASSWORD}).encode()
+    return "POST", "/auth/login", "", FORM_HEADERS, body
+
+
+# Reads run before writes so cached responses are not invalidated mid-run.
+ENDPOINTS = {
+    "GET /expenses/paginated": _get("/expenses/paginated", "limit=50"),
+    "GET /expenses/paginated?sort_by=amount": _get("/expenses/paginated", "limit=50&sort_by=amount"),
+    "GET /expenses/dashboard/summary": _get("/expenses/dashboard/summary"),
+    "GET /expenses/analytics/monthly": _get("/expenses/analytics/monthly"),
+    "GET /analytics/monthly-total": _get("/analytics/monthly-total"),
+    "GET /analytics/by-category": _get("/analytics/by-category"),
+    "GET /analytics/last-7-days": _get("/analytics/last-7-days"),
+    "GET /analytics/last-30-days": _get("/analytics/last-30-days"),
+    "GET /analytics/alerts": _get("/analytics/alerts"),
+    "GET /analytics/forecast/monthly": _get("/analytics/forecast/monthly"),
+    "GET /analytics/anomalies": _get("/analytics/anomalies"),
+    "POST /auth/login": _login,
+    "POST /expenses/": _create_expense,
+}
+
+
+async def load_users(prefix, limit):
+    async with AsyncSessionLocal() as db:
+        result = await db.execute(
+            select(User)
+            .where(User.email.like(f"{prefix}-%@example.com"))
+            .order_by(User.email)
+            .limit(limit)
+        )
+        return result.scalars().all()
+
+
+async def drive(app, build, users, requests, concurrency, warmup):
+    clients = itertools.cycle([(user, auth_headers(user.id)) for user in users])
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+    errors = 0
+
+    async def one(record):
+        nonlocal errors
+        async with slots:
+            timing = await asgi_request(app, *build(*next(clients)))
+        if record:
+            latencies.append(timing.total * 1000)
+            errors += timing.status >= 400
+
+    await asyncio.gather(*(one(False) for _ in range(warmup)))
+
+    start = perf_counter()
+    await asyncio.gather(*(one(True) for _ in range(requests)))
+    elapsed = perf_counter() - start
+
+    return {
+        "requests": requests,
+        "errors": errors,
+        "p50_ms": round(percentile(latencies, 50), 3),
+        "p95_ms": round(percentile(latencies, 95), 3),
+        "p99_ms": round(percentile(latencies, 99), 3),
+        "throughput_rps": round(requests / elapsed, 1),
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(baseline, current, threshold):
+    """
+    Returns the names of endpoints that regressed, printing a table.
+    """
+    regressions = []
+    print(f"\n{'endpoint':<42} {'p95 ms':>17} {'req/s':>17}")
+
+    for name, now in current["endpoints"].items():
+        before = baseline["endpoints"].get(name)
+        if before is None:
+            continue
+
+        slower = now["p95_ms"] > before["p95_ms"] * (1 + threshold)
+        fewer = now["throughput_rps"] < before["throughput_rps"] * (1 - threshold)
+        if slower or fewer:
+            regressions.append(name)
+
+        print(
+            f"{name:<42} {before['p95_ms']:>7.1f} -> {now['p95_ms']:>7.1f} "
+            f"{before['throughput_rps']:>7.0f} -> {now['throughput_rps']:>7.0f}"
+            f"{'  REGRESSION' if slower or fewer else ''}"
+        )
+
+    return regressions
+
+
+async def run(args):
+    from app.main import app
+
+    users = await load_users(args.prefix, args.users)
+    if not users:
+        print(f"No users with prefix {args.prefix!r}; run python -m benchmarks.seed first")
+        await engine.dispose()
+        return 1
+
+    selected = args.endpoints or list(ENDPOINTS)
+    results = {}
+
+    print(f"{'endpoint':<42} {'p50':>8} {'p95':>8} {'p99':>8} {'req/s':>8} {'errors':>6}")
+    for name in selected:
+        result = await drive(app, ENDPOINTS[name], users, args.requests, args.concurrency, args.warmup)
+        results[name] = result
+        print(
+            f"{name:<42} {result['p50_ms']:>8.1f} {result['p95_ms']:>8.1f} "
+            f"{result['p99_ms']:>8.1f} {result['throughput_rps']:>8.0f} {result['errors']:>6}",
+            flush=True,
+        )
+
+    await engine.dispose()
+
+    report = {
+        "meta": {
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "commit": _git_commit(),
+            "python": platform.python_version(),
+            "users": len(users),
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "warmup": args.warmup,
+        },
+        "endpoints": results,
+    }
+    if args.output:
+        with open(args.output, "w") as output:
+            json.dump(report, output, indent=2)
+
+    failed = any(result["errors"] for result in results.values())
+    if args.compare:
+        with open(args.compare) as baseline:
+            regressions = compare(json.load(baseline), report, args.threshold)
+        print(f"\n{len(regressions)} regressions (threshold {args.threshold:.0%})")
+        failed = failed or bool(regressions)
+
+    return 1 if failed else 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--prefix", default="load", help="Email prefix used by benchmarks.seed")
+    parser.add_argument("--users", type=int, default=100, help="Rotate over at most this many users")
+    parser.add_argument("--requests", type=int, default=500, help="Measured requests per endpoint")
+    parser.add_argument("--concurrency", type=int, default=32)
+    parser.add_argument("--warmup", type=int, default=20)
+    parser.add_argument("--endpoints", nargs="*", choices=list(ENDPOINTS), metavar="ENDPOINT")
+    parser.add_argument("--output", help="Write results as JSON")
+    parser.add_argument("--compare", help="Baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.10)
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,127 @@
+"""
+Synchronous file logging (the old basicConfig setup) vs. the queued
+pipeline in app.core.logging: cost of a logger.info() call on the event
+loop, and POST /expenses latency under concurrent writes.
+
+    python -m benchmarks.logging_pipeline --requests 2000 --concurrency 50
+
+Both modes write to the same kind of temporary file so only the pipeline
+differs.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import tempfile
+from time import perf_counter
+
+from app.core import logging as app_logging
+from app.core.database import AsyncSessionLocal, engine
+from benchmarks.common import asgi_request, auth_headers, create_user, ensure_schema, percentile
+
+SYNC_FORMAT = "%(asctime)s | %(levelname)s | %(message)s"
+
+
+def use_sync(path):
+    root = logging.getLogger()
+    root.removeHandler(app_logging.queue_handler)
+    handler = logging.FileHandler(path)
+    handler.setFormatter(logging.Formatter(SYNC_FORMAT))
+    root.addHandler(handler)
+    return handler
+
+
+def use_queued(path):
+    root = logging.getLogger()
+    handler = logging.FileHandler(path)
+    handler.setFormatter(app_logging.JsonFormatter())
+
+    app_logging.listener.stop()
+    app_logging.listener.handlers = (handler,)
+    app_logging.listener.start()
+    root.addHandler(app_logging.queue_handler)
+    return handler
+
+
+def restore(handler, listener_handlers):
+    root = logging.getLogger()
+    if handler in root.handlers:
+        root.removeHandler(handler)
+        root.addHandler(app_logging.queue_handler)
+    else:
+        app_logging.listener.stop()
+        app_logging.listener.handlers = listener_handlers
+        app_logging.listener.start()
+    handler.close()
+
+
+async def call_cost(calls):
+    logger = logging.getLogger("app.benchmark")
+    start = perf_counter()
+    for i in range(calls):
+        logger.info("Expense created | user_id=%s | amount=%s", "bench", i)
+    return (perf_counter() - start) / calls * 1e6
+
+
+async def write_load(app, headers, requests, concurrency):
+    slots = asyncio.Semaphore(concurrency)
+    latencies = []
+    body = json.dumps({"amount": 12.5, "category": "Food", "description": "bench"}).encode()
+    headers = {**headers, "Content-Type": "application/json"}
+
+    async def one():
+        async with slots:
+            start = perf_counter()
+            timing = await asgi_request(app, "POST", "/expenses/", headers=headers, body=body)
+            if timing.status != 200:
+                raise RuntimeError(f"POST /expenses/ returned {timing.status}")
+            latencies.append((perf_counter() - start) * 1000)
+
+    start = perf_counter()
+    await asyncio.gather(*(one() for _ in range(requests)))
+    return latencies, requests / (perf_counter() - start)
+
+
+async def run(requests, concurrency, calls):
+    from app.main import app
+
+    await ensure_schema()
+    async with AsyncSessionLocal() as db:
+        user = await create_user(db)
+        await db.commit()
+    headers = auth_headers(user.id)
+    listener_handlers = app_logging.listener.handlers
+
+    with tempfile.TemporaryDirectory() as directory:
+        for mode, setup in (("sync", use_sync), ("queued", use_queued)):
+            handler = setup(os.path.join(directory, f"{mode}.log"))
+            try:
+                per_call = await call_cost(calls)
+                latencies, throughput = await write_load(app, headers, requests, concurrency)
+            finally:
+                restore(handler, listener_handlers)
+
+            print(
+                f"{mode:>6}: logger.info {per_call:.1f}us/call | POST /expenses/ "
+                f"p50={percentile(latencies, 50):.1f}ms p95={percentile(latencies, 95):.1f}ms "
+                f"p99={percentile(latencies, 99):.1f}ms {throughput:.0f} req/s"
+            )
+
+    # Records dropped on a full queue make the queued numbers look better
+    # than they are; raise LOG_QUEUE_SIZE if this is non-zero.
+    print(f"queue: {app_logging.queue_stats()}")
+    await engine.dispose()
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--calls", type=int, default=100_000)
+    args = parser.parse_args()
+    asyncio.run(run(args.requests, args.concurrency, args.calls))
+
+
+if __name__ == "__main__":
+    main()
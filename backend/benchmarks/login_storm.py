@@ -0,0 +1,71 @@
+"""
+Latency of an unrelated endpoint (/health) while /auth/login is flooded.
+
+    python -m benchmarks.login_storm --logins 200 --concurrency 50
+    PASSWORD_HASH_WORKERS=0 python -m benchmarks.login_storm   # bcrypt on the event loop
+"""
+import argparse
+import asyncio
+from urllib.parse import urlencode
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from benchmarks.common import (
+    BENCH_PASSWORD, asgi_request, create_user, ensure_schema, percentile
+)
+
+
+async def run(logins, concurrency, probe_interval):
+    from app.main import app
+
+    await ensure_schema()
+    async with AsyncSessionLocal() as db:
+        user = await create_user(db)
+        await db.commit()
+
+    body = urlencode({"username": user.email, "password": BENCH_PASSWORD}).encode()
+    headers = {"Content-Type": "application/x-www-form-urlencoded"}
+    slots = asyncio.Semaphore(concurrency)
+    statuses = {}
+    probes = []
+    storm_done = asyncio.Event()
+
+    async def login():
+        async with slots:
+            timing = await asgi_request(app, "POST", "/auth/login", headers=headers, body=body)
+        statuses[timing.status] = statuses.get(timing.status, 0) + 1
+
+    async def probe():
+        while not storm_done.is_set():
+            timing = await asgi_request(app, "GET", "/health")
+            probes.append(timing.total * 1000)
+            await asyncio.sleep(probe_interval)
+
+    prober = asyncio.create_task(probe())
+    await asyncio.gather(*(login() for _ in range(logins)))
+    storm_done.set()
+    await prober
+    await engine.dispose()
+
+    print(
+        f"workers={settings.PASSWORD_HASH_WORKERS} rounds={settings.BCRYPT_ROUNDS} "
+        f"logins={logins} concurrency={concurrency} statuses={statuses}"
+    )
+    print(
+        f"/health during storm: n={len(probes)} "
+        f"p50={percentile(probes, 50):.1f}ms p99={percentile(probes, 99):.1f}ms "
+        f"max={max(probes):.1f}ms"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--probe-interval", type=float, default=0.005)
+    args = parser.parse_args()
+    asyncio.run(run(args.logins, args.concurrency, args.probe_interval))
+
+
+if __name__ == "__main__":
+    main()
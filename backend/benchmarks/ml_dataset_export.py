@@ -0,0 +1,75 @@
+"""
+Peak RSS and time-to-first-byte of /analytics/ml-dataset per output format.
+
+    python -m benchmarks.ml_dataset_export --rows 200000
+
+Each format runs in a fresh child process so ru_maxrss reflects that request
+alone. `json` is the original materialize-everything path; `ndjson` and
+`csv` stream from a server-side cursor. `columns` returns parallel arrays,
+read from memory-mapped snapshots when SNAPSHOT_DIR is set.
+"""
+import argparse
+import asyncio
+import json
+import subprocess
+import sys
+
+from benchmarks.common import asgi_request, auth_headers, peak_rss_mb, seed_user
+
+FORMATS = ["json", "columns", "ndjson", "csv"]
+
+
+async def measure(user_id, export_format):
+    from app.core.database import engine
+    from app.main import app
+
+    headers = auth_headers(user_id)
+
+    # Warm up imports, the pool and the auth path before taking the baseline.
+    await asgi_request(app, "GET", "/analytics/monthly-total", headers=headers)
+    baseline = peak_rss_mb()
+
+    timing = await asgi_request(
+        app, "GET", "/analytics/ml-dataset", f"format={export_format}", headers
+    )
+    await engine.dispose()
+
+    return {
+        "format": export_format,
+        "status": timing.status,
+        "bytes": timing.size,
+        "ttfb_ms": round((timing.first_byte or timing.total) * 1000, 1),
+        "total_ms": round(timing.total * 1000, 1),
+        "peak_rss_delta_mb": round(peak_rss_mb() - baseline, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--user", help="Reuse an already seeded user id")
+    parser.add_argument("--child", choices=FORMATS, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        print(json.dumps(asyncio.run(measure(args.user, args.child))))
+        return
+
+    user_id = args.user or str(asyncio.run(seed_user(args.rows)))
+
+    print(f"{'format':<8} {'status':>6} {'MB out':>8} {'TTFB ms':>9} {'total ms':>9} {'peak RSS +MB':>13}")
+    for export_format in FORMATS:
+        output = subprocess.run(
+            [sys.executable, "-m", "benchmarks.ml_dataset_export",
+             "--child", export_format, "--user", user_id],
+            check=True, capture_output=True, text=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        print(
+            f"{result['format']:<8} {result['status']:>6} {result['bytes'] / 1e6:>8.1f} "
+            f"{result['ttfb_ms']:>9} {result['total_ms']:>9} {result['peak_rss_delta_mb']:>13}"
+        )
+
+
+if __name__ == "__main__":
+    main()
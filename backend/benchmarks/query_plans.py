@@ -0,0 +1,133 @@
+"""
+Plan checks for the time-bucketed queries.
+
+    python -m benchmarks.query_plans [--rows 20000]
+
+Seeds a user, EXPLAINs the date-range queries the routes issue, and checks
+that each one is answered by an index range scan whose Index Cond bounds
+the time column (instead of a sequential scan or a post-filter). Sequential
+scans are disabled for the session so small seeded tables still show which
+plans are possible. When expenses is partitioned (app/db/partitions.py),
+the expenses queries must also be pruned to fewer partitions than exist.
+Exits non-zero if any check fails.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from datetime import datetime
+
+from sqlalchemy import func, select, text
+from sqlalchemy.dialects import postgresql
+
+from app.core import time_buckets
+from app.core.database import AsyncSessionLocal, engine
+from app.db import partitions
+from app.models.expense import Expense
+from app.models.rollup import DailySpend, MonthlySpend
+from benchmarks.common import seed_user
+
+
+def plan_nodes(plan):
+    yield plan
+    for child in plan.get("Plans", []):
+        yield from plan_nodes(child)
+
+
+def range_scanned(plan, column):
+    return any(
+        "Index" in node["Node Type"] and column in node.get("Index Cond", "")
+        for node in plan_nodes(plan)
+    )
+
+
+def relations_scanned(plan, prefix):
+    return {
+        node["Relation Name"] for node in plan_nodes(plan)
+        if node.get("Relation Name", "").startswith(prefix)
+    }
+
+
+def queries(user_id):
+    tz = time_buckets.UTC
+    today = time_buckets.local_today(tz)
+    first, last = time_buckets.last_n_dates(30, tz)
+    period = time_buckets.between(datetime(today.year, 1, 1), datetime.now(), tz)
+
+    return [
+        (
+            "expenses by date range",
+            "created_at",
+            select(Expense)
+            .where(Expense.user_id == user_id, period.where(Expense.created_at))
+            .order_by(Expense.created_at, Expense.id)
+            .limit(51),
+        ),
+        (
+            "ml dataset date range",
+            "created_at",
+            select(Expense.amount, Expense.category_id, Expense.created_at)
+            .where(Expense.user_id == user_id)
+            .where(time_buckets.days(first, last, tz).where(Expense.created_at))
+            .order_by(Expense.created_at),
+        ),
+        (
+            "last 30 days trend",
+            "day",
+            select(DailySpend.day, func.sum(DailySpend.total))
+            .where(DailySpend.user_id == user_id, DailySpend.day >= first)
+            .group_by(DailySpend.day),
+        ),
+        (
+            "this month total",
+            "month",
+            select(func.sum(MonthlySpend.total))
+            .where(MonthlySpend.user_id == user_id)
+            .where(MonthlySpend.month == time_buckets.month_start(today)),
+        ),
+    ]
+
+
+async def run(rows):
+    user_id = await seed_user(rows)
+    failures = 0
+
+    async with AsyncSessionLocal() as db:
+        await db.execute(text("SET enable_seqscan = off"))
+        await db.execute(text("ANALYZE"))
+        conn = await db.connection()
+        partition_count = (
+            len(await partitions.monthly_partitions(conn)) + 1
+            if await partitions.is_partitioned(conn) else None
+        )
+
+        for name, column, query in queries(user_id):
+            sql = query.compile(dialect=postgresql.dialect(), compile_kwargs={"literal_binds": True})
+            result = await db.execute(text(f"EXPLAIN (FORMAT JSON) {sql}"))
+            plan = result.scalar()
+            plan = (json.loads(plan) if isinstance(plan, str) else plan)[0]["Plan"]
+
+            ok = range_scanned(plan, column)
+            pruned = ""
+            if partition_count and column == "created_at":
+                scanned = len(relations_scanned(plan, f"{partitions.PARENT}_"))
+                ok = ok and scanned < partition_count
+                pruned = f", {scanned}/{partition_count} partitions"
+            failures += not ok
+            print(f"{'ok  ' if ok else 'FAIL'} {name}: {plan['Node Type']}{pruned}")
+            if not ok:
+                print(json.dumps(plan, indent=2))
+
+    await engine.dispose()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, default=20_000)
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(run(args.rows)) else 0)
+
+
+if __name__ == "__main__":
+    main()
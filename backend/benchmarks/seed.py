@@ -0,0 +1,168 @@
+"""
+Seed the database with synthetic users and expenses for load testing.
+
+    python -m benchmarks.seed --users 20 --rows 1000000 --seed 42
+
+Users are `{prefix}-{n}@example.com` with password BENCH_PASSWORD and a mix
+of timezones. Rows are split across users with a heavy tail (a few users
+own most of the data) and follow per-category amount distributions, a
+daily rhythm and a monthly rent payment, plus rare outliers so anomaly
+detection has something to find. The same --seed gives the same data.
+
+Rows go through ingest.write_rows, so rollups and anomaly statistics are
+maintained exactly as in production. Pick a fresh --prefix to seed again.
+"""
+import argparse
+import asyncio
+import random
+import sys
+import uuid
+from datetime import datetime, timedelta, timezone
+from time import perf_counter
+
+from sqlalchemy import func, select
+
+from app.core.database import AsyncSessionLocal, engine
+from app.models.user import User
+from app.services import ingest
+from benchmarks.common import create_user, ensure_schema
+
+# category: (share of day-to-day expenses, lognormal mu, lognormal sigma)
+CATEGORY_PROFILES = {
+    "Food": (0.36, 2.6, 0.6),
+    "Transport": (0.18, 2.3, 0.7),
+    "Shopping": (0.16, 3.5, 0.9),
+    "Entertainment": (0.12, 3.0, 0.8),
+    "Utilities": (0.08, 4.2, 0.4),
+    "Health": (0.10, 3.8, 1.0),
+}
+
+# Relative number of expenses per local hour of the day.
+HOUR_WEIGHTS = [
+    1, 1, 1, 1, 1, 2, 4, 8, 10, 8, 7, 9,
+    14, 12, 8, 7, 8, 11, 14, 13, 10, 7, 4, 2,
+]
+
+TIMEZONES = ["UTC", "Europe/London", "Europe/Berlin", "America/New_York", "Asia/Kolkata", "Asia/Tokyo"]
+
+OUTLIER_RATE = 0.005
+
+
+def split_rows(total, users, rng):
+    """
+    Heavy-tailed share of `total` per user.
+    """
+    weights = [rng.paretovariate(1.2) for _ in range(users)]
+    scale = total / sum(weights)
+    counts = [int(weight * scale) for weight in weights]
+    counts[0] += total - sum(counts)
+    return counts
+
+
+def realistic_rows(user_id, count, days, rng, now):
+    categories = list(CATEGORY_PROFILES)
+    shares = [CATEGORY_PROFILES[category][0] for category in categories]
+    first_day = now - timedelta(days=days)
+
+    # Rent once a month at a fixed amount per user.
+    rent = round(rng.uniform(600, 2500), 2)
+    month = first_day.replace(day=1, hour=9, minute=0, second=0, microsecond=0)
+    while month < now:
+        if month >= first_day:
+            yield _row(rng, user_id, rent, "Rent", month)
+        month = (month.replace(day=28) + timedelta(days=4)).replace(day=1)
+
+    for _ in range(count):
+        category = rng.choices(categories, shares)[0]
+        _, mu, sigma = CATEGORY_PROFILES[category]
+        amount = rng.lognormvariate(mu, sigma)
+        if rng.random() < OUTLIER_RATE:
+            amount *= rng.uniform(8, 20)
+
+        created_at = (
+            first_day.replace(hour=0, minute=0, second=0, microsecond=0)
+            + timedelta(days=rng.randrange(days))
+            + timedelta(hours=rng.choices(range(24), HOUR_WEIGHTS)[0], seconds=rng.randrange(3600))
+        )
+        if created_at < now:
+            yield _row(rng, user_id, round(amount, 2), category, created_at)
+
+
+def _row(rng, user_id, amount, category, created_at):
+    return {
+        "id": uuid.UUID(int=rng.getrandbits(128), version=4),
+        "user_id": user_id,
+        "amount": amount,
+        "category": category,
+        "description": None,
+        "created_at": created_at,
+    }
+
+
+async def seed_user(email, count, days, rng, now, batch_size):
+    async with AsyncSessionLocal() as db:
+        user = await create_user(db, email, timezone=rng.choice(TIMEZONES))
+        await db.commit()
+
+    written = 0
+    batch = []
+
+    async def flush():
+        nonlocal written
+        async with AsyncSessionLocal() as db:
+            await ingest.write_rows(db, user, batch)
+            await db.commit()
+        written += len(batch)
+        batch.clear()
+
+    for row in realistic_rows(user.id, count, days, rng, now):
+        batch.append(row)
+        if len(batch) == batch_size:
+            await flush()
+    if batch:
+        await flush()
+
+    return written
+
+
+async def run(users, rows, days, seed, prefix, batch_size):
+    await ensure_schema()
+
+    async with AsyncSessionLocal() as db:
+        existing = await db.scalar(
+            select(func.count()).select_from(User).where(User.email.like(f"{prefix}-%@example.com"))
+        )
+    if existing:
+        print(f"{existing} users with prefix {prefix!r} already exist; pick another --prefix")
+        await engine.dispose()
+        return 1
+
+    rng = random.Random(seed)
+    now = datetime.now(timezone.utc).replace(microsecond=0)
+    written = 0
+    start = perf_counter()
+
+    for number, count in enumerate(split_rows(rows, users, rng)):
+        written += await seed_user(f"{prefix}-{number}@example.com", count, days, rng, now, batch_size)
+        elapsed = perf_counter() - start
+        print(f"user {number + 1}/{users}: {written} rows, {written / elapsed:,.0f} rows/s", flush=True)
+
+    await engine.dispose()
+    print(f"Seeded {users} users ({prefix}-N@example.com) with {written} expenses")
+    return 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--rows", type=int, default=100_000, help="Day-to-day expenses across all users (1k-10M)")
+    parser.add_argument("--days", type=int, default=2 * 365)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--prefix", default="load")
+    parser.add_argument("--batch-size", type=int, default=ingest.CHUNK_ROWS)
+    args = parser.parse_args()
+    return asyncio.run(run(args.users, args.rows, args.days, args.seed, args.prefix, args.batch_size))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,92 @@
+"""
+Per-row cost of list responses: ORM objects validated through
+ExpenseResponse (the FastAPI response_model path) vs. column tuples
+encoded with orjson.
+
+    python -m benchmarks.serialization --sizes 100 1000 10000
+
+Both paths are timed from query to encoded body and their JSON is checked
+for equality; the script exits non-zero on a mismatch.
+"""
+import argparse
+import asyncio
+import json
+import sys
+from time import perf_counter
+
+from fastapi.responses import JSONResponse
+from pydantic import TypeAdapter
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal, engine
+from app.core.responses import rows_response, select_expenses
+from app.models.category import Category
+from app.models.expense import Expense
+from app.schemas.expense import ExpenseResponse
+from benchmarks.common import seed_user
+
+RESPONSE_MODEL = TypeAdapter(list[ExpenseResponse])
+
+
+async def orm_body(db, user_id, size):
+    result = await db.execute(
+        select(Expense, Category.name)
+        .join_from(Expense, Category, Expense.category_id == Category.id)
+        .where(Expense.user_id == user_id)
+        .order_by(Expense.created_at.desc(), Expense.id.desc()).limit(size)
+    )
+    expenses = [{**vars(expense), "category": name} for expense, name in result.all()]
+    validated = RESPONSE_MODEL.validate_python(expenses)
+    return JSONResponse(RESPONSE_MODEL.dump_python(validated, mode="json")).body
+
+
+async def columns_body(db, user_id, size):
+    result = await db.execute(
+        select_expenses().where(Expense.user_id == user_id)
+        .order_by(Expense.created_at.desc(), Expense.id.desc()).limit(size)
+    )
+    return rows_response(result.all()).body
+
+
+async def best_of(repeats, make_body, *args):
+    best = None
+    for _ in range(repeats):
+        async with AsyncSessionLocal() as db:
+            start = perf_counter()
+            body = await make_body(db, *args)
+            elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, body
+
+
+async def run(sizes, repeats):
+    user_id = await seed_user(max(sizes))
+    failures = 0
+
+    print(f"{'rows':>7} {'orm+pydantic us/row':>20} {'columns+orjson us/row':>22} {'speedup':>8} {'equal':>6}")
+    for size in sizes:
+        orm_time, orm = await best_of(repeats, orm_body, user_id, size)
+        fast_time, fast = await best_of(repeats, columns_body, user_id, size)
+
+        equal = json.loads(orm) == json.loads(fast)
+        failures += not equal
+
+        print(
+            f"{size:>7} {orm_time / size * 1e6:>20.2f} {fast_time / size * 1e6:>22.2f} "
+            f"{orm_time / fast_time:>7.1f}x {str(equal):>6}"
+        )
+
+    await engine.dispose()
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", type=int, nargs="+", default=[100, 1000, 10000])
+    parser.add_argument("--repeats", type=int, default=5)
+    args = parser.parse_args()
+    return asyncio.run(run(args.sizes, args.repeats))
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+"""
+Analytics services: SQL push-down vs. the pure-Python reference.
+
+    python -m benchmarks.services_pushdown --rows 10000 100000 1000000
+
+For each size a user is seeded, then monthly_comparison and analyze_trends
+run both ways: the reference loads every Expense row and aggregates in
+Python, the push-down path asks SqlAggregates for grouped totals. Results
+are checked for equivalence; the script exits non-zero on a mismatch.
+"""
+import argparse
+import asyncio
+import math
+import sys
+from time import perf_counter
+
+from sqlalchemy import select
+
+from app.core.database import AsyncSessionLocal, engine
+from app.core.time_buckets import local_today, user_zone
+from app.models.category import Category
+from app.models.expense import Expense
+from app.models.user import User
+from app.services.aggregation import PythonAggregates, SqlAggregates
+from app.services.analytics import monthly_comparison, monthly_comparison_from
+from app.services.trend_analysis import analyze_trends, analyze_trends_from
+from benchmarks.common import seed_user
+
+
+def close(a, b):
+    if isinstance(a, dict) and isinstance(b, dict):
+        return a.keys() == b.keys() and all(close(a[k], b[k]) for k in a)
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(close(x, y) for x, y in zip(a, b))
+    if isinstance(a, float) or isinstance(b, float):
+        return math.isclose(a, b, rel_tol=1e-9, abs_tol=1e-6)
+    return a == b
+
+
+async def run(sizes):
+    failures = 0
+
+    print(f"{'rows':>9} {'service':<19} {'python ms':>10} {'sql ms':>8} {'equal':>6}")
+    for size in sizes:
+        user_id = await seed_user(size)
+
+        async with AsyncSessionLocal() as db:
+            tz = user_zone(await db.get(User, user_id))
+            today = local_today(tz)
+
+            start = perf_counter()
+            result = await db.execute(
+                select(Expense.amount, Expense.created_at, Category.name.label("category"))
+                .join_from(Expense, Category, Expense.category_id == Category.id)
+                .where(Expense.user_id == user_id)
+            )
+            expenses = result.all()
+            load_time = perf_counter() - start
+
+            cases = [
+                (
+                    "monthly_comparison",
+                    lambda: monthly_comparison(expenses, today, tz),
+                    lambda: monthly_comparison_from(SqlAggregates(db), user_id, today),
+                    lambda: monthly_comparison_from(PythonAggregates(expenses, tz), user_id, today),
+                ),
+                (
+                    "analyze_trends",
+                    lambda: analyze_trends(expenses),
+                    lambda: analyze_trends_from(SqlAggregates(db), user_id),
+                    lambda: analyze_trends_from(PythonAggregates(expenses, tz), user_id),
+                ),
+            ]
+
+            for name, reference, pushed_down, python_backend in cases:
+                start = perf_counter()
+                expected = reference()
+                python_time = load_time + perf_counter() - start
+
+                start = perf_counter()
+                actual = await pushed_down()
+                sql_time = perf_counter() - start
+
+                equal = close(expected, actual) and close(expected, await python_backend())
+                failures += not equal
+
+                print(
+                    f"{size:>9} {name:<19} {python_time * 1000:>10.1f} "
+                    f"{sql_time * 1000:>8.1f} {'yes' if equal else 'NO':>6}"
+                )
+
+    await engine.dispose()
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    args = parser.parse_args()
+    sys.exit(1 if asyncio.run(run(args.rows)) else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""
+Full-history anomaly scoring from expense rows vs. memory-mapped snapshots.
+
+    python -m benchmarks.snapshots --rows 100000 200000
+
+For each size a fresh user is seeded, then three paths are timed (best of
+--repeats):
+
+    rows      select (amount, category, created_at), build Python lists,
+              anomalies_by_category (the job path without SNAPSHOT_DIR)
+    build     first snapshots.load: stream the rows into new column files
+    mapped    snapshots.load of the existing files + category_anomalies
+
+Snapshots go to SNAPSHOT_DIR, or a temporary directory when it is unset.
+Exits non-zero if the two scorers flag different expenses.
+"""
+import argparse
+import asyncio
+import shutil
+import sys
+import tempfile
+from time import perf_counter
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, engine
+from app.ml.anomaly import anomalies_by_category, category_anomalies
+from app.models.expense import Expense
+from app.services import snapshots
+from benchmarks.common import seed_user
+
+
+async def rows_path(db, user_id):
+    result = await db.execute(
+        select(Expense.amount, Expense.category_id, Expense.created_at)
+        .where(Expense.user_id == user_id)
+        .order_by(Expense.created_at)
+    )
+    rows = result.all()
+    flagged = anomalies_by_category(
+        [row.amount for row in rows], [row.category_id for row in rows], list(range(len(rows)))
+    )
+    return [anomaly["date"] for anomaly in flagged]
+
+
+async def build_path(db, user_id):
+    shutil.rmtree(snapshots._user_dir(user_id), ignore_errors=True)
+    return len(await snapshots.load(db, user_id))
+
+
+async def mapped_path(db, user_id):
+    snapshot = (await snapshots.load(db, user_id)).ordered()
+    indexes, _ = category_anomalies(snapshot.amount, snapshot.category)
+    return indexes.tolist()
+
+
+async def best_of(repeats, path, user_id):
+    best, result = None, None
+    for _ in range(repeats):
+        async with AsyncSessionLocal() as db:
+            start = perf_counter()
+            result = await path(db, user_id)
+            elapsed = perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+async def run(sizes, repeats):
+    failures = 0
+
+    print(f"{'rows':>8} {'rows ms':>9} {'build ms':>9} {'mapped ms':>10} {'speedup':>8} {'equal':>6}")
+    for size in sizes:
+        user_id = await seed_user(size)
+
+        rows_time, expected = await best_of(repeats, rows_path, user_id)
+        build_time, _ = await best_of(repeats, build_path, user_id)
+        mapped_time, flagged = await best_of(repeats, mapped_path, user_id)
+
+        equal = expected == flagged
+        failures += not equal
+        print(
+            f"{size:>8} {rows_time * 1000:>9.1f} {build_time * 1000:>9.1f} "
+            f"{mapped_time * 1000:>10.1f} {rows_time / mapped_time:>7.1f}x {str(equal):>6}"
+        )
+
+    await engine.dispose()
+    return 1 if failures else 0
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--rows", type=int, nargs="+", default=[10_000, 100_000])
+    parser.add_argument("--repeats", type=int, default=3)
+    args = parser.parse_args()
+
+    temporary = None
+    if not settings.SNAPSHOT_DIR:
+        temporary = settings.SNAPSHOT_DIR = tempfile.mkdtemp(prefix="snapshots-")
+    try:
+        return asyncio.run(run(args.rows, args.repeats))
+    finally:
+        if temporary:
+            shutil.rmtree(temporary, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
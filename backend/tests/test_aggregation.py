@@ -0,0 +1,111 @@
+import asyncio
+import uuid
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import insert, select
+
+from app.db.schema import init_schema
+from app.models.category import Category
+from app.models.expense import Expense
+from app.models.user import User
+from app.services import rollups
+from app.services.aggregation import PythonAggregates, SqlAggregates
+from app.services.trend_analysis import analyze_trends_from
+
+ZONES = ("America/Los_Angeles", "Asia/Tokyo", "UTC")
+CATEGORIES = ("Food", "Rent")
+MONTHS = [(2024, 2), (2024, 3), (2024, 4)]
+
+# Around the Feb/Mar and Mar/Apr boundaries, where the three zones disagree
+# on the month.
+STAMPS = [
+    datetime(2024, 2, 29, 12, 0, tzinfo=timezone.utc),
+    datetime(2024, 2, 29, 20, 0, tzinfo=timezone.utc),
+    datetime(2024, 3, 1, 3, 0, tzinfo=timezone.utc),
+    datetime(2024, 3, 15, 12, 0, tzinfo=timezone.utc),
+    datetime(2024, 3, 31, 16, 0, tzinfo=timezone.utc),
+    datetime(2024, 4, 1, 2, 0, tzinfo=timezone.utc),
+    datetime(2024, 4, 1, 9, 0, tzinfo=timezone.utc),
+]
+
+
+def _rows(user_id, category_ids):
+    return [
+        {
+            "user_id": user_id,
+            "amount": 10.0 + i,
+            "category_id": category_ids[CATEGORIES[i % len(CATEGORIES)]],
+            "created_at": stamp,
+        }
+        for i, stamp in enumerate(STAMPS)
+    ]
+
+
+def _loaded(rows, names):
+    return [
+        SimpleNamespace(created_at=row["created_at"], category=names[row["category_id"]], amount=row["amount"])
+        for row in rows
+    ]
+
+
+@pytest.mark.parametrize("zone", ZONES)
+def test_python_months_match_rollups(zone):
+    tz = ZoneInfo(zone)
+    user_id = uuid.uuid4()
+    category_ids = {name: i for i, name in enumerate(CATEGORIES, 1)}
+    names = {i: name for name, i in category_ids.items()}
+    rows = _rows(user_id, category_ids)
+
+    _, monthly = rollups._group(rows, tz)
+    expected = {
+        (month.year, month.month, names[category_id]): total
+        for (_, month, category_id), (total, _) in monthly.items()
+    }
+
+    actual = asyncio.run(PythonAggregates(_loaded(rows, names), tz).month_category_totals(user_id, MONTHS))
+
+    assert actual == pytest.approx(expected)
+
+
+def test_sql_and_python_aggregates_agree(database):
+    async def compare(conn):
+        await init_schema(conn)
+        category_ids = dict(
+            (await conn.execute(
+                select(Category.name, Category.id)
+                .where(Category.user_id.is_(None), Category.name.in_(CATEGORIES))
+            )).all()
+        )
+        names = {i: name for name, i in category_ids.items()}
+
+        users, results = {}, []
+        for zone in ZONES:
+            user_id = uuid.uuid4()
+            await conn.execute(
+                insert(User).values(id=user_id, email=f"{zone}@example.com", password_hash="x", timezone=zone)
+            )
+            users[user_id] = (zone, _rows(user_id, category_ids))
+            await conn.execute(insert(Expense), users[user_id][1])
+        await rollups.rebuild_rollups(conn)
+
+        for user_id, (zone, rows) in users.items():
+            python = PythonAggregates(_loaded(rows, names), ZoneInfo(zone))
+            sql = SqlAggregates(conn)
+            results.append((
+                await sql.month_category_totals(user_id, MONTHS),
+                await python.month_category_totals(user_id, MONTHS),
+                await sql.category_totals(user_id),
+                await python.category_totals(user_id),
+                await analyze_trends_from(sql, user_id),
+                await analyze_trends_from(python, user_id),
+            ))
+        return results
+
+    for sql_months, python_months, sql_totals, python_totals, sql_trends, python_trends in database(compare):
+        assert sql_months == pytest.approx(python_months)
+        assert sql_totals == pytest.approx(python_totals)
+        assert sql_trends["alerts"] == python_trends["alerts"]
+        assert sql_trends["total_spent"] == pytest.approx(python_trends["total_spent"])
@@ -0,0 +1,33 @@
+import math
+import random
+
+from app.ml.anomaly import anomalies_by_category, category_anomalies
+
+
+def test_category_anomalies_matches_anomalies_by_category():
+    rng = random.Random(7)
+    names = ["Food", "Rent", "Few", "Flat"]
+    categories, amounts = [], []
+    for _ in range(2000):
+        name = rng.choice(names[:2])
+        categories.append(name)
+        amounts.append(round(rng.lognormvariate(3, 1), 2))
+    # Fewer than MIN_SAMPLES rows, and a category without spread.
+    categories += ["Few"] * 3 + ["Flat"] * 6
+    amounts += [1.0, 500.0, 2.0] + [10.0] * 6
+
+    expected = anomalies_by_category(amounts, categories, list(range(len(amounts))))
+    indexes, scores = category_anomalies(amounts, [names.index(name) for name in categories])
+
+    assert expected
+    assert indexes.tolist() == [anomaly["date"] for anomaly in expected]
+    for anomaly, score in zip(expected, scores.tolist()):
+        if anomaly["score"] is None:
+            assert math.isnan(score)
+        else:
+            assert score == anomaly["score"]
+
+
+def test_category_anomalies_empty():
+    indexes, scores = category_anomalies([], [])
+    assert len(indexes) == 0 and len(scores) == 0
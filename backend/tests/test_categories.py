@@ -0,0 +1,29 @@
+import uuid
+
+from sqlalchemy import insert
+
+from app.db.schema import init_schema
+from app.models.user import User
+from app.services import categories
+
+
+def test_created_ids_are_cached_only_once_published(database):
+    user_id = uuid.uuid4()
+
+    async def resolve(conn):
+        await init_schema(conn)
+        await conn.execute(insert(User).values(id=user_id, email="categories@example.com", password_hash="x"))
+
+        first = await categories.resolve(conn, user_id, ["Food", "Pottery"])
+        again = await categories.resolve(conn, user_id, ["Pottery"])
+        cached_before = (user_id, "Pottery") in categories._ids
+
+        categories.publish(conn)
+        return first, again, cached_before, categories._ids.get((user_id, "Pottery"))
+
+    first, again, cached_before, cached_after = database(resolve)
+
+    assert set(first) == {"Food", "Pottery"}
+    assert again == {"Pottery": first["Pottery"]}
+    assert not cached_before
+    assert cached_after == first["Pottery"]
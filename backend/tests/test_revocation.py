@@ -0,0 +1,55 @@
+import asyncio
+import time
+import uuid
+
+from app.core.revocation import revocation_list, revoke_payload
+
+
+class Session:
+    def __init__(self):
+        self.added = []
+
+    def add(self, row):
+        self.added.append(row)
+
+
+def _payload(sub, issued_ms, jti=None):
+    payload = {"sub": sub, "iat": issued_ms // 1000, "iat_ms": issued_ms, "exp": issued_ms // 1000 + 900}
+    if jti:
+        payload["jti"] = jti
+    return payload
+
+
+def test_revoking_a_token_with_jti_revokes_only_it():
+    sub = str(uuid.uuid4())
+    now = int(time.time() * 1000)
+    token, other = _payload(sub, now, jti=uuid.uuid4().hex), _payload(sub, now, jti=uuid.uuid4().hex)
+    db = Session()
+
+    asyncio.run(revoke_payload(db, token))
+
+    assert [row.jti for row in db.added] == [token["jti"]]
+    assert revocation_list.is_revoked(token)
+    assert not revocation_list.is_revoked(other)
+
+
+def test_revoking_a_token_without_jti_revokes_the_user_through_it():
+    sub = str(uuid.uuid4())
+    now = int(time.time() * 1000)
+    token = _payload(sub, now)
+    db = Session()
+
+    asyncio.run(revoke_payload(db, token))
+
+    assert [row.user_id for row in db.added] == [uuid.UUID(sub)]
+    assert revocation_list.is_revoked(token)
+    assert not revocation_list.is_revoked(_payload(sub, now + 60_000))
+
+
+def test_revoking_a_token_with_whole_second_iat_covers_that_second():
+    sub = str(uuid.uuid4())
+    token = {"sub": sub, "iat": int(time.time()), "exp": int(time.time()) + 900}
+
+    asyncio.run(revoke_payload(Session(), token))
+
+    assert revocation_list.is_revoked(token)
@@ -0,0 +1,36 @@
+from sqlalchemy import inspect, text
+
+from app.db.schema import ADDED_INDEXES, init_schema
+from app.models.expense import Expense
+
+
+def test_every_expenses_index_is_added():
+    assert {index.name for index in ADDED_INDEXES} == {index.name for index in Expense.__table__.indexes}
+
+
+def test_init_schema_upgrades_existing_tables(database):
+    async def upgrade(conn):
+        await init_schema(conn)
+        # An expenses table from before the indexes and the anomaly columns.
+        for index in Expense.__table__.indexes:
+            await conn.execute(text(f"DROP INDEX IF EXISTS {index.name}"))
+        await conn.execute(text("ALTER TABLE expenses DROP COLUMN is_anomaly, DROP COLUMN anomaly_score"))
+        await conn.execute(text("ALTER TABLE users DROP COLUMN timezone"))
+
+        await init_schema(conn)
+
+        def describe(sync_conn):
+            inspector = inspect(sync_conn)
+            return (
+                {index["name"] for index in inspector.get_indexes("expenses")},
+                {column["name"] for column in inspector.get_columns("expenses")},
+                {column["name"] for column in inspector.get_columns("users")},
+            )
+
+        return await conn.run_sync(describe)
+
+    indexes, expense_columns, user_columns = database(upgrade)
+
+    assert {index.name for index in Expense.__table__.indexes} <= indexes
+    assert {"is_anomaly", "anomaly_score"} <= expense_columns
+    assert "timezone" in user_columns
@@ -0,0 +1,105 @@
+import pickle
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.core.time_buckets import Period, epoch_micros
+from app.services import snapshots
+
+T0 = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+
+def rows(*hours):
+    return [(T0 + timedelta(hours=h), float(h), "Food" if h % 2 else "Rent") for h in hours]
+
+
+def create(user_id, version, snapshot_rows):
+    categories = []
+    arrays = {
+        "created_at": np.array([epoch_micros(row[0]) for row in snapshot_rows], dtype="<i8"),
+        "amount": np.array([row[1] for row in snapshot_rows], dtype="<f8"),
+        "category": snapshots._encode([row[2] for row in snapshot_rows], categories),
+    }
+    return snapshots._replace(user_id, version, categories, arrays)
+
+
+@pytest.fixture
+def user_id(tmp_path, monkeypatch):
+    monkeypatch.setattr(settings, "SNAPSHOT_DIR", str(tmp_path))
+    return "user"
+
+
+def test_append_when_one_version_behind(user_id):
+    create(user_id, 3, rows(0, 2))
+
+    assert snapshots.append(user_id, 3, 4, rows(3))
+
+    snapshot = snapshots.read(user_id)
+    assert snapshot.version == 4
+    assert snapshot.amount.tolist() == [0.0, 2.0, 3.0]
+    assert [snapshot.categories[code] for code in snapshot.category] == ["Rent", "Rent", "Food"]
+    assert snapshot.sorted_rows == 3
+
+
+@pytest.mark.parametrize("base", [2, 4])
+def test_append_refused_unless_one_version_behind(user_id, base):
+    create(user_id, 3, rows(0, 2))
+
+    assert not snapshots.append(user_id, base, base + 1, rows(3))
+
+    snapshot = snapshots.read(user_id)
+    assert snapshot.version == 3
+    assert len(snapshot) == 2
+
+
+def test_append_without_snapshot(user_id):
+    assert not snapshots.append(user_id, 0, 1, rows(0))
+    assert snapshots.read(user_id) is None
+
+
+def test_ordered_and_between_with_unsorted_tail(user_id):
+    create(user_id, 1, rows(0, 2, 4))
+    assert snapshots.append(user_id, 1, 2, rows(1, 5))
+
+    snapshot = snapshots.read(user_id)
+    assert snapshot.sorted_rows == 3
+    assert len(snapshot) == 5
+
+    ordered = snapshot.ordered()
+    assert ordered.amount.tolist() == [0.0, 1.0, 2.0, 4.0, 5.0]
+    assert ordered.sorted_rows == len(ordered)
+    assert ordered.ordered() is ordered
+
+    window = ordered.between(Period(T0 + timedelta(hours=1), T0 + timedelta(hours=4)))
+    assert window.amount.tolist() == [1.0, 2.0]
+    assert [window.categories[code] for code in window.category] == ["Food", "Rent"]
+
+
+def test_pickle_maps_the_same_files(user_id):
+    create(user_id, 1, rows(0, 1, 2))
+    snapshot = snapshots.read(user_id)
+
+    clone = pickle.loads(pickle.dumps(snapshot))
+
+    assert clone.source == snapshot.source
+    assert isinstance(clone.amount, np.memmap)
+    assert clone.created_at.tolist() == snapshot.created_at.tolist()
+    assert clone.amount.tolist() == snapshot.amount.tolist()
+    assert clone.category.tolist() == snapshot.category.tolist()
+    assert (clone.categories, clone.version, clone.sorted_rows) == (
+        snapshot.categories, snapshot.version, snapshot.sorted_rows
+    )
+
+
+def test_pickle_in_memory_snapshot():
+    snapshot = snapshots.Snapshot(
+        np.array([1, 2], dtype="<i8"), np.array([1.0, 2.0]), np.array([0, 0], dtype="<i2"),
+        ["Food"], version=0, sorted_rows=2,
+    )
+
+    clone = pickle.loads(pickle.dumps(snapshot))
+
+    assert clone.source is None
+    assert clone.amount.tolist() == [1.0, 2.0]
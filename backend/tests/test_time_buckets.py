@@ -0,0 +1,78 @@
+import uuid
+from datetime import date, datetime, timedelta, timezone
+from zoneinfo import ZoneInfo
+
+import pytest
+from sqlalchemy import insert, inspect, select, text
+
+from app.core.time_buckets import EPOCH, ONE_MICROSECOND, epoch_micros, local_day, local_days, month
+from app.db.schema import init_schema
+from app.models.category import Category
+from app.models.expense import Expense
+from app.models.user import User
+
+
+@pytest.mark.parametrize(
+    "zone", ["UTC", "Europe/Berlin", "America/New_York", "Australia/Lord_Howe", "Pacific/Apia"]
+)
+def test_local_days_matches_local_day_across_dst(zone):
+    tz = ZoneInfo(zone)
+    start = datetime(2011, 1, 1, tzinfo=timezone.utc)
+    stamps = [start + timedelta(minutes=17 * i) for i in range(40_000)]
+
+    days = local_days([epoch_micros(stamp) for stamp in stamps], tz)
+
+    assert [day.item() for day in days] == [local_day(stamp, tz) for stamp in stamps]
+
+
+def test_local_days_before_epoch():
+    tz = ZoneInfo("America/New_York")
+    stamp = EPOCH - timedelta(hours=30, microseconds=1)
+
+    assert local_days([epoch_micros(stamp)], tz)[0].item() == local_day(stamp, tz)
+
+
+def test_month_range_uses_created_at_index(database):
+    tz = ZoneInfo("Europe/Berlin")
+    march = month(date(2024, 3, 5), tz)  # 2024-02-29 23:00 to 2024-03-31 22:00 UTC
+    user_id = uuid.uuid4()
+    stamps = {
+        "before": march.start - ONE_MICROSECOND,
+        "first": march.start,
+        "last": march.end - ONE_MICROSECOND,
+        "after": march.end,
+    }
+
+    async def query(conn):
+        await init_schema(conn)
+        indexes = await conn.run_sync(lambda sync_conn: inspect(sync_conn).get_indexes("expenses"))
+
+        category_id = await conn.scalar(select(Category.id).where(Category.user_id.is_(None)).limit(1))
+        await conn.execute(
+            insert(User).values(id=user_id, email="berlin@example.com", password_hash="x", timezone=tz.key)
+        )
+        await conn.execute(
+            insert(Expense),
+            [
+                {
+                    "user_id": user_id, "amount": 1.0, "category_id": category_id,
+                    "description": name, "created_at": stamp,
+                }
+                for name, stamp in stamps.items()
+            ],
+        )
+
+        stmt = select(Expense.description).where(Expense.user_id == user_id, march.where(Expense.created_at))
+        found = set((await conn.scalars(stmt)).all())
+
+        await conn.execute(text("SET LOCAL enable_seqscan = off"))
+        compiled = stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+        plan = "\n".join((await conn.scalars(text(f"EXPLAIN {compiled}"))).all())
+        return indexes, found, plan
+
+    indexes, found, plan = database(query)
+
+    assert "ix_expenses_user_created_id" in {index["name"] for index in indexes}
+    assert found == {"first", "last"}
+    assert "ix_expenses_user_created_id" in plan
+    assert "created_at >=" in plan and "created_at <" in plan